@@ -2,12 +2,22 @@ import discord
 from discord.ext import commands
 import aiohttp
 import asyncio
-from datetime import datetime, timedelta
+import contextvars
+from datetime import datetime, timedelta, timezone
 import json
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import sqlite3
+import sys
+import threading
 import random
+import re
+import unicodedata
+import numpy as np
+import heapq
+import math
 import time
+import calendar
 import os
 from dotenv import load_dotenv
 from groq import Groq
@@ -40,6 +50,15 @@ LIFETIME_PRICE = 100.00
 # Cooldown for free/trial users (in hours)
 FREE_USER_COOLDOWN_HOURS = 3
 
+# Gated-command rate limits (token buckets): a full bucket allows `capacity`
+# uses back to back, then one use comes back every `refill_seconds`
+RATE_LIMITS = {  # tier -> (capacity, refill_seconds)
+    'premium': (1, 1800),  # 2 per hour, one every 30 minutes (no back-to-back burst)
+    'trial': (1, FREE_USER_COOLDOWN_HOURS * 3600),  # 1 every FREE_USER_COOLDOWN_HOURS
+}
+RATE_LIMIT_OVERRIDES = {}  # (tier, command or group) -> (capacity, refill_seconds)
+RATE_LIMIT_GROUPS = {}  # command -> bucket shared with other commands, e.g. {'locks': 'picks', 'potd': 'picks'}
+
 # Premium role ID
 PREMIUM_ROLE_ID = int(os.getenv('PREMIUM_ROLE_ID', '1463777526253092915'))
 
@@ -61,18 +80,381 @@ FREE_TRIAL_DAYS = 3
 # Bot setup status
 BOT_SETUP_COMPLETE = False
 
+# Shared HTTP client (pooled keep-alive connections for every upstream API)
+HTTP_POOL_LIMIT = int(os.getenv('HTTP_POOL_LIMIT', '50'))  # Max open connections overall
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv('HTTP_POOL_LIMIT_PER_HOST', '10'))  # Max per upstream host
+HTTP_DNS_CACHE_SECONDS = 300  # Cache DNS lookups for 5 minutes
+HTTP_KEEPALIVE_SECONDS = 60  # Keep idle connections open between refreshes
+
+# Per-event props fetching
+MAX_EVENTS_PER_SPORT = int(os.getenv('MAX_EVENTS_PER_SPORT', '5'))  # 0 = fetch the full slate
+EVENT_FETCH_CONCURRENCY = int(os.getenv('EVENT_FETCH_CONCURRENCY', '4'))  # Parallel /events/{id}/odds calls
+
+# Multi-league sweeps (tennis, soccer) share one deadline across all leagues
+LEAGUE_SWEEP_DEADLINE_SECONDS = 15
+
+# The Odds API credit budget (credits per billing month)
+ODDS_API_MONTHLY_BUDGET = int(os.getenv('ODDS_API_MONTHLY_BUDGET', '500'))
+ODDS_API_RESERVE_CREDITS = int(os.getenv('ODDS_API_RESERVE_CREDITS', '25'))  # Never spend the last N credits on commands
+
+# Snapshot freshness for lines/aichat (stale-while-revalidate)
+SNAPSHOT_FRESH_SECONDS = int(os.getenv('SNAPSHOT_FRESH_SECONDS', '600'))  # Serve as-is under 10 minutes old
+SNAPSHOT_MAX_STALE_SECONDS = int(os.getenv('SNAPSHOT_MAX_STALE_SECONDS', '7200'))  # Serve + refresh in background up to 2 hours old
+
+# Background refresh cadence, by how soon the sport's next game starts
+REFRESH_CADENCE = [  # (next game starts within N seconds, refresh every M seconds)
+    (3600, 600),  # Within an hour: every 10 minutes
+    (6 * 3600, 1800),  # Within 6 hours: every 30 minutes
+    (24 * 3600, 7200),  # Within a day: every 2 hours
+]
+REFRESH_IDLE_SECONDS = 6 * 3600  # Next game is more than a day out
+REFRESH_NO_EVENTS_SECONDS = 12 * 3600  # Nothing on the board at all
+REFRESH_LIVE_WINDOW_SECONDS = 4 * 3600  # Games that started this recently still count as live
+REFRESH_RETRY_SECONDS = 120  # First retry after a failed fetch, doubling each time it fails again
+REFRESH_RETRY_MAX_SECONDS = 1800  # Cap on the failed-fetch backoff
+REFRESH_STARTUP_STAGGER_SECONDS = 30  # Spread the first pass out instead of fetching every sport at once
+REFRESH_JITTER = 0.1  # +/-10% so sports don't bunch up
+
+# NBA stats enrichment (balldontlie)
+STATS_PLAYERS_PER_REQUEST = 10  # player_ids[] per /stats request
+STATS_FETCH_CONCURRENCY = 3  # Parallel balldontlie requests
+STATS_GAMES_PER_PLAYER = 10  # Games each hit rate is graded on
+STATS_LOOKBACK_DAYS = 45  # Cold fill: only pull box scores this recent
+STATS_SYNC_SECONDS = 3 * 3600  # Don't re-check a player's game log more often than this
+PLAYER_ID_CACHE_DAYS = 30  # Re-resolve player names to ids after this long
+
+# Edge thresholds (no-vig fair % minus the best price's implied %)
+VALUE_MIN_EDGE = 2.0  # !value lists picks at least this far above the best price
+MODEL_MIN_EDGE = 1.0  # !model's floor for a playable edge
+LEADERBOARD_SIZE = 25  # Picks kept per ranked view (commands show at most 10)
+PLAYER_FUZZY_CANDIDATES = 10  # Names scored by edit distance per misspelled lookup
+
+# Arbitrage / middle scanner (returns are fractions of the total stake)
+ARB_MIN_RETURN = 0.0  # Report arbs that lock in more than this
+MIDDLE_MAX_COST = 0.05  # Report middles whose worst case loses at most 5%
+ARB_RESULTS_LIMIT = 25  # Opportunities kept per sport
+ODDS_HISTORY_DAYS = 7  # Line/price history kept for !movement and !sharp
+
+# Rate-limit buckets are kept in memory and written back in batches
+ENTITLEMENT_FLUSH_SECONDS = 30  # At most this much usage is lost if the process dies
+
+# SQLite (queries run on worker threads, never on the event loop)
+DB_PATH = 'premium_users.db'
+DB_READER_THREADS = 2  # Concurrent read queries; writes share one writer thread
+DB_CACHE_KIB = 16384  # Page cache per connection (16 MB)
+DB_MMAP_BYTES = 64 * 1024 * 1024  # Memory-map up to 64 MB of the file for reads
+DB_BUSY_TIMEOUT_MS = 5000  # Wait this long on a lock before "database is locked"
+DB_STATEMENT_CACHE_SIZE = 256  # Prepared statements kept per connection
+DB_WAL_AUTOCHECKPOINT_PAGES = 1000  # Passive checkpoint once the WAL passes ~4 MB
+DB_WAL_SIZE_LIMIT_BYTES = 32 * 1024 * 1024  # Truncate the WAL back to this after a checkpoint
+DB_CHECKPOINT_SECONDS = 300  # Writer runs a TRUNCATE checkpoint at most this often
+
 # ===== END CONFIG =====
 
+# === SHARED HTTP CLIENT ===
+# One session for the whole bot lifetime so The Odds API and balldontlie
+# calls reuse open TCP/TLS connections instead of handshaking every time
+_http_session = None
+
+def get_http_session():
+    """Get the shared HTTP session (created on first use inside the event loop)"""
+    global _http_session
+    
+    if _http_session is None or _http_session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=HTTP_DNS_CACHE_SECONDS,
+            keepalive_timeout=HTTP_KEEPALIVE_SECONDS
+        )
+        _http_session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=15)
+        )
+    
+    return _http_session
+
+async def close_http_session():
+    """Close the shared HTTP session and its connection pool"""
+    global _http_session
+    
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
+
+# === DATABASE ===
+# Coroutines never call sqlite3 themselves; they await `db`. Each query runs
+# on a worker thread in its own transaction: writes are queued on a single
+# writer thread (SQLite allows one writer, so they never wait on each other's
+# locks), reads go to a small reader pool. The gateway loop only awaits a
+# future, so disk I/O and lock waits can't stall heartbeats or other commands.
+#
+# Every worker keeps one tuned connection for the life of the process, so
+# the file open, schema parse and prepared statements are paid for once. The
+# database runs in WAL mode: readers see the last commit while the writer
+# appends, and the writer checkpoints the log back into the file.
+
+def db_fetch_one(c, query, params=()):
+    c.execute(query, params)
+    return c.fetchone()
+
+def db_fetch_all(c, query, params=()):
+    c.execute(query, params)
+    return c.fetchall()
+
+def db_execute(c, query, params=()):
+    c.execute(query, params)
+    return c.rowcount
+
+class Database:
+    """Async repository over premium_users.db (one method per query)"""
+    
+    def __init__(self, path):
+        self.path = path
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-writer')
+        self._readers = ThreadPoolExecutor(max_workers=DB_READER_THREADS, thread_name_prefix='db-reader')
+        self._local = threading.local()  # .conn = this worker thread's connection
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._last_checkpoint = time.time()
+    
+    def _connection(self, readonly):
+        """This worker thread's long-lived connection (opened and tuned on first use)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Closed from close() on the loop thread, after the workers have stopped
+            conn = sqlite3.connect(self.path, cached_statements=DB_STATEMENT_CACHE_SIZE, check_same_thread=False)
+            conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}")
+            conn.execute("PRAGMA synchronous = NORMAL")  # Durable at checkpoints; safe with WAL
+            conn.execute(f"PRAGMA cache_size = -{DB_CACHE_KIB}")
+            conn.execute(f"PRAGMA mmap_size = {DB_MMAP_BYTES}")
+            if readonly:
+                conn.execute("PRAGMA query_only = 1")
+            else:
+                conn.execute(f"PRAGMA wal_autocheckpoint = {DB_WAL_AUTOCHECKPOINT_PAGES}")
+                conn.execute(f"PRAGMA journal_size_limit = {DB_WAL_SIZE_LIMIT_BYTES}")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    def _run(self, fn, args, readonly=True):
+        """fn(cursor, *args) in one transaction - called on a worker thread"""
+        conn = self._connection(readonly)
+        try:
+            result = fn(conn.cursor(), *args)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return result
+    
+    def _run_write(self, fn, args):
+        """_run on the writer, plus the periodic checkpoint
+        
+        wal_autocheckpoint copies pages back as the log grows, but it can't
+        finish while a reader is mid-query and never shrinks the file. A
+        TRUNCATE checkpoint every DB_CHECKPOINT_SECONDS resets the log.
+        """
+        result = self._run(fn, args, readonly=False)
+        if time.time() - self._last_checkpoint >= DB_CHECKPOINT_SECONDS:
+            self._last_checkpoint = time.time()
+            busy, log_pages, checkpointed = self._local.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+            if busy:
+                print(f"⚠️ WAL checkpoint blocked by readers ({checkpointed}/{log_pages} pages copied)")
+        return result
+    
+    async def read(self, fn, *args):
+        """Await fn(cursor, *args) on the reader pool (read-only connections)"""
+        return await asyncio.get_running_loop().run_in_executor(self._readers, self._run, fn, args)
+    
+    async def write(self, fn, *args):
+        """Await fn(cursor, *args) on the writer thread"""
+        return await asyncio.get_running_loop().run_in_executor(self._writer, self._run_write, fn, args)
+    
+    def submit(self, fn, *args):
+        """Queue a write from sync code without waiting; returns a concurrent.futures.Future"""
+        
+        def log_error(future):
+            if future.exception():
+                print(f"Database error in {fn.__name__}: {future.exception()}")
+        
+        future = self._writer.submit(self._run_write, fn, args)
+        future.add_done_callback(log_error)
+        return future
+    
+    def close(self):
+        """Finish queued writes, stop the worker threads and close their connections
+        
+        Closing the last connection checkpoints the WAL into the main file.
+        """
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+    
+    # --- premium_users ---
+    
+    async def get_subscription(self, user_id):
+        """(subscription_start, subscription_end, status, payment_method, trial_used) or None"""
+        return await self.read(db_fetch_one, """SELECT subscription_start, subscription_end, status, payment_method, trial_used
+                                                FROM premium_users WHERE user_id = ?""", (user_id,))
+    
+    async def save_subscription(self, user_id, username, start_date, end_date, payment_method, transaction_id=None, trial_used=0):
+        """Create or replace a user's subscription as active"""
+        await self.write(db_execute, """INSERT OR REPLACE INTO premium_users
+                                        (user_id, username, payment_method, transaction_id, subscription_start, subscription_end, status, trial_used)
+                                        VALUES (?, ?, ?, ?, ?, ?, 'active', ?)""",
+                         (user_id, username, payment_method, transaction_id, start_date.isoformat(), end_date.isoformat(), trial_used))
+    
+    async def set_subscription_status(self, user_id, status):
+        await self.write(db_execute, "UPDATE premium_users SET status = ? WHERE user_id = ?", (status, user_id))
+    
+    async def delete_subscription(self, user_id):
+        await self.write(db_execute, "DELETE FROM premium_users WHERE user_id = ?", (user_id,))
+    
+    async def list_subscriptions(self, status):
+        """[(user_id, username, subscription_end)] with this status"""
+        return await self.read(db_fetch_all, "SELECT user_id, username, subscription_end FROM premium_users WHERE status = ?", (status,))
+    
+    # --- pending_verifications ---
+    
+    async def create_verification(self, user_id, username, payment_method, transaction_id, proof_url):
+        """Queue a payment for review; returns its verification id"""
+        
+        def insert(c):
+            c.execute("""INSERT INTO pending_verifications
+                         (user_id, username, payment_method, transaction_id, proof_url, submitted_at)
+                         VALUES (?, ?, ?, ?, ?, ?)""",
+                      (user_id, username, payment_method, transaction_id, proof_url, datetime.now().isoformat()))
+            return c.lastrowid
+        
+        return await self.write(insert)
+    
+    async def approve_verification(self, verification_id, start_date, end_date):
+        """Activate the payer's subscription and mark the verification approved (one transaction)
+        
+        Returns (user_id, username, payment_method, transaction_id), or None if the id is unknown.
+        """
+        
+        def approve(c):
+            result = db_fetch_one(c, "SELECT user_id, username, payment_method, transaction_id FROM pending_verifications WHERE id = ?",
+                                  (verification_id,))
+            if result:
+                c.execute("""INSERT OR REPLACE INTO premium_users
+                             (user_id, username, payment_method, transaction_id, subscription_start, subscription_end, status)
+                             VALUES (?, ?, ?, ?, ?, ?, 'active')""",
+                          (*result, start_date.isoformat(), end_date.isoformat()))
+                c.execute("UPDATE pending_verifications SET status = 'approved' WHERE id = ?", (verification_id,))
+            return result
+        
+        return await self.write(approve)
+    
+    async def deny_verification(self, verification_id):
+        """Mark a verification denied; returns the payer's user_id or None"""
+        
+        def deny(c):
+            c.execute("UPDATE pending_verifications SET status = 'denied' WHERE id = ?", (verification_id,))
+            result = db_fetch_one(c, "SELECT user_id FROM pending_verifications WHERE id = ?", (verification_id,))
+            return result[0] if result else None
+        
+        return await self.write(deny)
+    
+    async def list_pending_verifications(self):
+        """[(id, user_id, username, payment_method, transaction_id, submitted_at)]"""
+        return await self.read(db_fetch_all, """SELECT id, user_id, username, payment_method, transaction_id, submitted_at
+                                                FROM pending_verifications WHERE status = 'pending'""")
+    
+    # --- rate_limit_buckets ---
+    
+    async def get_entitlement(self, user_id):
+        """((status, subscription_end) or None, [(bucket, spent, updated_at)]) in one read"""
+        
+        def load(c):
+            subscription = db_fetch_one(c, "SELECT status, subscription_end FROM premium_users WHERE user_id = ?", (user_id,))
+            usage = db_fetch_all(c, "SELECT bucket, spent, updated_at FROM rate_limit_buckets WHERE user_id = ?", (user_id,))
+            return subscription, usage
+        
+        return await self.read(load)
+    
+    # --- user_bankrolls / user_bets ---
+    
+    async def get_bankroll(self, user_id):
+        """(starting_bankroll, current_bankroll, total_profit, total_bets, wins, losses) or None"""
+        return await self.read(db_fetch_one, """SELECT starting_bankroll, current_bankroll, total_profit, total_bets, wins, losses
+                                                FROM user_bankrolls WHERE user_id = ?""", (user_id,))
+    
+    async def set_bankroll(self, user_id, amount):
+        """Start (or restart) tracking from this amount"""
+        await self.write(db_execute, """INSERT INTO user_bankrolls (user_id, starting_bankroll, current_bankroll, total_profit)
+                                        VALUES (?, ?, ?, 0)
+                                        ON CONFLICT(user_id) DO UPDATE SET
+                                        starting_bankroll = excluded.starting_bankroll, current_bankroll = excluded.current_bankroll""",
+                         (user_id, amount, amount))
+    
+    async def recent_bets(self, user_id, limit=5):
+        """[(pick_description, amount, odds, result, profit, bet_date)], newest first"""
+        return await self.read(db_fetch_all, """SELECT pick_description, amount, odds, result, profit, bet_date FROM user_bets
+                                                WHERE user_id = ? ORDER BY id DESC LIMIT ?""", (user_id, limit))
+    
+    # --- user_notifications ---
+    
+    async def get_notifications(self, user_id):
+        """(nba, nfl, mlb, nhl, soccer) flags or None"""
+        return await self.read(db_fetch_one, "SELECT nba, nfl, mlb, nhl, soccer FROM user_notifications WHERE user_id = ?", (user_id,))
+    
+    async def toggle_notification(self, user_id, sport):
+        """Flip one sport's flag (sport must be a column name); returns the new value"""
+        
+        def toggle(c):
+            c.execute(f"""INSERT INTO user_notifications (user_id, {sport}) VALUES (?, 1)
+                          ON CONFLICT(user_id) DO UPDATE SET {sport} = 1 - {sport}""", (user_id,))
+            return db_fetch_one(c, f"SELECT {sport} FROM user_notifications WHERE user_id = ?", (user_id,))[0]
+        
+        return await self.write(toggle)
+    
+    # --- odds_api_usage ---
+    
+    async def quota_spend_breakdown(self, since):
+        """([(sport, credits)], [(command, credits)]) spent since a timestamp, biggest first"""
+        
+        def breakdown(c):
+            by_sport = db_fetch_all(c, """SELECT sport, SUM(cost) FROM odds_api_usage WHERE requested_at >= ?
+                                          GROUP BY sport ORDER BY SUM(cost) DESC""", (since,))
+            by_command = db_fetch_all(c, """SELECT command, SUM(cost) FROM odds_api_usage WHERE requested_at >= ?
+                                            GROUP BY command ORDER BY SUM(cost) DESC""", (since,))
+            return by_sport, by_command
+        
+        return await self.read(breakdown)
+
+db = Database(DB_PATH)
+
+class FTCBot(commands.Bot):
+    async def close(self):
+        # Tear down shared clients after discord.py has disconnected
+        try:
+            await super().close()
+        finally:
+            await close_http_session()
+            rate_limiter.flush()
+            flush_quota_ledger()
+            db.close()
+
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
-bot = commands.Bot(command_prefix='!', intents=intents)
+bot = FTCBot(command_prefix='!', intents=intents)
 
 # Initialize database
 def init_db():
-    conn = sqlite3.connect('premium_users.db')
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     
+    # WAL is a property of the file, so switching once here covers every connection
+    c.execute("PRAGMA journal_mode = WAL")
+    
     c.execute('''CREATE TABLE IF NOT EXISTS premium_users
                  (user_id INTEGER PRIMARY KEY,
                   username TEXT,
@@ -94,44 +476,13 @@ def init_db():
                   submitted_at TEXT,
                   status TEXT DEFAULT 'pending')''')
     
-    c.execute('''CREATE TABLE IF NOT EXISTS command_cooldowns
-                 (user_id INTEGER PRIMARY KEY,
-                  predict_count INTEGER DEFAULT 0,
-                  predict_reset_time INTEGER,
-                  locks_count INTEGER DEFAULT 0,
-                  locks_reset_time INTEGER,
-                  potd_count INTEGER DEFAULT 0,
-                  potd_reset_time INTEGER,
-                  compare_count INTEGER DEFAULT 0,
-                  compare_reset_time INTEGER,
-                  value_count INTEGER DEFAULT 0,
-                  value_reset_time INTEGER,
-                  parlay_count INTEGER DEFAULT 0,
-                  parlay_reset_time INTEGER,
-                  mystats_count INTEGER DEFAULT 0,
-                  mystats_reset_time INTEGER,
-                  notify_count INTEGER DEFAULT 0,
-                  notify_reset_time INTEGER,
-                  bankroll_count INTEGER DEFAULT 0,
-                  bankroll_reset_time INTEGER,
-                  trends_count INTEGER DEFAULT 0,
-                  trends_reset_time INTEGER,
-                  injuries_count INTEGER DEFAULT 0,
-                  injuries_reset_time INTEGER,
-                  calc_count INTEGER DEFAULT 0,
-                  calc_reset_time INTEGER,
-                  analyze_count INTEGER DEFAULT 0,
-                  analyze_reset_time INTEGER,
-                  matchup_count INTEGER DEFAULT 0,
-                  matchup_reset_time INTEGER,
-                  sharp_count INTEGER DEFAULT 0,
-                  sharp_reset_time INTEGER,
-                  model_count INTEGER DEFAULT 0,
-                  model_reset_time INTEGER,
-                  hit_count INTEGER DEFAULT 0,
-                  hit_reset_time INTEGER,
-                  lines_count INTEGER DEFAULT 0,
-                  lines_reset_time INTEGER)''')
+    # One token bucket per (user, command or group): tokens spent as of updated_at
+    c.execute('''CREATE TABLE IF NOT EXISTS rate_limit_buckets
+                 (user_id INTEGER,
+                  bucket TEXT,
+                  spent REAL NOT NULL,
+                  updated_at REAL NOT NULL,
+                  PRIMARY KEY (user_id, bucket)) WITHOUT ROWID''')
     
     c.execute('''CREATE TABLE IF NOT EXISTS user_bets
                  (id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -171,60 +522,916 @@ def init_db():
                   nhl INTEGER DEFAULT 0,
                   soccer INTEGER DEFAULT 0)''')
     
+    c.execute('''CREATE TABLE IF NOT EXISTS odds_api_usage
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  requested_at INTEGER,
+                  sport TEXT,
+                  command TEXT,
+                  endpoint TEXT,
+                  cost INTEGER,
+                  requests_remaining INTEGER,
+                  requests_used INTEGER)''')
+    
+    c.execute("CREATE INDEX IF NOT EXISTS idx_odds_api_usage_time ON odds_api_usage (requested_at)")
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS nba_player_ids
+                 (player_name TEXT PRIMARY KEY,
+                  player_id INTEGER,
+                  resolved_at INTEGER)''')
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS nba_game_logs
+                 (player_id INTEGER,
+                  game_id INTEGER,
+                  season INTEGER,
+                  game_date TEXT,
+                  pts INTEGER,
+                  reb INTEGER,
+                  ast INTEGER,
+                  fg3m INTEGER,
+                  stl INTEGER,
+                  blk INTEGER,
+                  PRIMARY KEY (player_id, game_id))''')
+    
+    c.execute("CREATE INDEX IF NOT EXISTS idx_nba_game_logs_season ON nba_game_logs (player_id, season, game_date)")
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS nba_game_log_sync
+                 (player_id INTEGER,
+                  season INTEGER,
+                  synced_at INTEGER,
+                  PRIMARY KEY (player_id, season))''')
+    
+    # Odds history: one row per series, then only the snapshots where it moved
+    c.execute('''CREATE TABLE IF NOT EXISTS odds_history_markets
+                 (market_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  sport TEXT,
+                  event_id TEXT,
+                  player TEXT,
+                  prop_type TEXT,
+                  side TEXT,
+                  book TEXT,
+                  UNIQUE (sport, event_id, player, prop_type, side, book))''')
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS odds_history
+                 (market_id INTEGER,
+                  ts INTEGER,
+                  line REAL,
+                  price INTEGER,
+                  PRIMARY KEY (market_id, ts)) WITHOUT ROWID''')
+    
+    c.execute("CREATE INDEX IF NOT EXISTS idx_odds_history_markets_player ON odds_history_markets (sport, player)")
+    
     conn.commit()
     conn.close()
 
-# Migrate old cooldown table to new schema
-def migrate_cooldown_table():
-    conn = sqlite3.connect('premium_users.db')
+# Schema migrations, applied in order. PRAGMA user_version records how many
+# have run, so each one runs exactly once per database file.
+
+def migrate_command_usage(c):
+    """v1: move counts out of the wide command_cooldowns table into command_usage"""
+    c.execute('''CREATE TABLE IF NOT EXISTS command_usage
+                 (user_id INTEGER,
+                  command TEXT,
+                  count INTEGER NOT NULL DEFAULT 0,
+                  reset_time INTEGER,
+                  PRIMARY KEY (user_id, command)) WITHOUT ROWID''')
+    
+    c.execute("PRAGMA table_info(command_cooldowns)")
+    columns = {col[1] for col in c.fetchall()}
+    
+    # Every <name>_count / <name>_reset_time pair is one command's counter
+    for column in sorted(columns):
+        command_name = column[:-len('_count')]
+        if column.endswith('_count') and f"{command_name}_reset_time" in columns:
+            c.execute(f"""INSERT OR IGNORE INTO command_usage (user_id, command, count, reset_time)
+                          SELECT user_id, ?, {command_name}_count, {command_name}_reset_time FROM command_cooldowns
+                          WHERE {command_name}_count > 0""", (command_name,))
+    
+    c.execute("DROP TABLE IF EXISTS command_cooldowns")
+
+def migrate_rate_limit_buckets(c):
+    """v2: open command_usage windows become spent tokens in rate_limit_buckets
+    
+    Spent is capped at the tier's bucket capacity and dated from the start of
+    the old window, so nobody ends up locked out past their old reset_time.
+    """
+    now = time.time()
+    c.execute('''CREATE TABLE IF NOT EXISTS rate_limit_buckets
+                 (user_id INTEGER,
+                  bucket TEXT,
+                  spent REAL NOT NULL,
+                  updated_at REAL NOT NULL,
+                  PRIMARY KEY (user_id, bucket)) WITHOUT ROWID''')
+    c.execute("""SELECT u.user_id, u.command, u.count, u.reset_time, p.subscription_end
+                 FROM command_usage u LEFT JOIN premium_users p ON p.user_id = u.user_id
+                 WHERE u.reset_time > ?""", (now,))
+    
+    rows = []
+    for user_id, command_name, count, reset_time, subscription_end in c.fetchall():
+        # The old cooldown's split: more than FREE_TRIAL_DAYS days left was a 1 hour premium window
+        premium = subscription_end and datetime.fromisoformat(subscription_end).timestamp() - now >= (FREE_TRIAL_DAYS + 1) * 86400
+        tier, window = ('premium', 3600) if premium else ('trial', FREE_USER_COOLDOWN_HOURS * 3600)
+        capacity = RATE_LIMIT_OVERRIDES.get((tier, command_name), RATE_LIMITS[tier])[0]
+        rows.append((user_id, command_name, min(count, capacity), reset_time - window))
+    
+    c.executemany("""INSERT OR IGNORE INTO rate_limit_buckets (user_id, bucket, spent, updated_at)
+                     VALUES (?, ?, ?, ?)""", rows)
+    c.execute("DROP TABLE command_usage")
+
+SCHEMA_MIGRATIONS = [migrate_command_usage, migrate_rate_limit_buckets]
+
+def migrate_db():
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)  # Explicit transactions, so DDL rolls back too
     c = conn.cursor()
     
     try:
-        # Check if old columns exist
-        c.execute("PRAGMA table_info(command_cooldowns)")
-        columns = [col[1] for col in c.fetchall()]
-        
-        # If we have old columns, drop and recreate
-        if 'last_predict_time' in columns or 'predict_count' not in columns:
-            print("Migrating cooldown table...")
-            c.execute("DROP TABLE IF EXISTS command_cooldowns")
-            c.execute('''CREATE TABLE command_cooldowns
-                         (user_id INTEGER PRIMARY KEY,
-                          predict_count INTEGER DEFAULT 0,
-                          predict_reset_time INTEGER,
-                          locks_count INTEGER DEFAULT 0,
-                          locks_reset_time INTEGER,
-                          potd_count INTEGER DEFAULT 0,
-                          potd_reset_time INTEGER,
-                          compare_count INTEGER DEFAULT 0,
-                          compare_reset_time INTEGER,
-                          value_count INTEGER DEFAULT 0,
-                          value_reset_time INTEGER)''')
-            conn.commit()
+        version = c.execute("PRAGMA user_version").fetchone()[0]
+        for number, migration in enumerate(SCHEMA_MIGRATIONS[version:], start=version + 1):
+            print(f"Migrating database to v{number} ({migration.__name__})...")
+            c.execute("BEGIN IMMEDIATE")
+            try:
+                migration(c)
+                c.execute(f"PRAGMA user_version = {number}")
+                c.execute("COMMIT")
+            except Exception:
+                c.execute("ROLLBACK")
+                raise
             print("Migration complete!")
     except Exception as e:
         print(f"Migration error: {e}")
     finally:
         conn.close()
 
-migrate_cooldown_table()
-
 init_db()
 
-picks_data = {
-    'nba': [],
-    'nfl': [],
-    'mlb': [],
-    'nhl': [],
-    'soccer': [],
-    'mma': [],
-    'tennis': [],
-    'csgo': [],
-    'cs2': [],
-    'lol': [],
-    'dota2': [],
+migrate_db()
+
+# === PICK RECORDS ===
+# Raw outcomes and consensus picks are compact slotted records. Their
+# repeated strings (players, prop labels, books, games) are interned, so
+# thousands of rows share one copy of each. picks_data objects are shared by
+# every command, so treat them as read-only.
+
+class Outcome:
+    """One bookmaker's price on one side of one market"""
+    __slots__ = ('player', 'prop_type', 'line', 'pick', 'odds', 'bookmaker', 'game', 'event_id', 'market')
+    
+    def __init__(self, player, prop_type, line, pick, odds, bookmaker, game, event_id='', market=''):
+        self.player = sys.intern(player)
+        self.prop_type = sys.intern(prop_type)
+        self.line = line
+        self.pick = sys.intern(pick)
+        self.odds = odds
+        self.bookmaker = sys.intern(bookmaker)
+        self.game = sys.intern(game)
+        self.event_id = sys.intern(event_id)
+        self.market = sys.intern(market)
+    
+    def __repr__(self):
+        return f"Outcome({self.player} {self.pick} {self.line} {self.prop_type} {self.odds} @ {self.bookmaker})"
+
+class ConsensusPick:
+    """Books agreeing on one player/prop/side, plus NBA hit-rate stats when available
+    
+    fair_probability (no-vig win %, averaged over books), best_odds/best_book
+    (the best price on offer), edge (fair % minus the best price's implied %)
+    and ev (expected profit per 1 unit staked at the best price) are
+    precomputed for the whole snapshot in aggregate_picks, as is decimal_odds
+    for the consensus price. modal_line,
+    line_spread and line_agreement (% of quotes at the modal line) describe
+    every line books are hanging on this player/prop, not just this one.
+    """
+    __slots__ = ('sport', 'player', 'prop_type', 'line', 'pick', 'sources', 'avg_probability', 'avg_odds',
+                 'bookmakers', 'game', 'decimal_odds', 'fair_probability', 'best_odds', 'best_book', 'edge', 'ev',
+                 'modal_line', 'line_spread', 'line_agreement', 'event_id',
+                 'hit_rate', 'player_avg', 'last_5_avg', 'games_analyzed')
+    
+    def __init__(self, sport, player, prop_type, line, pick, sources, avg_probability, avg_odds, bookmakers, game,
+                 decimal_odds=None, fair_probability=None, best_odds=None, best_book=None, edge=None, ev=None,
+                 modal_line=None, line_spread=None, line_agreement=None, event_id=''):
+        self.sport = sys.intern(sport)
+        self.player = sys.intern(player)
+        self.prop_type = sys.intern(prop_type)
+        self.line = line
+        self.pick = sys.intern(pick)
+        self.sources = sources
+        self.avg_probability = avg_probability
+        self.avg_odds = avg_odds
+        self.bookmakers = tuple(bookmakers)
+        self.game = sys.intern(game)
+        self.decimal_odds = decimal_odds
+        self.fair_probability = fair_probability
+        self.best_odds = best_odds
+        self.best_book = best_book
+        self.edge = edge
+        self.ev = ev
+        self.modal_line = modal_line
+        self.line_spread = line_spread
+        self.line_agreement = line_agreement
+        self.event_id = event_id
+        self.hit_rate = None
+        self.player_avg = None
+        self.last_5_avg = None
+        self.games_analyzed = None
+    
+    def __repr__(self):
+        return f"ConsensusPick({self.sport} {self.player} {self.pick} {self.line} {self.prop_type}, {self.sources} books)"
+
+class BestLine:
+    """Every book's price on one (event, player, prop, side, line) quote, best payout first"""
+    __slots__ = ('event_id', 'game', 'player', 'prop_type', 'pick', 'line', 'best_odds', 'best_book', 'prices')
+    
+    def __init__(self, event_id, game, player, prop_type, pick, line, prices):
+        self.event_id = event_id
+        self.game = game
+        self.player = player
+        self.prop_type = prop_type
+        self.pick = pick
+        self.line = line
+        self.prices = tuple(prices)  # ((book, american odds), ...)
+        self.best_book, self.best_odds = self.prices[0]
+    
+    def average_odds(self):
+        return sum(odds for _, odds in self.prices) / len(self.prices)
+    
+    def __repr__(self):
+        return f"BestLine({self.player} {self.pick} {self.line} {self.prop_type} {self.best_odds} @ {self.best_book})"
+
+class Opportunity:
+    """An arbitrage or middle: one best-priced leg per side, staked so any single winner pays the same
+    
+    guaranteed_return is the profit fraction on the total stake when exactly
+    one leg wins; middle_return is the profit when a middle lands and both win.
+    """
+    __slots__ = ('kind', 'sport', 'game', 'player', 'prop_type', 'legs', 'guaranteed_return', 'middle_return')
+    
+    def __init__(self, kind, sport, game, player, prop_type, legs, guaranteed_return, middle_return=None):
+        self.kind = kind  # 'arb' or 'middle'
+        self.sport = sport
+        self.game = game
+        self.player = player
+        self.prop_type = prop_type
+        self.legs = tuple(legs)  # ((BestLine, stake share), ...)
+        self.guaranteed_return = guaranteed_return
+        self.middle_return = middle_return
+    
+    def __repr__(self):
+        return f"Opportunity({self.kind} {self.player} {self.prop_type} {self.guaranteed_return:+.2%})"
+
+# === ODDS TABLE ===
+# Each snapshot's outcomes are also held column-wise. Strings become integer
+# category codes and numbers become float arrays, so consensus is a few
+# vectorized group-by passes instead of Python loops over dicts. Picks are
+# grouped by (player, prop, side, line), so books hanging different numbers
+# are never averaged together. Each (player, prop) market also gets a line
+# histogram for its modal line and spread. Every book's over/under pair (or
+# set of moneyline sides) is de-vigged here too, so fair probabilities are
+# computed once per snapshot.
+
+def encode_categories(values):
+    """Factorize strings into (labels in first-seen order, int32 code array)"""
+    index = {}
+    codes = np.fromiter((index.setdefault(value, len(index)) for value in values), dtype=np.int32, count=len(values))
+    return list(index), codes
+
+class OddsTable:
+    """Columnar odds for one snapshot - row i describes outcomes[i]"""
+    __slots__ = ('outcomes', 'players', 'props', 'sides', 'books', 'events', 'markets', 'line_values',
+                 'player_code', 'prop_code', 'side_code', 'book_code', 'event_code', 'market_code', 'line_code',
+                 'line', 'price', 'decimal', 'probability')
+    
+    def __init__(self, outcomes):
+        n = len(outcomes)
+        self.outcomes = outcomes
+        self.players, self.player_code = encode_categories([o.player for o in outcomes])
+        self.props, self.prop_code = encode_categories([o.prop_type for o in outcomes])
+        self.sides, self.side_code = encode_categories([o.pick for o in outcomes])
+        self.books, self.book_code = encode_categories([o.bookmaker for o in outcomes])
+        self.events, self.event_code = encode_categories([o.event_id for o in outcomes])
+        self.markets, self.market_code = encode_categories([o.market for o in outcomes])
+        self.line = np.fromiter((o.line for o in outcomes), dtype=np.float64, count=n)
+        self.line_values, self.line_code = np.unique(self.line, return_inverse=True)
+        self.price = np.fromiter((o.odds for o in outcomes), dtype=np.float64, count=n)
+        self.decimal = american_to_decimal(self.price)
+        self.probability = np.round(odds_to_probability(self.price), 1)  # Implied %, like the books quote it
+    
+    def __len__(self):
+        return len(self.outcomes)
+    
+    def market_key(self):
+        """One int64 per row identifying its (player, prop) market, across lines and sides"""
+        return self.player_code.astype(np.int64) * len(self.props) + self.prop_code
+    
+    def group_key(self):
+        """One int64 per row identifying its (player, prop, side, line) group"""
+        key = self.market_key() * len(self.sides) + self.side_code
+        return key * len(self.line_values) + self.line_code
+    
+    def quote_key(self):
+        """One int64 per row identifying its (event, player, prop, side, line) quote"""
+        return self.group_key() * len(self.events) + self.event_code
+    
+    def best_lines(self):
+        """BestLine per quote in first-seen order, prices sorted best payout first (row order on ties)"""
+        _, first_row, inverse, quotes = np.unique(self.quote_key(), return_index=True, return_inverse=True, return_counts=True)
+        rows_by_price = np.lexsort((-self.decimal, inverse))
+        prices_by_quote = np.split(rows_by_price, (np.cumsum(quotes) - quotes)[1:])
+        
+        best_lines = []
+        for q in np.argsort(first_row, kind='stable').tolist():
+            first = self.outcomes[first_row[q]]
+            prices = [(self.outcomes[row].bookmaker, self.outcomes[row].odds) for row in prices_by_quote[q].tolist()]
+            best_lines.append(BestLine(first.event_id, first.game, first.player, first.prop_type, first.pick, first.line, prices))
+        return best_lines
+    
+    def pair_key(self):
+        """One int64 per row identifying the book's two-sided (or n-way) market it belongs to
+        
+        Props pair per (event, book, market, player, line), so a book's Over and
+        Under at the same number share a key. Moneyline rows carry the team as
+        the player, so every side of a book's h2h market shares (event, book, market).
+        """
+        key = self.event_code.astype(np.int64) * len(self.books) + self.book_code
+        key = key * len(self.markets) + self.market_code
+        moneyline = np.array([market == 'h2h' for market in self.markets], dtype=bool)[self.market_code]
+        key = key * len(self.players) + np.where(moneyline, 0, self.player_code)
+        return key * len(self.line_values) + np.where(moneyline, 0, self.line_code)
+    
+    def fair_probability(self):
+        """No-vig win probability per row, as a fraction
+        
+        Each side's implied probability is divided by its market's total
+        (the overround). Rows whose book only quoted one side can't be
+        de-vigged and keep their raw implied probability.
+        """
+        _, pair_of_row, sides = np.unique(self.pair_key(), return_inverse=True, return_counts=True)
+        implied = implied_probability(self.price)
+        overround = np.bincount(pair_of_row, weights=implied)
+        return np.where(sides[pair_of_row] >= 2, implied / overround[pair_of_row], implied)
+    
+    def line_stats(self):
+        """Line histogram summary per (player, prop) market
+        
+        Returns (market_of_row, modal_line, line_spread, line_agreement) where the
+        last three are indexed by market: the most quoted line (lowest on ties),
+        the standard deviation of quoted lines and the % of quotes at the modal line.
+        """
+        _, market_of_row, quotes = np.unique(self.market_key(), return_inverse=True, return_counts=True)
+        
+        # Running sums give the spread without materializing per-market lists
+        line_sum = np.bincount(market_of_row, weights=self.line)
+        line_sq_sum = np.bincount(market_of_row, weights=self.line * self.line)
+        mean_line = line_sum / quotes
+        line_spread = np.sqrt(np.maximum(line_sq_sum / quotes - mean_line * mean_line, 0))
+        
+        # Histogram cells are (market, line); the biggest cell per market is its mode
+        cells, cell_quotes = np.unique(market_of_row.astype(np.int64) * len(self.line_values) + self.line_code, return_counts=True)
+        cell_market = cells // len(self.line_values)
+        cell_line = cells % len(self.line_values)
+        order = np.lexsort((cell_line, -cell_quotes, cell_market))
+        is_first = np.ones(len(order), dtype=bool)
+        is_first[1:] = cell_market[order][1:] != cell_market[order][:-1]
+        modal_cells = order[is_first]
+        
+        modal_line = self.line_values[cell_line[modal_cells]]
+        line_agreement = cell_quotes[modal_cells] / quotes * 100
+        return market_of_row, modal_line, line_spread, line_agreement
+    
+    def consensus(self, min_sources=2):
+        """Per-(player, prop, side, line) stats for groups quoted by at least min_sources rows
+        
+        Groups come back in first-seen order as a dict of columns: first_row,
+        sources, mean_probability, mean_decimal, mean_price (mean_decimal as
+        American odds), fair_probability (mean no-vig fraction), best_row (the row with the best payout, first on ties),
+        book_codes (each group's book codes in row order) and the group's market
+        modal_line, line_spread and line_agreement.
+        """
+        _, first_row, inverse, sources = np.unique(self.group_key(), return_index=True, return_inverse=True, return_counts=True)
+        mean_probability = np.bincount(inverse, weights=self.probability) / sources
+        # Average payouts, not raw American odds: -150 and +130 don't average to -10
+        mean_decimal = np.bincount(inverse, weights=self.decimal) / sources
+        mean_price = decimal_to_american(mean_decimal)
+        fair_probability = np.bincount(inverse, weights=self.fair_probability()) / sources
+        
+        # Rows grouped together, original order kept inside each group
+        rows_by_group = np.argsort(inverse, kind='stable')
+        group_starts = np.cumsum(sources) - sources
+        book_codes = np.split(self.book_code[rows_by_group], group_starts[1:])
+        
+        # Same grouping with the best payout first in each group
+        rows_by_price = np.lexsort((-self.decimal, inverse))
+        best_row = rows_by_price[group_starts]
+        
+        keep = np.flatnonzero(sources >= min_sources)
+        keep = keep[np.argsort(first_row[keep], kind='stable')]
+        
+        market_of_row, modal_line, line_spread, line_agreement = self.line_stats()
+        market = market_of_row[first_row[keep]]
+        
+        return {
+            'first_row': first_row[keep],
+            'sources': sources[keep],
+            'mean_probability': mean_probability[keep],
+            'mean_decimal': mean_decimal[keep],
+            'mean_price': mean_price[keep],
+            'fair_probability': fair_probability[keep],
+            'best_row': best_row[keep],
+            'book_codes': [book_codes[g] for g in keep],
+            'modal_line': modal_line[market],
+            'line_spread': line_spread[market],
+            'line_agreement': line_agreement[market]
+        }
+
+# === BEST LINE INDEX ===
+# Line shopping reads one index per snapshot instead of rescanning raw
+# outcomes: (event, player, prop, side, line) maps straight to a BestLine,
+# and each player's quotes are kept together for name lookups.
+
+class BestLineIndex:
+    """Best price, its book and every book's price for each quote in a snapshot"""
+    __slots__ = ('quotes', 'by_player')
+    
+    def __init__(self, table):
+        self.quotes = {}
+        self.by_player = {}
+        for best in table.best_lines():
+            self.quotes[(best.event_id, best.player, best.prop_type, best.pick, best.line)] = best
+            self.by_player.setdefault(best.player, []).append(best)
+    
+    def __len__(self):
+        return len(self.quotes)
+    
+    def get(self, event_id, player, prop_type, pick, line):
+        return self.quotes.get((event_id, player, prop_type, pick, line))
+    
+    def for_pick(self, pick):
+        """BestLine for the quote a ConsensusPick or Outcome sits on"""
+        return self.get(pick.event_id, pick.player, pick.prop_type, pick.pick, pick.line)
+    
+    def best_of(self, picks):
+        """The best-paying BestLine among the quotes behind these picks, or None"""
+        quotes = [best for best in map(self.for_pick, picks) if best]
+        return max(quotes, key=lambda best: american_to_decimal(best.best_odds)) if quotes else None
+
+best_line_index = {}  # sport -> BestLineIndex for the current snapshot
+
+# === PLAYER SEARCH ===
+# Player lookups go through a per-snapshot index instead of substring-scanning
+# every pick. Names are folded ("Luka Dončić" -> "luka doncic"). A prefix trie
+# over full names and single name parts answers normal queries, and a
+# trigram index narrows misspellings to a few candidates ranked by edit distance.
+
+def fold_name(name):
+    """Lowercase, strip accents and punctuation, collapse spaces"""
+    decomposed = unicodedata.normalize('NFKD', name)
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', stripped.lower()).split())
+
+def name_trigrams(folded):
+    padded = f"  {folded} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def edit_distance(a, b):
+    """Levenshtein distance with a rolling row"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+class PlayerIndex:
+    """Folded-name search over one snapshot's players, in first-seen order"""
+    __slots__ = ('names', 'folded', 'trie', 'grams', 'tokens', 'picks')
+    
+    def __init__(self, picks, players=()):
+        self.names = []
+        self.folded = []
+        self.trie = {}  # char -> child node; node[''] holds ids of names passing through
+        self.grams = defaultdict(set)  # trigram -> ids
+        self.tokens = defaultdict(set)  # whole name part -> ids
+        self.picks = {}  # name -> that player's picks, in snapshot order
+        
+        for pick in picks:
+            if pick.player not in self.picks:
+                self.picks[pick.player] = []
+                self._add(pick.player)
+            self.picks[pick.player].append(pick)
+        for player in players:
+            if player not in self.picks:
+                self.picks[player] = []
+                self._add(player)
+    
+    def _add(self, name):
+        player_id = len(self.names)
+        folded = fold_name(name)
+        self.names.append(name)
+        self.folded.append(folded)
+        
+        # Index the full name and each part so "doncic" and "luka d" both prefix-match
+        parts = folded.split()
+        for key in [folded] + parts[1:]:
+            node = self.trie
+            for char in key:
+                node = node.setdefault(char, {})
+                node.setdefault('', set()).add(player_id)
+        for part in parts:
+            self.tokens[part].add(player_id)
+        for gram in name_trigrams(folded):
+            self.grams[gram].add(player_id)
+    
+    def __len__(self):
+        return len(self.names)
+    
+    def prefix_matches(self, query):
+        """Ids whose full name or any later name part starts with the folded query"""
+        node = self.trie
+        for char in fold_name(query):
+            node = node.get(char)
+            if node is None:
+                return []
+        return sorted(node.get('', ()))
+    
+    def ranked_candidates(self, query):
+        """(distance, id) for the closest names by shared trigrams, nearest first"""
+        folded = fold_name(query)
+        if not folded:
+            return []
+        shared = defaultdict(int)
+        for gram in name_trigrams(folded):
+            for player_id in self.grams.get(gram, ()):
+                shared[player_id] += 1
+        candidates = heapq.nlargest(PLAYER_FUZZY_CANDIDATES, shared, key=shared.get)
+        
+        ranked = []
+        for player_id in candidates:
+            # Compare against the full name and each name part, whichever is closer
+            name = self.folded[player_id]
+            distance = min(edit_distance(folded, key) for key in [name] + name.split())
+            ranked.append((distance, player_id))
+        ranked.sort()
+        return ranked
+    
+    def match(self, query):
+        """Player names for a query: prefix matches, else close misspellings"""
+        ids = self.prefix_matches(query)
+        if not ids:
+            tolerance = max(1, len(fold_name(query)) // 4)
+            ids = [player_id for distance, player_id in self.ranked_candidates(query) if distance <= tolerance]
+        return [self.names[player_id] for player_id in ids]
+    
+    def suggest(self, query, limit=5):
+        """'Did you mean' names, closest first (skipping ones that are barely similar)"""
+        tolerance = max(2, len(fold_name(query)) // 2)
+        ranked = self.ranked_candidates(query)
+        return [self.names[player_id] for distance, player_id in ranked if distance <= tolerance][:limit]
+    
+    def mentions(self, text):
+        """Players named in free text, best-covered first (whole name parts only)"""
+        hits = defaultdict(int)
+        for word in fold_name(text).split():
+            if len(word) >= 3:
+                for player_id in self.tokens.get(word, ()):
+                    hits[player_id] += 1
+        if not hits:
+            return []
+        best = max(hits.values())
+        return [self.names[player_id] for player_id in sorted(hits) if hits[player_id] == best]
+
+player_index = {}  # sport -> PlayerIndex for the current snapshot
+
+# === ARBITRAGE & MIDDLES ===
+# Scans each snapshot's best lines for cross-book price dispersion. Props pair
+# the best Over with the best Under at the same line (an arb) and, in a
+# separate pass, with the best Under at any higher line (a middle); moneylines
+# need every side's best price. Results are ranked by guaranteed return once
+# per refresh.
+
+def leg_stakes(decimals):
+    """Stake shares that pay the same whichever leg wins, and that payout's return"""
+    inverse = [1 / decimal for decimal in decimals]
+    total = sum(inverse)
+    return [share / total for share in inverse], 1 / total - 1
+
+def scan_prop_market(sport, quotes, found):
+    """Arbs and middles in one (event, player, prop) market's Over and Under quotes"""
+    overs = sorted((q for q in quotes if q.pick.lower() == 'over'), key=lambda q: q.line, reverse=True)
+    unders = sorted((q for q in quotes if q.pick.lower() == 'under'), key=lambda q: q.line, reverse=True)
+    over_decimals = [float(american_to_decimal(over.best_odds)) for over in overs]
+    under_decimals = [float(american_to_decimal(under.best_odds)) for under in unders]
+    
+    # Arbs: each Over against the best Under at exactly its line
+    same_line = {}  # line -> (Under quote, decimal)
+    for under, decimal in zip(unders, under_decimals):
+        if decimal > same_line.get(under.line, (None, 0))[1]:
+            same_line[under.line] = (under, decimal)
+    
+    for over, over_decimal in zip(overs, over_decimals):
+        if over.line not in same_line:
+            continue
+        under, under_decimal = same_line[over.line]
+        stakes, guaranteed = leg_stakes([over_decimal, under_decimal])
+        if guaranteed > ARB_MIN_RETURN:
+            legs = list(zip((over, under), stakes))
+            found.append(Opportunity('arb', sport, over.game, over.player, over.prop_type, legs, guaranteed))
+    
+    # Middles: walk Overs from the highest line down with a running best Under
+    # among strictly higher lines, so a same-line arb never hides a middle
+    best_under = None
+    best_under_decimal = 0
+    j = 0
+    for over, over_decimal in zip(overs, over_decimals):
+        while j < len(unders) and unders[j].line > over.line:
+            if under_decimals[j] > best_under_decimal:
+                best_under, best_under_decimal = unders[j], under_decimals[j]
+            j += 1
+        if best_under is None:
+            continue
+        
+        stakes, guaranteed = leg_stakes([over_decimal, best_under_decimal])
+        if guaranteed >= -MIDDLE_MAX_COST:
+            legs = list(zip((over, best_under), stakes))
+            middle_return = 2 * (guaranteed + 1) - 1
+            found.append(Opportunity('middle', sport, over.game, over.player, over.prop_type, legs, guaranteed, middle_return))
+
+def scan_moneyline_market(sport, quotes, found):
+    """Arb when the best prices on every side of a moneyline add up to under 100%"""
+    if len(quotes) < 2:
+        return
+    stakes, guaranteed = leg_stakes([float(american_to_decimal(q.best_odds)) for q in quotes])
+    if guaranteed > ARB_MIN_RETURN:
+        first = quotes[0]
+        found.append(Opportunity('arb', sport, first.game, first.game, first.prop_type, zip(quotes, stakes), guaranteed))
+
+def scan_opportunities(sport, index):
+    """Arbs and middles in a snapshot's BestLineIndex, best guaranteed return first"""
+    spec = get_sport_spec(sport)
+    moneyline = spec is not None and spec['mode'] == 'h2h'
+    
+    markets = defaultdict(list)
+    for best in index.quotes.values():
+        if moneyline:
+            markets[(best.event_id, best.prop_type)].append(best)
+        else:
+            markets[(best.event_id, best.player, best.prop_type)].append(best)
+    
+    found = []
+    for quotes in markets.values():
+        if moneyline:
+            scan_moneyline_market(sport, quotes, found)
+        else:
+            scan_prop_market(sport, quotes, found)
+    
+    return heapq.nlargest(ARB_RESULTS_LIMIT, found, key=lambda o: (o.guaranteed_return, o.middle_return or 0))
+
+opportunities = {}  # sport -> ranked Opportunity list for the current snapshot
+
+# === ODDS HISTORY ===
+# Append-only line/price history, delta-encoded against the previous snapshot.
+# Each (sport, event, player, prop, side, book) series gets a market_id. A row
+# is written only when that series' line or price changed, so a refresh
+# costs one row per move instead of a full copy. Opening vs current for a
+# series is two primary-key seeks.
+
+_history_market_ids = {}  # (sport, event_id, player, prop_type, side, book) -> market_id
+_history_last_values = {}  # market_id -> (line, price) last written
+_history_loaded_sports = set()  # Sports whose series state has been read back from the DB
+_history_last_prune = 0
+
+def load_history_state(c, sport):
+    """Read a sport's series ids and latest values back in (once per process)"""
+    c.execute("SELECT market_id, event_id, player, prop_type, side, book FROM odds_history_markets WHERE sport = ?", (sport,))
+    for market_id, event_id, player, prop_type, side, book in c.fetchall():
+        _history_market_ids[(sport, event_id, player, prop_type, side, book)] = market_id
+    
+    c.execute('''SELECT h.market_id, h.line, h.price FROM odds_history_markets m
+                 JOIN odds_history h ON h.market_id = m.market_id
+                  AND h.ts = (SELECT MAX(ts) FROM odds_history WHERE market_id = m.market_id)
+                 WHERE m.sport = ?''', (sport,))
+    for market_id, line, price in c.fetchall():
+        _history_last_values[market_id] = (line, price)
+    _history_loaded_sports.add(sport)
+
+def prune_odds_history(c, now):
+    """Drop history older than ODDS_HISTORY_DAYS (at most once a day)"""
+    global _history_last_prune
+    if now - _history_last_prune < 86400:
+        return
+    _history_last_prune = now
+    
+    c.execute("DELETE FROM odds_history WHERE ts < ?", (now - ODDS_HISTORY_DAYS * 86400,))
+    c.execute("DELETE FROM odds_history_markets WHERE market_id NOT IN (SELECT DISTINCT market_id FROM odds_history)")
+    if c.rowcount:
+        # Forget cached ids for deleted series; they're re-read on the next record
+        _history_market_ids.clear()
+        _history_last_values.clear()
+        _history_loaded_sports.clear()
+
+def record_odds_history(c, sport, table, now=None):
+    """Append the rows of this snapshot whose line or price moved; returns how many
+    
+    Runs on the DB writer thread, which is the only user of the series state above.
+    """
+    now = int(now or time.time())
+    prune_odds_history(c, now)
+    if sport not in _history_loaded_sports:
+        load_history_state(c, sport)
+    
+    changes = []
+    for outcome in table.outcomes:
+        key = (sport, outcome.event_id, outcome.player, outcome.prop_type, outcome.pick, outcome.bookmaker)
+        market_id = _history_market_ids.get(key)
+        if market_id is None:
+            c.execute("INSERT INTO odds_history_markets (sport, event_id, player, prop_type, side, book) VALUES (?, ?, ?, ?, ?, ?)", key)
+            market_id = _history_market_ids[key] = c.lastrowid
+        
+        value = (float(outcome.line), int(outcome.odds))
+        if _history_last_values.get(market_id) != value:
+            changes.append((market_id, now) + value)
+            _history_last_values[market_id] = value
+    
+    c.executemany("INSERT OR REPLACE INTO odds_history (market_id, ts, line, price) VALUES (?, ?, ?, ?)", changes)
+    return len(changes)
+
+def load_line_movement(c, sport, event_ids=None, player=None, since=0):
+    """Opening vs current line and price for each book's series
+    
+    Opening is the value in force at `since` (or the first one recorded
+    after it). Returns rows of (player, prop_type, side, book, open_line,
+    open_price, open_ts, line, price, ts).
+    """
+    query = '''SELECT m.player, m.prop_type, m.side, m.book, o.line, o.price, o.ts, h.line, h.price, h.ts
+               FROM odds_history_markets m
+               JOIN odds_history o ON o.market_id = m.market_id
+                AND o.ts = COALESCE((SELECT MAX(ts) FROM odds_history WHERE market_id = m.market_id AND ts <= ?),
+                                    (SELECT MIN(ts) FROM odds_history WHERE market_id = m.market_id))
+               JOIN odds_history h ON h.market_id = m.market_id
+                AND h.ts = (SELECT MAX(ts) FROM odds_history WHERE market_id = m.market_id)
+               WHERE m.sport = ?'''
+    params = [since, sport]
+    if event_ids:
+        query += f" AND m.event_id IN ({', '.join('?' * len(event_ids))})"
+        params.extend(event_ids)
+    if player:
+        query += " AND m.player = ?"
+        params.append(player)
+    
+    return db_fetch_all(c, query, params)
+
+def summarize_line_movement(rows):
+    """Average the books' moves per (player, prop, side), biggest probability move first"""
+    by_market = defaultdict(list)
+    for row in rows:
+        by_market[row[:3]].append(row)
+    
+    moves = []
+    for (player, prop_type, side), books in by_market.items():
+        count = len(books)
+        open_probability = sum(float(implied_probability(b[5])) for b in books) / count * 100
+        probability = sum(float(implied_probability(b[8])) for b in books) / count * 100
+        moves.append({
+            'player': player,
+            'prop_type': prop_type,
+            'side': side,
+            'books': count,
+            'open_line': sum(b[4] for b in books) / count,
+            'line': sum(b[7] for b in books) / count,
+            'open_probability': open_probability,
+            'probability': probability,
+            'probability_move': probability - open_probability,
+            'line_move': sum(b[7] - b[4] for b in books) / count,
+            'opened_at': min(b[6] for b in books)
+        })
+    
+    moves.sort(key=lambda m: abs(m['probability_move']), reverse=True)
+    return moves
+
+def format_line_move(move):
+    """'24.5 → 25.5 (+1.0) • 52.4% → 55.0% (+2.6%)' for embeds"""
+    text = ""
+    if move['line_move']:
+        text += f"{move['open_line']:g} → {move['line']:g} ({move['line_move']:+g}) • "
+    return text + f"{move['open_probability']:.1f}% → {move['probability']:.1f}% ({move['probability_move']:+.1f}%)"
+
+async def current_line_movement(sport, player=None):
+    """Movement summary for the events on the sport's current board"""
+    table = odds_tables.get(sport)
+    if table is None or not len(table):
+        return []
+    return summarize_line_movement(await db.read(load_line_movement, sport, table.events, player))
+
+# === SPORT REGISTRY ===
+# One row per sport. 'props' sports list the events and then pull player
+# props per event; 'h2h' sports sweep their league keys for moneylines.
+# Adding a sport is a new row here (plus an emoji below).
+SPORT_REGISTRY = {
+    'nba': {
+        'name': 'NBA',
+        'mode': 'props',
+        'sport_keys': ['basketball_nba'],
+        'markets': ['player_points', 'player_rebounds', 'player_assists', 'player_threes', 'player_steals', 'player_blocks'],
+        'labels': {
+            'player_points': 'Points',
+            'player_rebounds': 'Rebounds',
+            'player_assists': 'Assists',
+            'player_threes': '3-Pointers',
+            'player_steals': 'Steals',
+            'player_blocks': 'Blocks'
+        }
+    },
+    'nfl': {
+        'name': 'NFL',
+        'mode': 'props',
+        'sport_keys': ['americanfootball_nfl'],
+        'markets': ['player_pass_tds', 'player_pass_yds', 'player_rush_yds', 'player_receptions'],
+        'labels': {
+            'player_pass_tds': 'Pass TDs',
+            'player_pass_yds': 'Pass Yards',
+            'player_rush_yds': 'Rush Yards',
+            'player_receptions': 'Receptions'
+        }
+    },
+    'mlb': {
+        'name': 'MLB',
+        'mode': 'props',
+        'sport_keys': ['baseball_mlb'],
+        'markets': ['player_hits', 'player_total_bases', 'player_runs', 'player_rbis'],
+        'labels': {
+            'player_hits': 'Hits',
+            'player_total_bases': 'Total Bases',
+            'player_runs': 'Runs',
+            'player_rbis': 'RBIs'
+        }
+    },
+    'nhl': {
+        'name': 'NHL',
+        'mode': 'props',
+        'sport_keys': ['icehockey_nhl'],
+        'markets': ['player_points', 'player_assists', 'player_shots_on_goal'],
+        'labels': {
+            'player_points': 'Points',
+            'player_assists': 'Assists',
+            'player_shots_on_goal': 'Shots on Goal'
+        }
+    },
+    'soccer': {
+        'name': 'Soccer',
+        'mode': 'h2h',
+        # Priority order - only the first league with games is used
+        'sport_keys': ['soccer_epl', 'soccer_spain_la_liga', 'soccer_germany_bundesliga', 'soccer_italy_serie_a', 'soccer_uefa_champs_league'],
+        'first_league_only': True,
+        'labels': {'h2h': 'To Win'}
+    },
+    'mma': {
+        'name': 'MMA',
+        'mode': 'h2h',
+        'sport_keys': ['mma_mixed_martial_arts'],
+        'labels': {'h2h': 'To Win'}
+    },
+    'tennis': {
+        'name': 'Tennis',
+        'mode': 'h2h',
+        # Grand Slams - most are out of season at any given time
+        'sport_keys': [
+            'tennis_atp_aus_open_singles', 'tennis_wta_aus_open_singles',
+            'tennis_atp_french_open', 'tennis_wta_french_open',
+            'tennis_atp_wimbledon', 'tennis_wta_wimbledon',
+            'tennis_atp_us_open', 'tennis_wta_us_open'
+        ],
+        'labels': {'h2h': 'To Win Match'}
+    },
+    'csgo': {
+        'name': 'CSGO',
+        'mode': 'h2h',
+        'sport_keys': ['esports_csgo'],
+        'labels': {'h2h': 'To Win'}
+    },
+    'cs2': {'alias': 'csgo', 'name': 'CS2'},
+    'lol': {
+        'name': 'LoL',
+        'mode': 'h2h',
+        'sport_keys': ['esports_lol'],
+        'labels': {'h2h': 'To Win'}
+    },
+    'dota2': {
+        'name': 'Dota2',
+        'mode': 'h2h',
+        'sport_keys': ['esports_dota2'],
+        'labels': {'h2h': 'To Win'}
+    },
 }
 
+def get_sport_spec(sport):
+    """Look up a sport's registry row, following aliases (cs2 -> csgo)"""
+    spec = SPORT_REGISTRY.get(sport)
+    if spec and 'alias' in spec:
+        return {**SPORT_REGISTRY[spec['alias']], 'name': spec['name']}
+    return spec
+
+picks_data = {sport: [] for sport in SPORT_REGISTRY}
+
 SPORT_EMOJIS = {
     'nba': '🏀',
     'nfl': '🏈',
@@ -317,17 +1524,9 @@ def is_premium():
         if premium_role in ctx.author.roles:
             return True
         
-        conn = sqlite3.connect('premium_users.db')
-        c = conn.cursor()
-        c.execute("SELECT subscription_end, status FROM premium_users WHERE user_id = ?", (ctx.author.id,))
-        result = c.fetchone()
-        conn.close()
-        
-        if result:
-            end_date = datetime.fromisoformat(result[0])
-            if datetime.now() < end_date and result[1] == 'active':
-                await ctx.author.add_roles(premium_role)
-                return True
+        if await subscription_tier(ctx.author.id) != 'none':
+            await ctx.author.add_roles(premium_role)
+            return True
         
         embed = discord.Embed(
             title="🔒 Premium Required",
@@ -340,129 +1539,171 @@ def is_premium():
     return commands.check(predicate)
 
 
-# Cooldown helper functions
-def check_user_premium_status(user_id):
-    """Check if user has active premium or trial"""
-    conn = sqlite3.connect('premium_users.db')
-    c = conn.cursor()
-    c.execute("SELECT subscription_end, status FROM premium_users WHERE user_id = ?", (user_id,))
-    result = c.fetchone()
-    conn.close()
-    
-    if not result:
-        return None
-    
-    end_date_str, status = result
-    end_date = datetime.fromisoformat(end_date_str)
-    
-    if datetime.now() < end_date and status == 'active':
-        # Check if it's trial (3 days or less remaining)
-        days_left = (end_date - datetime.now()).days
-        if days_left <= FREE_TRIAL_DAYS:
-            return 'trial'
-        return 'premium'
-    
-    return None
+# === RATE LIMITS ===
+# One token bucket per (user, command), or per RATE_LIMIT_GROUPS group. A
+# bucket stores the tokens spent and when; they drain back at one per
+# refill_seconds, worked out when the bucket is next checked. A check is
+# O(1) with no timers or resets to schedule. Storing spent rather than
+# remaining tokens means tier and config changes apply to existing buckets
+# immediately. Changed buckets are written to rate_limit_buckets in batches.
 
-def check_command_cooldown(user_id, command_name):
-    """Check if user is on cooldown for a command. Returns (on_cooldown, time_remaining_seconds, uses_left)"""
-    conn = sqlite3.connect('premium_users.db')
-    c = conn.cursor()
-    
-    c.execute(f"SELECT {command_name}_count, {command_name}_reset_time FROM command_cooldowns WHERE user_id = ?", (user_id,))
-    result = c.fetchone()
-    
-    # Check if user is premium or trial
-    c.execute("SELECT subscription_end, status FROM premium_users WHERE user_id = ?", (user_id,))
-    user_result = c.fetchone()
-    conn.close()
-    
-    current_time = int(time.time())
-    
-    # Determine max uses based on user type
-    if user_result:
-        end_date = datetime.fromisoformat(user_result[0])
-        days_left = (end_date - datetime.now()).days
-        
-        if days_left > FREE_TRIAL_DAYS:  # Premium user
-            max_uses = 2  # 2 uses per hour
-            cooldown_seconds = 3600  # 1 hour
-        else:  # Trial user
-            max_uses = 1  # 1 use per 3 hours
-            cooldown_seconds = FREE_USER_COOLDOWN_HOURS * 3600
-    else:
-        max_uses = 1
-        cooldown_seconds = FREE_USER_COOLDOWN_HOURS * 3600
-    
-    if not result:
-        return False, 0, max_uses
-    
-    count, reset_time = result
-    
-    # Check if reset time has passed
-    if reset_time and current_time >= reset_time:
-        # Reset the counter
-        return False, 0, max_uses
-    
-    # Check if user has uses remaining
-    if count < max_uses:
-        return False, 0, max_uses - count
-    
-    # User is on cooldown
-    if reset_time:
-        time_remaining = reset_time - current_time
-        return True, time_remaining, 0
-    
-    return True, cooldown_seconds, 0
+class RateLimitResult:
+    """One check: allowed or not, tokens left (fractional) and when the next whole one refills"""
+    __slots__ = ('allowed', 'tokens', 'capacity', 'retry_after', 'next_refill')
+    
+    def __init__(self, allowed, tokens, capacity, retry_after, next_refill):
+        self.allowed = allowed
+        self.tokens = tokens
+        self.capacity = capacity
+        self.retry_after = retry_after  # Seconds until a use is available (0 if one is now)
+        self.next_refill = next_refill  # Timestamp the next token comes back, None when full
 
-def update_command_cooldown(user_id, command_name):
-    """Update the cooldown for a command - increment count and set reset time"""
-    conn = sqlite3.connect('premium_users.db')
-    c = conn.cursor()
-    
-    current_time = int(time.time())
+class RateLimiter:
+    """Token buckets per (user, bucket), evaluated in memory and persisted in batches"""
     
-    # Check if user is premium or trial to determine cooldown
-    c.execute("SELECT subscription_end, status FROM premium_users WHERE user_id = ?", (user_id,))
-    user_result = c.fetchone()
+    def __init__(self):
+        self.buckets = {}  # (user_id, bucket) -> [spent tokens, updated_at]
+        self.loaded_users = set()  # Users whose stored buckets have been read in
+        self.dirty = set()  # Keys changed since the last flush
     
-    if user_result:
-        end_date = datetime.fromisoformat(user_result[0])
-        days_left = (end_date - datetime.now()).days
+    def load(self, user_id, rows):
+        """Seed a user's buckets from (bucket, spent, updated_at) rows - once, memory wins after"""
+        if user_id in self.loaded_users:
+            return
+        for bucket, spent, updated_at in rows:
+            self.buckets.setdefault((user_id, bucket), [spent, updated_at])
+        self.loaded_users.add(user_id)
+    
+    def check(self, user_id, command_name, tier, consume=True, now=None):
+        """Take one token (unless consume=False) from the user's bucket for this command"""
+        now = now if now is not None else time.time()
+        bucket = RATE_LIMIT_GROUPS.get(command_name, command_name)
+        capacity, refill_seconds = RATE_LIMIT_OVERRIDES.get((tier, bucket), RATE_LIMITS[tier])
+        key = (user_id, bucket)
         
-        if days_left > FREE_TRIAL_DAYS:  # Premium user
-            cooldown_seconds = 3600  # 1 hour
-        else:  # Trial user
-            cooldown_seconds = FREE_USER_COOLDOWN_HOURS * 3600
-    else:
-        cooldown_seconds = FREE_USER_COOLDOWN_HOURS * 3600
-    
-    reset_time = current_time + cooldown_seconds
-    
-    # Get current count
-    c.execute(f"SELECT {command_name}_count, {command_name}_reset_time FROM command_cooldowns WHERE user_id = ?", (user_id,))
-    result = c.fetchone()
-    
-    if result:
-        count, old_reset_time = result
-        # If reset time has passed, restart count
-        if old_reset_time and current_time >= old_reset_time:
-            new_count = 1
-        else:
-            new_count = count + 1
+        state = self.buckets.get(key)
+        # Never more than a full bucket spent, even if capacity shrank since it was stored
+        spent = max(min(state[0], capacity) - (now - state[1]) / refill_seconds, 0.0) if state else 0.0
+        allowed = spent <= capacity - 1 + 1e-9
+        if allowed and consume:
+            spent += 1
+            self.buckets[key] = [spent, now]
+            self.dirty.add(key)
+        
+        tokens = max(capacity - spent, 0.0)
+        retry_after = 0 if tokens >= 1 - 1e-9 else (1 - tokens) * refill_seconds
+        next_refill = None
+        if spent > 1e-9:
+            # Time for the fractional part of spent to drain, i.e. the next whole token
+            next_refill = now + (spent - (math.ceil(spent - 1e-9) - 1)) * refill_seconds
+        return RateLimitResult(allowed, tokens, capacity, retry_after, next_refill)
+    
+    def flush(self):
+        """Queue every changed bucket for the DB writer as one batch"""
+        if not self.dirty:
+            return None
+        
+        rows = [(user_id, bucket, *self.buckets[(user_id, bucket)]) for user_id, bucket in self.dirty]
+        self.dirty.clear()
+        return db.submit(write_rate_limit_buckets, rows)
+
+def write_rate_limit_buckets(c, rows):
+    c.executemany("""INSERT INTO rate_limit_buckets (user_id, bucket, spent, updated_at) VALUES (?, ?, ?, ?)
+                     ON CONFLICT (user_id, bucket) DO UPDATE SET spent = excluded.spent, updated_at = excluded.updated_at""", rows)
+
+rate_limiter = RateLimiter()
+
+def describe_rate_limit(tier):
+    """A tier's allowance in words, straight from RATE_LIMITS"""
+    capacity, refill_seconds = RATE_LIMITS[tier]
+    if refill_seconds >= 3600:
+        hours = refill_seconds / 3600
+        text = f"1 use every {hours:g} hour{'s' if hours != 1 else ''}"
     else:
-        new_count = 1
-    
-    # Update or insert
-    c.execute(f"""INSERT INTO command_cooldowns (user_id, {command_name}_count, {command_name}_reset_time)
-                 VALUES (?, ?, ?)
-                 ON CONFLICT(user_id) DO UPDATE SET 
-                 {command_name}_count = ?,
-                 {command_name}_reset_time = ?""",
-              (user_id, new_count, reset_time, new_count, reset_time))
-    
-    conn.commit()
-    conn.close()
+        text = f"{3600 / refill_seconds:g} uses per hour (one every {refill_seconds // 60:g} minutes)"
+    if capacity > 1:
+        text += f", up to {capacity} back to back"
+    return text
+
+# === ENTITLEMENTS ===
+# Gated commands are decided from memory. Each user's subscription (status
+# plus expiry as a timestamp) is read once and kept until grant, revoke,
+# trial, resettrial or a verification approval invalidates it. Their rate
+# limit buckets are read in with it the first time, so once a user has been
+# seen a gated command does no disk I/O.
+
+# Members with one of these roles (or an ADMIN_ROLES id) skip cooldowns
+COOLDOWN_BYPASS_ROLE_NAMES = ['Admin', 'Owner', 'Moderator', 'Mod']
+
+_subscriptions = {}  # user_id -> (status, expires_at timestamp), or None when they have no row
+_bypass_members = {}  # (guild_id, user_id) -> whether their roles skip cooldowns
+
+async def load_entitlement(user_id):
+    """Read a user's subscription (and, the first time, their rate-limit buckets) into memory"""
+    subscription, buckets = await db.get_entitlement(user_id)
+    _subscriptions[user_id] = (subscription[0], datetime.fromisoformat(subscription[1]).timestamp()) if subscription else None
+    rate_limiter.load(user_id, buckets)
+
+def invalidate_entitlement(user_id):
+    """Forget a user's cached subscription after it changed in the DB"""
+    _subscriptions.pop(user_id, None)
+
+async def subscription_tier(user_id):
+    """'premium', 'trial' or 'none' for a user's subscription"""
+    if user_id not in _subscriptions:
+        await load_entitlement(user_id)
+    
+    subscription = _subscriptions[user_id]
+    if not subscription:
+        return 'none'
+    
+    status, expires_at = subscription
+    remaining = expires_at - time.time()
+    if status != 'active' or remaining <= 0:
+        return 'none'
+    # Trial when FREE_TRIAL_DAYS or fewer whole days are left
+    return 'trial' if remaining < (FREE_TRIAL_DAYS + 1) * 86400 else 'premium'
+
+def bypasses_cooldowns(guild, member):
+    """Owner/admin-style roles, cached until the member's roles change"""
+    key = (guild.id, member.id)
+    if key not in _bypass_members:
+        _bypass_members[key] = any(role.name in COOLDOWN_BYPASS_ROLE_NAMES or role.id in ADMIN_ROLES for role in member.roles)
+    return _bypass_members[key]
+
+async def user_tier(ctx):
+    """'owner', 'admin', 'premium', 'trial' or 'none' for whoever invoked the command"""
+    if ctx.author.id == BOT_OWNER_ID:
+        return 'owner'
+    if ctx.guild and bypasses_cooldowns(ctx.guild, ctx.author):
+        return 'admin'
+    return await subscription_tier(ctx.author.id)
+
+@bot.event
+async def on_member_update(before, after):
+    if before.roles != after.roles:
+        _bypass_members.pop((after.guild.id, after.id), None)
+
+def forget_guild_bypasses(guild_id):
+    """Drop every cached bypass decision for a guild"""
+    for key in [key for key in _bypass_members if key[0] == guild_id]:
+        del _bypass_members[key]
+
+@bot.event
+async def on_guild_role_update(before, after):
+    # A rename can add or remove a bypass role name
+    forget_guild_bypasses(after.guild.id)
+
+@bot.event
+async def on_guild_role_delete(role):
+    # Members who held a deleted bypass role don't get a member update
+    forget_guild_bypasses(role.guild.id)
+
+async def flush_entitlements():
+    """Write rate-limit buckets back every ENTITLEMENT_FLUSH_SECONDS"""
+    while not bot.is_closed():
+        await asyncio.sleep(ENTITLEMENT_FLUSH_SECONDS)
+        rate_limiter.flush()
 
 def format_time_remaining(seconds):
     """Format seconds into readable time string"""
@@ -476,52 +1717,44 @@ def format_time_remaining(seconds):
 # Premium check with cooldown for trial users
 def is_premium_or_cooldown(command_name='predict'):
     async def predicate(ctx):
+        user_status = await user_tier(ctx)
+        
         # Owner and admins bypass all cooldowns
-        if ctx.author.id == BOT_OWNER_ID:
+        if user_status in ('owner', 'admin'):
             return True
         
-        # Check for admin roles
-        if ctx.guild:
-            admin_role_names = ['Admin', 'Owner', 'Moderator', 'Mod']
-            for role in ctx.author.roles:
-                if role.name in admin_role_names or role.id in ADMIN_ROLES:
-                    return True
-        
-        user_status = check_user_premium_status(ctx.author.id)
-        
-        # Paid premium users have 2 uses per hour
+        # Paid premium users have 2 uses per hour, spaced 30 minutes apart
         if user_status == 'premium':
-            on_cooldown, time_remaining, uses_left = check_command_cooldown(ctx.author.id, command_name)
+            limit = rate_limiter.check(ctx.author.id, command_name, user_status)
             
-            if on_cooldown:
-                time_str = format_time_remaining(time_remaining)
+            if not limit.allowed:
+                time_str = format_time_remaining(math.ceil(limit.retry_after))
                 embed = discord.Embed(
                     title="⏰ Command on Cooldown",
-                    description=f"Premium users can use `!{command_name}` **2 times per hour**.\n\nYou've used both picks. Time remaining: **{time_str}**",
+                    description=f"Premium users get **{describe_rate_limit('premium')}** on `!{command_name}`.\n\nTime remaining: **{time_str}**",
                     color=0xe74c3c
                 )
                 await ctx.send(embed=embed)
                 return False
             
-            # Update cooldown and allow command
-            update_command_cooldown(ctx.author.id, command_name)
-            
-            # Show uses remaining
-            if uses_left <= 2:
-                remaining_msg = f"({uses_left - 1} pick{'s' if uses_left - 1 != 1 else ''} remaining this hour)"
-                await ctx.send(f"✅ {remaining_msg}", delete_after=5)
+            # Show uses remaining and when the next one comes back
+            uses_left = int(limit.tokens + 1e-9)
+            remaining_msg = f"({uses_left} pick{'s' if uses_left != 1 else ''} remaining"
+            if limit.next_refill:
+                remaining_msg += f" • +1 in {format_time_remaining(math.ceil(limit.next_refill - time.time()))}"
+            await ctx.send(f"✅ {remaining_msg})", delete_after=5)
             
             return True
         
-        # Trial users have 1 use per 3 hours
+        # Trial users have 1 use per FREE_USER_COOLDOWN_HOURS
         if user_status == 'trial':
-            on_cooldown, time_remaining, uses_left = check_command_cooldown(ctx.author.id, command_name)
+            limit = rate_limiter.check(ctx.author.id, command_name, user_status)
             
-            if on_cooldown:
-                time_str = format_time_remaining(time_remaining)
+            if not limit.allowed:
+                time_str = format_time_remaining(math.ceil(limit.retry_after))
                 embed = discord.Embed(
                     title="⏰ Command on Cooldown",
-                    description=f"Trial users can use `!{command_name}` once every **{FREE_USER_COOLDOWN_HOURS} hours**.\n\nTime remaining: **{time_str}**\n\nUpgrade to Premium for 2 picks per hour!",
+                    description=f"Trial users get **{describe_rate_limit('trial')}** on `!{command_name}`.\n\nTime remaining: **{time_str}**\n\nUpgrade to Premium for {describe_rate_limit('premium')}!",
                     color=0xe74c3c
                 )
                 embed.add_field(
@@ -532,8 +1765,6 @@ def is_premium_or_cooldown(command_name='predict'):
                 await ctx.send(embed=embed)
                 return False
             
-            # Update cooldown and allow command
-            update_command_cooldown(ctx.author.id, command_name)
             return True
         
         # No premium or trial - show subscribe message
@@ -558,523 +1789,674 @@ def is_premium_or_cooldown(command_name='predict'):
     return commands.check(predicate)
 
 
-# === PLAYER STATS ANALYSIS ===
+# === ODDS API QUOTA ===
+# Every Odds API response reports what it cost and how many credits are left.
+# Each response is logged per sport and per triggering command. The ledger
+# then stretches the refresh loop and gates cold fetches from commands, so
+# the key doesn't run dry halfway through the month.
 
-async def get_nba_player_stats(player_name, prop_type, line, pick_direction='over'):
-    """Get real player stats from balldontlie.io and calculate hit rate"""
-    try:
-        # Search for player
-        search_url = "https://api.balldontlie.io/v1/players"
-        headers = {"Authorization": BALLDONTLIE_API_KEY}
-        
-        async with aiohttp.ClientSession() as session:
-            # Find player ID
-            async with session.get(
-                search_url,
-                params={"search": player_name},
-                headers=headers,
-                timeout=10
-            ) as resp:
-                if resp.status != 200:
-                    return None
-                
-                data = await resp.json()
-                if not data.get('data'):
-                    return None
-                
-                player = data['data'][0]  # Take first match
-                player_id = player['id']
-            
-            # Get last 10 games stats
-            stats_url = "https://api.balldontlie.io/v1/stats"
-            async with session.get(
-                stats_url,
-                params={
-                    "player_ids[]": player_id,
-                    "per_page": 10,
-                    "seasons[]": 2024  # Current season
-                },
-                headers=headers,
-                timeout=10
-            ) as resp:
-                if resp.status != 200:
-                    return None
-                
-                stats_data = await resp.json()
-                games = stats_data.get('data', [])
-                
-                if len(games) < 5:  # Need at least 5 games
-                    return None
-                
-                # Calculate hit rate based on prop type
-                hits = 0
-                total_games = len(games)
-                prop_values = []
-                
-                for game in games:
-                    value = 0
-                    
-                    if 'points' in prop_type.lower():
-                        value = game.get('pts', 0)
-                    elif 'rebound' in prop_type.lower():
-                        value = game.get('reb', 0)
-                    elif 'assist' in prop_type.lower():
-                        value = game.get('ast', 0)
-                    elif '3' in prop_type or 'three' in prop_type.lower():
-                        value = game.get('fg3m', 0)
-                    elif 'steal' in prop_type.lower():
-                        value = game.get('stl', 0)
-                    elif 'block' in prop_type.lower():
-                        value = game.get('blk', 0)
-                    
-                    prop_values.append(value)
-                    
-                    # Check if hit based on direction
-                    if pick_direction.lower() in ['over', 'more']:
-                        if value > line:  # Hit the over
-                            hits += 1
-                    else:  # UNDER/LESS
-                        if value < line:  # Hit the under
-                            hits += 1
-                
-                hit_rate = (hits / total_games) * 100
-                avg_value = sum(prop_values) / len(prop_values)
-                
-                # For UNDER picks, we want LOW hit rate on overs = HIGH hit rate on unders
-                is_good_pick = hit_rate >= 60
-                
-                return {
-                    'hit_rate': round(hit_rate, 1),
-                    'games_analyzed': total_games,
-                    'average': round(avg_value, 1),
-                    'last_5_avg': round(sum(prop_values[:5]) / 5, 1),
-                    'hits': hits,
-                    'is_good_pick': is_good_pick
-                }
-                
-    except Exception as e:
-        print(f"Error getting stats for {player_name}: {e}")
-        return None
+# Command that triggered the current upstream calls ('refresh' = background loop)
+_quota_command = contextvars.ContextVar('quota_command', default='refresh')
 
-def odds_to_probability(american_odds):
-    if american_odds > 0:
-        return (100 / (american_odds + 100)) * 100
-    else:
-        return (abs(american_odds) / (abs(american_odds) + 100)) * 100
+QUOTA_BURN_WINDOW_DAYS = 3  # Project month-end spend from the last 3 days of usage
+QUOTA_TARGET_USAGE = 0.9  # Start stretching refreshes when projected spend passes 90% of budget
+QUOTA_MAX_STRETCH = 8  # Never stretch a refresh interval more than 8x
+
+odds_api_quota = {
+    'remaining': None,  # x-requests-remaining from the latest response
+    'used': None,  # x-requests-used from the latest response
+    'updated_at': None
+}
 
-async def fetch_nba_props():
-    """Fetch NBA props from Odds API"""
-    picks = []
-    url = "https://api.the-odds-api.com/v4/sports/basketball_nba/events"
+odds_api_spend_by_sport = defaultdict(int)  # Credits recorded per sport since startup
+last_fetch_cost = {}  # Credits the last full fetch of each sport cost
+_quota_ledger_buffer = []
+_quota_totals = {'month_start': None, 'month': 0, 'recent': 0}  # Ledger sums, re-summed by the DB writer after each flush
+
+@bot.before_invoke
+async def tag_quota_command(ctx):
+    # Attribute any upstream spend during this command to it
+    _quota_command.set(ctx.command.name)
+
+def record_odds_api_usage(resp, sport, endpoint):
+    """Record the credit cost of one Odds API response"""
     
-    params = {
-        "apiKey": ODDS_API_KEY,
-        "regions": "us",
-        "markets": "player_points,player_rebounds,player_assists,player_threes,player_steals,player_blocks",
-        "oddsFormat": "american",
-        "dateFormat": "iso"
+    def header_int(name):
+        value = resp.headers.get(name)
+        try:
+            return int(float(value)) if value is not None else None
+        except ValueError:
+            return None
+    
+    remaining = header_int('x-requests-remaining')
+    used = header_int('x-requests-used')
+    cost = header_int('x-requests-last')
+    
+    if cost is None:
+        # Fall back to the movement of the used counter
+        previous_used = odds_api_quota['used']
+        cost = used - previous_used if used is not None and previous_used is not None else 0
+    cost = max(cost, 0)
+    
+    if remaining is not None:
+        odds_api_quota['remaining'] = remaining
+    if used is not None:
+        odds_api_quota['used'] = used
+    odds_api_quota['updated_at'] = time.time()
+    
+    odds_api_spend_by_sport[sport] += cost
+    _quota_ledger_buffer.append((int(time.time()), sport, _quota_command.get(), endpoint, cost, remaining, used))
+
+def quota_window_starts():
+    """(calendar month start, burn window start) as timestamps"""
+    now = datetime.now()
+    month_start_ts = int(datetime(now.year, now.month, 1).timestamp())
+    return month_start_ts, max(month_start_ts, int(time.time() - QUOTA_BURN_WINDOW_DAYS * 86400))
+
+def load_quota_totals(c):
+    """Re-sum this month's and the burn window's spend (DB writer thread)"""
+    global _quota_totals
+    month_start_ts, window_start_ts = quota_window_starts()
+    spent = db_fetch_one(c, "SELECT COALESCE(SUM(cost), 0) FROM odds_api_usage WHERE requested_at >= ?", (month_start_ts,))[0]
+    recent = db_fetch_one(c, "SELECT COALESCE(SUM(cost), 0) FROM odds_api_usage WHERE requested_at >= ?", (window_start_ts,))[0]
+    _quota_totals = {'month_start': month_start_ts, 'month': spent, 'recent': recent}
+
+def write_quota_ledger(c, rows):
+    c.executemany("""INSERT INTO odds_api_usage
+                     (requested_at, sport, command, endpoint, cost, requests_remaining, requests_used)
+                     VALUES (?, ?, ?, ?, ?, ?, ?)""", rows)
+    load_quota_totals(c)
+
+def flush_quota_ledger():
+    """Queue buffered ledger rows for the DB writer as one transaction
+    
+    Returns the write's future (None when there was nothing to flush).
+    """
+    if not _quota_ledger_buffer:
+        return None
+    
+    rows = _quota_ledger_buffer[:]
+    _quota_ledger_buffer.clear()
+    
+    # Count them now; the writer re-sums the totals once they're stored
+    cost = sum(row[4] for row in rows)
+    _quota_totals['month'] += cost
+    _quota_totals['recent'] += cost
+    return db.submit(write_quota_ledger, rows)
+
+def quota_month_summary():
+    """Credits spent this month, projected month-end spend and what's left
+    
+    The billing month is approximated by the calendar month. Ledger sums
+    come from memory, so this is cheap enough for the scheduler's hot path.
+    """
+    global _quota_totals
+    now = datetime.now()
+    month_start = datetime(now.year, now.month, 1)
+    days_in_month = calendar.monthrange(now.year, now.month)[1]
+    
+    if _quota_totals['month_start'] != int(month_start.timestamp()):
+        # A new month started since the writer last summed the ledger
+        _quota_totals = {'month_start': int(month_start.timestamp()), 'month': 0, 'recent': 0}
+    spent = _quota_totals['month']
+    recent = _quota_totals['recent']
+    
+    # Rows that haven't been flushed yet
+    pending = sum(row[4] for row in _quota_ledger_buffer)
+    spent += pending
+    recent += pending
+    
+    # The API's own counters win when we have them
+    budget = ODDS_API_MONTHLY_BUDGET
+    if odds_api_quota['used'] is not None:
+        spent = max(spent, odds_api_quota['used'])
+        if odds_api_quota['remaining'] is not None:
+            budget = min(budget, odds_api_quota['used'] + odds_api_quota['remaining'])
+    
+    elapsed_days = max((now - month_start).total_seconds() / 86400, 1 / 24)
+    burn_per_day = recent / min(elapsed_days, QUOTA_BURN_WINDOW_DAYS)
+    projected = spent + burn_per_day * max(days_in_month - elapsed_days, 0)
+    
+    remaining = budget - spent
+    if odds_api_quota['remaining'] is not None:
+        remaining = min(remaining, odds_api_quota['remaining'])
+    
+    return {
+        'spent': spent,
+        'remaining': remaining,
+        'budget': budget,
+        'burn_per_day': burn_per_day,
+        'projected': projected
     }
+
+def quota_interval_multiplier():
+    """How much to stretch refresh intervals so projected spend fits the budget"""
+    summary = quota_month_summary()
+    if summary['budget'] <= 0 or summary['remaining'] <= ODDS_API_RESERVE_CREDITS:
+        return QUOTA_MAX_STRETCH
+    
+    pressure = summary['projected'] / (summary['budget'] * QUOTA_TARGET_USAGE)
+    return min(max(pressure, 1.0), QUOTA_MAX_STRETCH)
+
+db.submit(load_quota_totals)
+
+def estimate_fetch_cost(sport):
+    """Credits a full aggregate_picks(sport) is expected to cost"""
+    if sport in last_fetch_cost:
+        return last_fetch_cost[sport]
+    
+    spec = get_sport_spec(sport)
+    if not spec:
+        return 0
+    if spec['mode'] == 'props':
+        # One credit per market per event (single region)
+        return len(spec['markets']) * (MAX_EVENTS_PER_SPORT or 15)
+    if spec.get('first_league_only'):
+        return 1  # Usually stops at the top league
+    return len(spec['sport_keys'])
+
+def quota_allows_cold_fetch(sport, cost=None):
+    """Can a command afford to fetch this sport from the API right now?"""
+    if cost is None:
+        cost = estimate_fetch_cost(sport)
+    summary = quota_month_summary()
     
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params, timeout=15) as resp:
-                print(f"NBA Events API Status: {resp.status}")
-                
-                if resp.status == 401:
-                    print("❌ API KEY ERROR - The Odds API key is invalid or quota exceeded!")
-                    print(f"Check your quota at: https://the-odds-api.com/account/")
-                    return picks
-                    
-                if resp.status != 200:
-                    print(f"NBA API Error: {resp.status}")
-                    return picks
-                    
-                events = await resp.json()
-                print(f"NBA Events found: {len(events)}")
-                
-                for event in events[:5]:
-                    event_id = event['id']
-                    props_url = f"https://api.the-odds-api.com/v4/sports/basketball_nba/events/{event_id}/odds"
-                    
-                    async with session.get(props_url, params=params, timeout=15) as props_resp:
-                        if props_resp.status == 401:
-                            print("❌ API KEY ERROR on props request - quota likely exceeded")
-                            return picks
-                            
-                        if props_resp.status != 200:
-                            print(f"Props API Error for {event_id}: {props_resp.status}")
-                            continue
-                            
-                        props_data = await props_resp.json()
-                        
-                        if 'bookmakers' in props_data and props_data['bookmakers']:
-                            print(f"Found {len(props_data['bookmakers'])} bookmakers for {event_id}")
-                            for bookmaker in props_data['bookmakers']:
-                                if 'markets' in bookmaker:
-                                    for market in bookmaker['markets']:
-                                        if 'outcomes' in market:
-                                            for outcome in market['outcomes']:
-                                                player_name = outcome.get('description', 'Unknown')
-                                                line = outcome.get('point', 0)
-                                                price = outcome.get('price', 0)
-                                                over_under = outcome.get('name', '')
-                                                probability = odds_to_probability(price)
-                                                
-                                                prop_types = {
-                                                    'player_points': 'Points',
-                                                    'player_rebounds': 'Rebounds',
-                                                    'player_assists': 'Assists',
-                                                    'player_threes': '3-Pointers',
-                                                    'player_steals': 'Steals',
-                                                    'player_blocks': 'Blocks'
-                                                }
-                                                
-                                                picks.append({
-                                                    'player': player_name,
-                                                    'prop_type': prop_types.get(market['key'], market['key']),
-                                                    'line': line,
-                                                    'pick': over_under,
-                                                    'odds': price,
-                                                    'probability': round(probability, 1),
-                                                    'bookmaker': bookmaker['title'],
-                                                    'game': f"{props_data['home_team']} vs {props_data['away_team']}"
-                                                })
-                        else:
-                            print(f"No bookmakers found for {event_id}")
-                
-                print(f"Total NBA picks collected: {len(picks)}")
-    except Exception as e:
-        print(f"Error fetching NBA: {e}")
-        import traceback
-        traceback.print_exc()
-    return picks
+    if summary['remaining'] - cost < ODDS_API_RESERVE_CREDITS:
+        return False
+    return summary['projected'] + cost <= summary['budget']
 
-async def fetch_nfl_props():
-    """Fetch NFL props - tries PrizePicks first, falls back to Odds API"""
+async def refuse_cold_fetch(ctx, sport, cost=None):
+    """Tell the user and return True when fetching this sport would blow the API budget"""
+    if ctx.author.id == BOT_OWNER_ID or quota_allows_cold_fetch(sport, cost):
+        return False
     
-    # Try PrizePicks first
+    await ctx.send(f"⏳ Live **{sport.upper()}** odds are rationed right now to stay inside this month's data budget. Picks will show up after the next scheduled refresh!")
+    return True
+
+# === PLAYER STATS ANALYSIS ===
+# NBA picks are enriched in one stage. Each player is resolved to a
+# balldontlie id once. Their recent box scores come from batched
+# player_ids[] queries, and every prop/line/direction for that player is
+# graded against the same game log. Ids and game logs are cached in SQLite,
+# so a refresh only fetches games played since the last sync.
+
+def prop_stat_value(game, prop_type):
+    """Box-score number a prop is graded on"""
+    prop = prop_type.lower()
+    if 'points' in prop:
+        value = game.get('pts')
+    elif 'rebound' in prop:
+        value = game.get('reb')
+    elif 'assist' in prop:
+        value = game.get('ast')
+    elif '3' in prop_type or 'three' in prop:
+        value = game.get('fg3m')
+    elif 'steal' in prop:
+        value = game.get('stl')
+    elif 'block' in prop:
+        value = game.get('blk')
+    else:
+        value = 0
+    return value or 0
+
+def player_hit_rate(games, prop_type, line, pick_direction='over'):
+    """Hit rate of one prop/line/direction over a game log (newest game first)"""
+    if len(games) < 5:  # Need at least 5 games
+        return None
     
-    if prizepicks_data and len(prizepicks_data) > 0:
-        return prizepicks_data
+    prop_values = [prop_stat_value(game, prop_type) for game in games]
     
-    # Fallback to Odds API
-    picks = []
-    url = "https://api.the-odds-api.com/v4/sports/americanfootball_nfl/events"
+    if pick_direction.lower() in ['over', 'more']:
+        hits = sum(1 for value in prop_values if value > line)
+    else:  # UNDER/LESS
+        hits = sum(1 for value in prop_values if value < line)
     
-    params = {
-        "apiKey": ODDS_API_KEY,
-        "regions": "us",
-        "markets": "player_pass_tds,player_pass_yds,player_rush_yds,player_receptions",
-        "oddsFormat": "american",
-        "dateFormat": "iso"
+    total_games = len(games)
+    hit_rate = (hits / total_games) * 100
+    
+    return {
+        'hit_rate': round(hit_rate, 1),
+        'games_analyzed': total_games,
+        'average': round(sum(prop_values) / total_games, 1),
+        'last_5_avg': round(sum(prop_values[:5]) / 5, 1),
+        'hits': hits,
+        'is_good_pick': hit_rate >= 60
     }
+
+async def search_nba_player_id(session, player_name, semaphore):
+    """balldontlie id for a player name (first match)"""
+    async with semaphore:
+        async with session.get(
+            "https://api.balldontlie.io/v1/players",
+            params={"search": player_name},
+            headers={"Authorization": BALLDONTLIE_API_KEY},
+            timeout=10
+        ) as resp:
+            if resp.status != 200:
+                return None
+            data = await resp.json()
+    
+    if not data.get('data'):
+        return None
+    return data['data'][0]['id']
+
+def current_nba_season():
+    """balldontlie season (its starting year) - a new season tips off in October"""
+    now = datetime.now()
+    return now.year if now.month >= 10 else now.year - 1
+
+def load_cached_player_ids(c, player_names):
+    """Name -> balldontlie id for names resolved within the cache TTL"""
+    if not player_names:
+        return {}
     
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params, timeout=15) as resp:
+    cutoff = int(time.time() - PLAYER_ID_CACHE_DAYS * 86400)
+    keys = {name.lower().strip(): name for name in player_names}
+    placeholders = ','.join('?' * len(keys))
+    
+    rows = db_fetch_all(c, f"""SELECT player_name, player_id FROM nba_player_ids
+                               WHERE player_name IN ({placeholders}) AND resolved_at >= ?""", (*keys, cutoff))
+    
+    return {keys[key]: player_id for key, player_id in rows}
+
+def store_player_ids(c, player_ids):
+    if not player_ids:
+        return
+    
+    now = int(time.time())
+    c.executemany("INSERT OR REPLACE INTO nba_player_ids (player_name, player_id, resolved_at) VALUES (?, ?, ?)",
+                  [(name.lower().strip(), player_id, now) for name, player_id in player_ids.items()])
+
+def load_game_log_sync(c, player_ids, season):
+    """player_id -> (latest cached game date, last synced_at) for this season"""
+    if not player_ids:
+        return {}
+    
+    placeholders = ','.join('?' * len(player_ids))
+    rows = db_fetch_all(c, f"""SELECT s.player_id, MAX(g.game_date), s.synced_at
+                               FROM nba_game_log_sync s
+                               LEFT JOIN nba_game_logs g ON g.player_id = s.player_id AND g.season = s.season
+                               WHERE s.season = ? AND s.player_id IN ({placeholders})
+                               GROUP BY s.player_id""", (season, *player_ids))
+    
+    return {player_id: (latest_date, synced_at) for player_id, latest_date, synced_at in rows}
+
+def store_game_logs(c, season, synced_ids, games_by_player):
+    """Upsert fetched box scores and mark the players as synced"""
+    rows = []
+    for player_id, games in games_by_player.items():
+        for game in games:
+            rows.append((player_id, game['game']['id'], season, game['game']['date'][:10],
+                         game.get('pts') or 0, game.get('reb') or 0, game.get('ast') or 0,
+                         game.get('fg3m') or 0, game.get('stl') or 0, game.get('blk') or 0))
+    
+    now = int(time.time())
+    c.executemany("""INSERT OR REPLACE INTO nba_game_logs
+                     (player_id, game_id, season, game_date, pts, reb, ast, fg3m, stl, blk)
+                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""", rows)
+    c.executemany("INSERT OR REPLACE INTO nba_game_log_sync (player_id, season, synced_at) VALUES (?, ?, ?)",
+                  [(player_id, season, now) for player_id in synced_ids])
+
+def load_game_logs(c, player_ids, season):
+    """player_id -> most recent cached games this season, newest first"""
+    if not player_ids:
+        return {}
+    
+    placeholders = ','.join('?' * len(player_ids))
+    rows = db_fetch_all(c, f"""SELECT player_id, game_date, pts, reb, ast, fg3m, stl, blk FROM nba_game_logs
+                               WHERE season = ? AND player_id IN ({placeholders})
+                               ORDER BY player_id, game_date DESC""", (season, *player_ids))
+    
+    game_logs = defaultdict(list)
+    for player_id, game_date, pts, reb, ast, fg3m, stl, blk in rows:
+        if len(game_logs[player_id]) < STATS_GAMES_PER_PLAYER:
+            game_logs[player_id].append({'game_date': game_date, 'pts': pts, 'reb': reb, 'ast': ast,
+                                         'fg3m': fg3m, 'stl': stl, 'blk': blk})
+    return game_logs
+
+async def resolve_nba_player_ids(session, player_names, semaphore):
+    """Name -> balldontlie id, from the cache first and one search per unknown player"""
+    names = list(dict.fromkeys(player_names))
+    player_ids = await db.read(load_cached_player_ids, names)
+    missing = [name for name in names if name not in player_ids]
+    
+    results = await asyncio.gather(
+        *[search_nba_player_id(session, name, semaphore) for name in missing],
+        return_exceptions=True
+    )
+    
+    resolved = {}
+    for name, result in zip(missing, results):
+        if isinstance(result, Exception):
+            print(f"Error looking up {name}: {result}")
+        elif result is not None:
+            resolved[name] = result
+    
+    await db.write(store_player_ids, resolved)
+    player_ids.update(resolved)
+    return player_ids
+
+async def fetch_stats_batch(session, player_ids, season, start_date, semaphore):
+    """Box scores since start_date for a batch of players (one paginated /stats query), None on error"""
+    games_by_player = defaultdict(list)
+    cursor = None
+    
+    while True:
+        params = [("player_ids[]", player_id) for player_id in player_ids]
+        params += [("seasons[]", season), ("start_date", start_date), ("per_page", 100)]
+        if cursor:
+            params.append(("cursor", cursor))
+        
+        async with semaphore:
+            async with session.get(
+                "https://api.balldontlie.io/v1/stats",
+                params=params,
+                headers={"Authorization": BALLDONTLIE_API_KEY},
+                timeout=10
+            ) as resp:
                 if resp.status != 200:
-                    return picks
-                events = await resp.json()
-                
-                for event in events[:5]:
-                    event_id = event['id']
-                    props_url = f"https://api.the-odds-api.com/v4/sports/americanfootball_nfl/events/{event_id}/odds"
-                    
-                    async with session.get(props_url, params=params, timeout=15) as props_resp:
-                        if props_resp.status != 200:
-                            continue
-                        props_data = await props_resp.json()
-                        
-                        if 'bookmakers' in props_data:
-                            for bookmaker in props_data['bookmakers']:
-                                for market in bookmaker['markets']:
-                                    for outcome in market['outcomes']:
-                                        player_name = outcome.get('description', 'Unknown')
-                                        line = outcome.get('point', 0)
-                                        price = outcome.get('price', 0)
-                                        over_under = outcome.get('name', '')
-                                        probability = odds_to_probability(price)
-                                        
-                                        prop_types = {
-                                            'player_pass_tds': 'Pass TDs',
-                                            'player_pass_yds': 'Pass Yards',
-                                            'player_rush_yds': 'Rush Yards',
-                                            'player_receptions': 'Receptions'
-                                        }
-                                        
-                                        picks.append({
-                                            'player': player_name,
-                                            'prop_type': prop_types.get(market['key'], market['key']),
-                                            'line': line,
-                                            'pick': over_under,
-                                            'odds': price,
-                                            'probability': round(probability, 1),
-                                            'bookmaker': bookmaker['title'],
-                                            'game': f"{props_data['home_team']} vs {props_data['away_team']}"
-                                        })
-    except Exception as e:
-        print(f"Error fetching NFL: {e}")
-    return picks
+                    print(f"balldontlie stats error: {resp.status}")
+                    return None
+                payload = await resp.json()
+        
+        for row in payload.get('data', []):
+            games_by_player[row['player']['id']].append(row)
+        
+        cursor = payload.get('meta', {}).get('next_cursor')
+        if not cursor:
+            break
+    
+    return games_by_player
 
-async def fetch_mlb_props():
-    """Fetch MLB props - tries PrizePicks first, falls back to Odds API"""
+async def enrich_nba_picks(picks):
+    """Hit-rate stats for each pick (None where unavailable), one game log per player"""
+    session = get_http_session()
+    semaphore = asyncio.Semaphore(STATS_FETCH_CONCURRENCY)
+    season = current_nba_season()
+    
+    player_ids = await resolve_nba_player_ids(session, [pick.player for pick in picks], semaphore)
+    distinct_ids = list(dict.fromkeys(player_ids.values()))
+    
+    # Only players not synced recently need fetching, and only games since their latest cached one
+    sync_state = await db.read(load_game_log_sync, distinct_ids, season)
+    cold_start = max(datetime(season, 10, 1), datetime.now() - timedelta(days=STATS_LOOKBACK_DAYS)).strftime('%Y-%m-%d')
+    stale = []
+    for player_id in distinct_ids:
+        latest_date, synced_at = sync_state.get(player_id, (None, 0))
+        if time.time() - synced_at >= STATS_SYNC_SECONDS:
+            # Start at the latest cached date (inclusive) so a box score saved mid-game gets corrected
+            stale.append((latest_date or cold_start, player_id))
+    
+    # Players with similar start dates share a batch; each batch starts at its earliest date
+    stale.sort()
+    batches = [stale[i:i + STATS_PLAYERS_PER_REQUEST] for i in range(0, len(stale), STATS_PLAYERS_PER_REQUEST)]
+    results = await asyncio.gather(
+        *[fetch_stats_batch(session, [player_id for _, player_id in batch], season, batch[0][0], semaphore) for batch in batches],
+        return_exceptions=True
+    )
     
-    # Try PrizePicks first
+    for batch, result in zip(batches, results):
+        if isinstance(result, Exception):
+            print(f"Error fetching NBA stats batch: {result}")
+        elif result is not None:
+            await db.write(store_game_logs, season, [player_id for _, player_id in batch], result)
     
-    if prizepicks_data and len(prizepicks_data) > 0:
-        return prizepicks_data
+    game_logs = await db.read(load_game_logs, distinct_ids, season)
+    print(f"📊 NBA stats: {len(player_ids)} players, {len(stale)} synced in {len(batches)} batched requests")
     
-    # Fallback to Odds API
-    picks = []
-    url = "https://api.the-odds-api.com/v4/sports/baseball_mlb/events"
+    return [
+        player_hit_rate(game_logs.get(player_ids.get(pick.player), []), pick.prop_type, pick.line, pick.pick)
+        for pick in picks
+    ]
+
+# === ODDS MATH ===
+# One place for odds conversions. Every function takes either a scalar (and
+# returns a float) or a NumPy array (and returns an array), so commands and
+# whole snapshot columns share the same code. Probabilities are fractions
+# (0-1) unless the name says percent.
+
+def _same_shape(result, odds):
+    return float(result) if np.ndim(odds) == 0 else result
+
+def american_to_decimal(american_odds):
+    """+150 -> 2.5, -200 -> 1.5"""
+    odds = np.asarray(american_odds, dtype=np.float64)
+    with np.errstate(divide='ignore'):
+        decimal = np.where(odds > 0, odds / 100 + 1, 100 / np.abs(odds) + 1)
+    return _same_shape(decimal, american_odds)
+
+def decimal_to_american(decimal_odds):
+    """2.5 -> +150, 1.5 -> -200"""
+    decimal = np.asarray(decimal_odds, dtype=np.float64)
+    with np.errstate(divide='ignore'):
+        odds = np.where(decimal >= 2.0, (decimal - 1) * 100, -100 / (decimal - 1))
+    return _same_shape(odds, decimal_odds)
+
+def implied_probability(american_odds):
+    """Break-even win probability of a price (includes the book's vig)"""
+    return 1 / american_to_decimal(american_odds)
+
+def odds_to_probability(american_odds):
+    """Implied probability in percent"""
+    return implied_probability(american_odds) * 100
+
+def net_payout(american_odds, stake=1.0):
+    """Profit on a winning bet (stake not included)"""
+    return (american_to_decimal(american_odds) - 1) * stake
+
+def remove_vig(probability_a, probability_b):
+    """Fair probabilities of a two-way market, normalized so they sum to 1"""
+    total = np.asarray(probability_a) + np.asarray(probability_b)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _same_shape(probability_a / total, total), _same_shape(probability_b / total, total)
+
+def expected_value(probability, american_odds, stake=1.0):
+    """Expected profit of a bet given a win probability"""
+    return (probability * net_payout(american_odds) - (1 - probability)) * stake
+
+def kelly_fraction(probability, american_odds):
+    """Full-Kelly share of bankroll (negative when there's no edge)"""
+    profit = net_payout(american_odds)
+    return (probability * profit - (1 - probability)) / profit
+
+def parlay_decimal(american_odds):
+    """Combined decimal odds of a list of legs"""
+    return float(np.prod(american_to_decimal(np.asarray(american_odds, dtype=np.float64))))
+
+async def fetch_event_odds(session, sport, sport_key, events, params, sport_name):
+    """Fetch per-event props for a slate concurrently (bounded by EVENT_FETCH_CONCURRENCY)
     
-    params = {
-        "apiKey": ODDS_API_KEY,
-        "regions": "us",
-        "markets": "player_hits,player_total_bases,player_runs,player_rbis",
-        "oddsFormat": "american",
-        "dateFormat": "iso"
-    }
+    Returns the odds payloads in event order. A failing event is logged and
+    skipped so the rest of the slate still comes through. Returns None when
+    every event failed.
+    """
+    if MAX_EVENTS_PER_SPORT > 0:
+        events = events[:MAX_EVENTS_PER_SPORT]
     
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params, timeout=15) as resp:
-                if resp.status != 200:
-                    return picks
-                events = await resp.json()
-                
-                for event in events[:5]:
-                    event_id = event['id']
-                    props_url = f"https://api.the-odds-api.com/v4/sports/baseball_mlb/events/{event_id}/odds"
+    semaphore = asyncio.Semaphore(EVENT_FETCH_CONCURRENCY)
+    quota_exceeded = False
+    
+    async def fetch_one(event):
+        nonlocal quota_exceeded
+        event_id = event['id']
+        props_url = f"https://api.the-odds-api.com/v4/sports/{sport_key}/events/{event_id}/odds"
+        
+        async with semaphore:
+            # Don't keep hammering the API once the key is rejected
+            if quota_exceeded:
+                return None
+            
+            try:
+                async with session.get(props_url, params=params, timeout=15) as props_resp:
+                    record_odds_api_usage(props_resp, sport, 'event_odds')
                     
-                    async with session.get(props_url, params=params, timeout=15) as props_resp:
-                        if props_resp.status != 200:
-                            continue
-                        props_data = await props_resp.json()
-                        
-                        if 'bookmakers' in props_data:
-                            for bookmaker in props_data['bookmakers']:
-                                for market in bookmaker['markets']:
-                                    for outcome in market['outcomes']:
-                                        player_name = outcome.get('description', 'Unknown')
-                                        line = outcome.get('point', 0)
-                                        price = outcome.get('price', 0)
-                                        over_under = outcome.get('name', '')
-                                        probability = odds_to_probability(price)
-                                        
-                                        prop_types = {
-                                            'player_hits': 'Hits',
-                                            'player_total_bases': 'Total Bases',
-                                            'player_runs': 'Runs',
-                                            'player_rbis': 'RBIs'
-                                        }
-                                        
-                                        picks.append({
-                                            'player': player_name,
-                                            'prop_type': prop_types.get(market['key'], market['key']),
-                                            'line': line,
-                                            'pick': over_under,
-                                            'odds': price,
-                                            'probability': round(probability, 1),
-                                            'bookmaker': bookmaker['title'],
-                                            'game': f"{props_data['home_team']} vs {props_data['away_team']}"
-                                        })
-    except Exception as e:
-        print(f"Error fetching MLB: {e}")
-    return picks
+                    if props_resp.status == 401:
+                        quota_exceeded = True
+                        print("❌ API KEY ERROR on props request - quota likely exceeded")
+                        return None
+                    
+                    if props_resp.status != 200:
+                        print(f"Props API Error for {event_id}: {props_resp.status}")
+                        return None
+                    
+                    return await props_resp.json()
+            except Exception as e:
+                print(f"Error fetching {sport_name} props for {event_id}: {e}")
+                return None
+    
+    results = await asyncio.gather(*(fetch_one(event) for event in events))
+    payloads = [props_data for props_data in results if props_data]
+    if events and not payloads:
+        return None
+    return payloads
 
-async def fetch_nhl_props():
-    """Fetch NHL props - tries PrizePicks first, falls back to Odds API"""
+async def fetch_league_sweep(sport, league_keys, params, sport_name):
+    """Fetch /odds for several leagues concurrently under one shared deadline
+    
+    Returns {league: events} for every league that answered in time. Leagues
+    that errored or timed out are left out, so an empty dict means the whole
+    sweep failed. Callers merge by walking league_keys in order, so results
+    never depend on which request happened to finish first.
+    """
+    session = get_http_session()
     
-    # Try PrizePicks first
+    async def fetch_league(league):
+        url = f"https://api.the-odds-api.com/v4/sports/{league}/odds"
+        try:
+            async with session.get(url, params=params, timeout=LEAGUE_SWEEP_DEADLINE_SECONDS) as resp:
+                record_odds_api_usage(resp, sport, 'odds')
+                print(f"{sport_name} {league} API Status: {resp.status}")
+                if resp.status != 200:
+                    return league, None
+                return league, await resp.json()
+        except Exception as e:
+            print(f"Error fetching {league}: {e}")
+            return league, None
+    
+    tasks = [asyncio.create_task(fetch_league(league)) for league in league_keys]
+    done, pending = await asyncio.wait(tasks, timeout=LEAGUE_SWEEP_DEADLINE_SECONDS)
+    
+    for task in pending:
+        task.cancel()
+    if pending:
+        print(f"⏰ {sport_name} sweep deadline hit - skipped {len(pending)} slow leagues")
+    
+    results = {}
+    for task in done:
+        league, events = task.result()
+        if events is not None:
+            results[league] = events
+    return results
+
+def parse_odds_payload(event, labels, player_props, outcomes):
+    """Flatten one Odds API event payload into per-book outcome rows
     
-    if prizepicks_data and len(prizepicks_data) > 0:
-        return prizepicks_data
+    Appends to outcomes in place and returns how many rows were added.
+    Everything that is constant per event / book / market is looked up once
+    outside the inner outcome loop.
+    """
+    bookmakers = event.get('bookmakers')
+    if not bookmakers:
+        return 0
+    
+    added = 0
+    game = f"{event.get('home_team', 'Unknown')} vs {event.get('away_team', 'Unknown')}"
+    event_id = event.get('id', '')
+    
+    for bookmaker in bookmakers:
+        book = bookmaker['title']
+        for market in bookmaker.get('markets', ()):
+            market_key = market['key']
+            prop_type = labels.get(market_key, market_key)
+            
+            for outcome in market.get('outcomes', ()):
+                price = outcome.get('price', 0)
+                if -100 < price < 100:
+                    continue  # Missing or not a valid American price
+                
+                if player_props:
+                    player_name = outcome.get('description', 'Unknown')
+                    line = outcome.get('point') or 0
+                    pick = outcome.get('name', '')
+                else:
+                    # Moneylines: the team/fighter is the "player", Over keeps embeds working
+                    player_name = outcome.get('name', 'Unknown')
+                    line = 1
+                    pick = 'Over'
+                
+                outcomes.append(Outcome(
+                    player_name,
+                    prop_type,
+                    line,
+                    pick,
+                    price,
+                    book,
+                    game,
+                    event_id,
+                    market_key
+                ))
+                added += 1
+    
+    return added
+
+async def fetch_props_outcomes(sport, spec):
+    """Player props: list the events, then fetch each event's odds concurrently
     
-    # Fallback to Odds API
-    picks = []
-    url = "https://api.the-odds-api.com/v4/sports/icehockey_nhl/events"
+    Returns None when the fetch failed, as opposed to [] for an empty slate.
+    """
+    outcomes = []
+    sport_key = spec['sport_keys'][0]
+    url = f"https://api.the-odds-api.com/v4/sports/{sport_key}/events"
     
     params = {
         "apiKey": ODDS_API_KEY,
         "regions": "us",
-        "markets": "player_points,player_assists,player_shots_on_goal",
+        "markets": ",".join(spec['markets']),
         "oddsFormat": "american",
         "dateFormat": "iso"
     }
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params, timeout=15) as resp:
-                if resp.status != 200:
-                    return picks
-                events = await resp.json()
-                
-                for event in events[:5]:
-                    event_id = event['id']
-                    props_url = f"https://api.the-odds-api.com/v4/sports/icehockey_nhl/events/{event_id}/odds"
-                    
-                    async with session.get(props_url, params=params, timeout=15) as props_resp:
-                        if props_resp.status != 200:
-                            continue
-                        props_data = await props_resp.json()
-                        
-                        if 'bookmakers' in props_data:
-                            for bookmaker in props_data['bookmakers']:
-                                for market in bookmaker['markets']:
-                                    for outcome in market['outcomes']:
-                                        player_name = outcome.get('description', 'Unknown')
-                                        line = outcome.get('point', 0)
-                                        price = outcome.get('price', 0)
-                                        over_under = outcome.get('name', '')
-                                        probability = odds_to_probability(price)
-                                        
-                                        prop_types = {
-                                            'player_points': 'Points',
-                                            'player_assists': 'Assists',
-                                            'player_shots_on_goal': 'Shots on Goal'
-                                        }
-                                        
-                                        picks.append({
-                                            'player': player_name,
-                                            'prop_type': prop_types.get(market['key'], market['key']),
-                                            'line': line,
-                                            'pick': over_under,
-                                            'odds': price,
-                                            'probability': round(probability, 1),
-                                            'bookmaker': bookmaker['title'],
-                                            'game': f"{props_data['home_team']} vs {props_data['away_team']}"
-                                        })
-    except Exception as e:
-        print(f"Error fetching NHL: {e}")
-    return picks
-
-async def fetch_tennis_props():
-    """Fetch tennis betting lines"""
-    all_picks = []
-    
-    # Check for active tennis tournaments
-    tennis_leagues = [
-        'tennis_atp_aus_open_singles',  # ATP Australian Open
-        'tennis_wta_aus_open_singles',  # WTA Australian Open
-        'tennis_atp_french_open',       # ATP French Open (when active)
-        'tennis_wta_french_open',       # WTA French Open (when active)
-        'tennis_atp_wimbledon',         # ATP Wimbledon (when active)
-        'tennis_wta_wimbledon',         # WTA Wimbledon (when active)
-        'tennis_atp_us_open',           # ATP US Open (when active)
-        'tennis_wta_us_open',           # WTA US Open (when active)
-    ]
-    
-    for league in tennis_leagues:
-        url = f"https://api.the-odds-api.com/v4/sports/{league}/odds"
-        params = {"apiKey": ODDS_API_KEY, "regions": "us", "markets": "h2h", "oddsFormat": "american"}
+        session = get_http_session()
+        async with session.get(url, params=params, timeout=15) as resp:
+            record_odds_api_usage(resp, sport, 'events')
+            print(f"{spec['name']} Events API Status: {resp.status}")
+            
+            if resp.status == 401:
+                print("❌ API KEY ERROR - The Odds API key is invalid or quota exceeded!")
+                print(f"Check your quota at: https://the-odds-api.com/account/")
+                return None
+            
+            if resp.status != 200:
+                print(f"{spec['name']} API Error: {resp.status}")
+                return None
+            
+            events = await resp.json()
+            print(f"{spec['name']} Events found: {len(events)}")
+            note_next_commence(sport, events)
         
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params, timeout=15) as resp:
-                    print(f"Tennis {league} API Status: {resp.status}")
-                    
-                    if resp.status == 200:
-                        events = await resp.json()
-                        print(f"Found {len(events)} tennis events in {league}")
-                        
-                        for event in events:
-                            if 'bookmakers' in event and event['bookmakers']:
-                                for bookmaker in event['bookmakers']:
-                                    if 'markets' in bookmaker:
-                                        for market in bookmaker['markets']:
-                                            if 'outcomes' in market:
-                                                for outcome in market['outcomes']:
-                                                    player_name = outcome.get('name', 'Unknown')
-                                                    price = outcome.get('price', 0)
-                                                    probability = odds_to_probability(price)
-                                                    
-                                                    # Return raw picks like other sports
-                                                    all_picks.append({
-                                                        'player': player_name,
-                                                        'prop_type': 'To Win Match',
-                                                        'line': 1,
-                                                        'pick': 'Over',
-                                                        'odds': price,
-                                                        'probability': round(probability, 1),
-                                                        'bookmaker': bookmaker['title'],
-                                                        'game': f"{event.get('home_team', 'Unknown')} vs {event.get('away_team', 'Unknown')}"
-                                                    })
-                        
-                        if all_picks:
-                            print(f"Collected {len(all_picks)} tennis picks from {league}")
-                            # Continue checking other tournaments to get more matches
-                            
-        except Exception as e:
-            print(f"Error fetching {league}: {e}")
-            # Continue to next league
-    
-    print(f"Tennis returning {len(all_picks)} raw picks")
-    return all_picks
-
-async def fetch_soccer_props():
-    picks = []
-    # Try multiple soccer leagues
-    soccer_leagues = [
-        'soccer_epl',
-        'soccer_spain_la_liga', 
-        'soccer_germany_bundesliga',
-        'soccer_italy_serie_a',
-        'soccer_uefa_champs_league'
-    ]
-    
-    for league in soccer_leagues:
-        url = f"https://api.the-odds-api.com/v4/sports/{league}/odds"
+        props_payloads = await fetch_event_odds(session, sport, sport_key, events, params, spec['name'])
+        if props_payloads is None:
+            print(f"❌ Every {spec['name']} event odds request failed")
+            return None
         
-        params = {
-            "apiKey": ODDS_API_KEY,
-            "regions": "us",
-            "markets": "h2h",
-            "oddsFormat": "american"
-        }
+        labels = spec['labels']
+        for props_data in props_payloads:
+            if not parse_odds_payload(props_data, labels, True, outcomes):
+                print(f"No bookmakers found for {props_data.get('id')}")
         
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params, timeout=15) as resp:
-                    if resp.status != 200:
-                        continue
-                    events = await resp.json()
-                    
-                    for event in events:
-                        if 'bookmakers' in event and event['bookmakers']:
-                            for bookmaker in event['bookmakers']:
-                                if 'markets' in bookmaker:
-                                    for market in bookmaker['markets']:
-                                        if 'outcomes' in market:
-                                            for outcome in market['outcomes']:
-                                                team_name = outcome.get('name', 'Unknown')
-                                                price = outcome.get('price', 0)
-                                                probability = odds_to_probability(price)
-                                                
-                                                picks.append({
-                                                    'player': team_name,
-                                                    'prop_type': 'To Win',
-                                                    'line': 1,  # Just for display
-                                                    'pick': 'Over',  # Use Over so embed works
-                                                    'odds': price,
-                                                    'probability': round(probability, 1),
-                                                    'bookmaker': bookmaker['title'],
-                                                    'game': f"{event['home_team']} vs {event['away_team']}"
-                                                })
-                    
-                    if picks:  # If we found games, stop searching other leagues
-                        break
-                        
-        except Exception as e:
-            print(f"Error fetching {league}: {e}")
-            continue
-    
-    return picks
+        print(f"Total {spec['name']} picks collected: {len(outcomes)}")
+    except Exception as e:
+        print(f"Error fetching {spec['name']}: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+    return outcomes
 
-async def fetch_generic_sport(sport_key, sport_name):
-    """Generic fetch for sports without player props"""
-    picks = []
-    url = f"https://api.the-odds-api.com/v4/sports/{sport_key}/odds"
+async def fetch_h2h_outcomes(sport, spec):
+    """Moneylines: sweep every league key for the sport at once (None if every league failed)"""
+    outcomes = []
+    league_keys = spec['sport_keys']
     
     params = {
         "apiKey": ODDS_API_KEY,
@@ -1083,148 +2465,449 @@ async def fetch_generic_sport(sport_key, sport_name):
         "oddsFormat": "american"
     }
     
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params, timeout=15) as resp:
-                if resp.status != 200:
-                    print(f"{sport_name} API returned status {resp.status}")
-                    return picks
-                events = await resp.json()
-                
-                for event in events:
-                    if 'bookmakers' in event and event['bookmakers']:
-                        for bookmaker in event['bookmakers']:
-                            if 'markets' in bookmaker:
-                                for market in bookmaker['markets']:
-                                    if 'outcomes' in market:
-                                        for outcome in market['outcomes']:
-                                            team_name = outcome.get('name', 'Unknown')
-                                            price = outcome.get('price', 0)
-                                            probability = odds_to_probability(price)
-                                            
-                                            picks.append({
-                                                'player': team_name,
-                                                'prop_type': 'To Win',
-                                                'line': 1,
-                                                'pick': 'Over',  # Use Over so embed works
-                                                'odds': price,
-                                                'probability': round(probability, 1),
-                                                'bookmaker': bookmaker['title'],
-                                                'game': f"{event['home_team']} vs {event['away_team']}"
-                                            })
-    except Exception as e:
-        print(f"Error fetching {sport_name}: {e}")
-    return picks
+    if spec.get('first_league_only'):
+        return await fetch_first_league_outcomes(sport, spec, params)
+    
+    league_events = await fetch_league_sweep(sport, league_keys, params, spec['name'])
+    if not league_events:
+        print(f"❌ Every {spec['name']} league request failed")
+        return None
+    
+    # A partly failed sweep that found no games can't prove the board is empty
+    seen_events = [event for events in league_events.values() for event in events]
+    if seen_events or len(league_events) == len(league_keys):
+        note_next_commence(sport, seen_events)
+    
+    # Merge in registry order so the output is stable
+    labels = spec['labels']
+    for league in league_keys:
+        for event in league_events.get(league, []):
+            parse_odds_payload(event, labels, False, outcomes)
+    
+    print(f"{spec['name']} returning {len(outcomes)} raw picks")
+    return outcomes
 
-async def aggregate_picks(sport):
-    all_picks = []
+async def fetch_first_league_outcomes(sport, spec, params):
+    """Moneylines for the first league (in priority order) that has games
     
-    # Call appropriate fetch function
-    if sport == 'nba':
-        all_picks = await fetch_nba_props()
-    elif sport == 'nfl':
-        all_picks = await fetch_nfl_props()
-    elif sport == 'mlb':
-        all_picks = await fetch_mlb_props()
-    elif sport == 'nhl':
-        all_picks = await fetch_nhl_props()
-    elif sport == 'soccer':
-        all_picks = await fetch_soccer_props()
-    elif sport == 'tennis':
-        all_picks = await fetch_tennis_props()
-    elif sport == 'mma':
-        all_picks = await fetch_generic_sport('mma_mixed_martial_arts', 'MMA')
-    elif sport == 'csgo':
-        all_picks = await fetch_generic_sport('esports_csgo', 'CSGO')
-    elif sport == 'cs2':
-        all_picks = await fetch_generic_sport('esports_csgo', 'CS2')
-    elif sport == 'lol':
-        all_picks = await fetch_generic_sport('esports_lol', 'LoL')
-    elif sport == 'dota2':
-        all_picks = await fetch_generic_sport('esports_dota2', 'Dota2')
-    
-    if not all_picks:
+    Leagues are tried one at a time rather than swept: each /odds call costs a
+    credit, so this spends 1 credit when the top league has a slate instead of
+    one per league.
+    """
+    outcomes = []
+    seen_events = []
+    answered = False
+    failed = False
+    labels = spec['labels']
+    
+    for league in spec['sport_keys']:
+        league_events = await fetch_league_sweep(sport, [league], params, spec['name'])
+        if league not in league_events:
+            failed = True
+            continue
+        answered = True
+        events = league_events[league]
+        seen_events.extend(events)
+        
+        for event in events:
+            parse_odds_payload(event, labels, False, outcomes)
+        
+        if outcomes:
+            break
+    
+    if not answered:
+        print(f"❌ Every {spec['name']} league request failed")
+        return None
+    if seen_events or not failed:
+        note_next_commence(sport, seen_events)
+    print(f"{spec['name']} returning {len(outcomes)} raw picks")
+    return outcomes
+
+async def fetch_sport_outcomes(sport):
+    """Fetch raw per-bookmaker outcomes for any sport in SPORT_REGISTRY
+    
+    Returns None when the upstream fetch failed, so callers can keep what
+    they have instead of treating an outage as an empty slate.
+    """
+    spec = get_sport_spec(sport)
+    if not spec:
         return []
     
-    grouped = defaultdict(list)
-    for pick in all_picks:
-        key = f"{pick['player']}_{pick['prop_type']}_{pick['pick']}"
-        grouped[key].append(pick)
+    credits_before = odds_api_spend_by_sport[sport]
+    try:
+        if spec['mode'] == 'props':
+            return await fetch_props_outcomes(sport, spec)
+        return await fetch_h2h_outcomes(sport, spec)
+    finally:
+        # Remember what a full fetch of this sport costs for budget checks
+        last_fetch_cost[sport] = odds_api_spend_by_sport[sport] - credits_before
+        flush_quota_ledger()
+
+async def build_odds_table(sport):
+    """Fetch a sport's outcomes into a columnar OddsTable (None if the fetch failed)"""
+    outcomes = await fetch_sport_outcomes(sport)
+    return None if outcomes is None else OddsTable(outcomes)
+
+async def aggregate_picks(sport, table=None):
+    """Cross-book consensus picks for a sport (pass the snapshot's OddsTable to reuse it)"""
+    if table is None:
+        table = await build_odds_table(sport)
+    
+    if table is None or not len(table):
+        return []
     
     consensus_picks = []
-    for key, picks in grouped.items():
-        if len(picks) >= 2:
-            avg_probability = sum(p['probability'] for p in picks) / len(picks)
-            avg_odds = sum(p['odds'] for p in picks) / len(picks)
+    needs_stats = []  # NBA over/under picks to grade against real game logs
+    groups = table.consensus(min_sources=2)
+    
+    # Score the whole snapshot once so value/model/sharp/parlay don't redo odds math per command
+    avg_probabilities = [round(probability, 1) for probability in groups['mean_probability'].tolist()]
+    avg_odds_list = [round(odds) for odds in groups['mean_price'].tolist()]
+    decimals = groups['mean_decimal']
+    
+    # True edge: no-vig probability against the best price any book is offering
+    fair = groups['fair_probability']
+    best_row = groups['best_row']
+    best_odds = table.price[best_row]
+    edges = (fair - implied_probability(best_odds)) * 100
+    evs = expected_value(fair, best_odds)
+    best_books = [table.books[code] for code in table.book_code[best_row].tolist()]
+    
+    rows = zip(groups['first_row'].tolist(), groups['sources'].tolist(), avg_probabilities, avg_odds_list,
+               decimals.tolist(), (fair * 100).tolist(), best_odds.tolist(), best_books, edges.tolist(), evs.tolist(),
+               groups['book_codes'], groups['modal_line'].tolist(), groups['line_spread'].tolist(), groups['line_agreement'].tolist())
+    for (row, count, avg_probability, avg_odds, decimal_odds, fair_probability, best_price, best_book, edge, ev,
+         books, modal_line, line_spread, line_agreement) in rows:
+        first = table.outcomes[row]
+        pick_data = ConsensusPick(
+            sport,
+            first.player,
+            first.prop_type,
+            first.line,
+            first.pick,
+            count,
+            avg_probability,
+            avg_odds,
+            [table.books[code] for code in books.tolist()],
+            first.game,
+            decimal_odds=decimal_odds,
+            fair_probability=round(fair_probability, 1),
+            best_odds=round(best_price),
+            best_book=best_book,
+            edge=edge,
+            ev=ev,
+            modal_line=modal_line,
+            line_spread=round(line_spread, 2),
+            line_agreement=round(line_agreement),
+            event_id=first.event_id
+        )
+        
+        # === PRIZEPICKS UNDER RULES (NBA) ===
+        # PrizePicks doesn't allow UNDER on low-count props
+        if sport == 'nba' and first.pick.lower() in ['under', 'less']:
+            prop_type = first.prop_type
+            line = first.line
             
-            pick_data = {
-                'player': picks[0]['player'],
-                'prop_type': picks[0]['prop_type'],
-                'line': picks[0]['line'],
-                'pick': picks[0]['pick'],
-                'sources': len(picks),
-                'avg_probability': round(avg_probability, 1),
-                'avg_odds': round(avg_odds),
-                'bookmakers': [p['bookmaker'] for p in picks],
-                'game': picks[0]['game']
-            }
+            # These props are MORE ONLY on PrizePicks (UNDER not available)
+            more_only_rules = [
+                ('Points', [1.5, 2.5]),
+                ('Rebounds', [1.5, 2.5]),
+                ('Assists', [1.5, 2.5]),
+                ('3-Pointers', [0.5, 1.5, 2.5]),
+                ('Blocks', [0.5, 1.5, 2.5]),
+                ('Steals', [0.5, 1.5, 2.5]),
+                ('Turnovers', [0.5, 1.5, 2.5]),
+            ]
             
-            # === PRIZEPICKS UNDER RULES (NBA) ===
-            # PrizePicks doesn't allow UNDER on low-count props
-            if sport == 'nba' and picks[0]['pick'].lower() in ['under', 'less']:
-                prop_type = picks[0]['prop_type']
-                line = picks[0]['line']
-                
-                # These props are MORE ONLY on PrizePicks (UNDER not available)
-                more_only_rules = [
-                    ('Points', [1.5, 2.5]),
-                    ('Rebounds', [1.5, 2.5]),
-                    ('Assists', [1.5, 2.5]),
-                    ('3-Pointers', [0.5, 1.5, 2.5]),
-                    ('Blocks', [0.5, 1.5, 2.5]),
-                    ('Steals', [0.5, 1.5, 2.5]),
-                    ('Turnovers', [0.5, 1.5, 2.5]),
-                ]
-                
-                # Check if this pick violates PrizePicks rules
-                skip_pick = False
-                for prop_name, blocked_lines in more_only_rules:
-                    if prop_name.lower() in prop_type.lower() or prop_type.lower() in prop_name.lower():
-                        if line in blocked_lines:
-                            print(f"❌ FILTERED: {picks[0]['player']} UNDER {line} {prop_type} (PrizePicks MORE only)")
-                            skip_pick = True
-                            break
-                
-                if skip_pick:
-                    continue  # Don't add this pick
+            # Check if this pick violates PrizePicks rules
+            skip_pick = False
+            for prop_name, blocked_lines in more_only_rules:
+                if prop_name.lower() in prop_type.lower() or prop_type.lower() in prop_name.lower():
+                    if line in blocked_lines:
+                        print(f"❌ FILTERED: {first.player} UNDER {line} {prop_type} (PrizePicks MORE only)")
+                        skip_pick = True
+                        break
             
-            # FOR NBA: Get real stats and filter
-            if sport == 'nba' and picks[0]['pick'].lower() in ['over', 'under']:
-                player_name = picks[0]['player']
-                prop_type = picks[0]['prop_type']
-                line = picks[0]['line']
-                pick_direction = picks[0]['pick']
-                
-                stats = await get_nba_player_stats(player_name, prop_type, line, pick_direction)
-                
-                if stats:
-                    # Add real stats to pick
-                    pick_data['hit_rate'] = stats['hit_rate']
-                    pick_data['player_avg'] = stats['average']
-                    pick_data['last_5_avg'] = stats['last_5_avg']
-                    pick_data['games_analyzed'] = stats['games_analyzed']
-                    
-                    # Filter out picks with <60% hit rate
-                    if not stats['is_good_pick']:
-                        direction = "OVER" if pick_direction.lower() == 'over' else "UNDER"
-                        print(f"❌ Filtered {player_name} {prop_type} {direction} {line} - Only {stats['hit_rate']}% hit rate (avg: {stats['average']})")
-                        continue
+            if skip_pick:
+                continue  # Don't add this pick
+        
+        # FOR NBA: Get real stats and filter (graded in one batch below)
+        if sport == 'nba' and first.pick.lower() in ['over', 'under']:
+            needs_stats.append(pick_data)
+        
+        consensus_picks.append(pick_data)
+    
+    if needs_stats:
+        filtered = set()
+        for pick_data, stats in zip(needs_stats, await enrich_nba_picks(needs_stats)):
+            if not stats:
+                continue
             
-            consensus_picks.append(pick_data)
+            # Add real stats to pick
+            pick_data.hit_rate = stats['hit_rate']
+            pick_data.player_avg = stats['average']
+            pick_data.last_5_avg = stats['last_5_avg']
+            pick_data.games_analyzed = stats['games_analyzed']
+            
+            # Filter out picks with <60% hit rate
+            if not stats['is_good_pick']:
+                direction = "OVER" if pick_data.pick.lower() == 'over' else "UNDER"
+                print(f"❌ Filtered {pick_data.player} {pick_data.prop_type} {direction} {pick_data.line} - Only {stats['hit_rate']}% hit rate (avg: {stats['average']})")
+                filtered.add(id(pick_data))
+        
+        consensus_picks = [p for p in consensus_picks if id(p) not in filtered]
     
-    consensus_picks.sort(key=lambda x: (x.get('hit_rate', 0), x['sources'], x['avg_probability']), reverse=True)
+    consensus_picks.sort(key=lambda x: (x.hit_rate or 0, x.sources, x.avg_probability), reverse=True)
     return consensus_picks
 
+# === LEADERBOARDS ===
+# Ranked views for locks/potd/parlay/value/sharp/model are materialized when a
+# snapshot is installed, so those commands read a short top-K list instead of
+# filtering and sorting every sport's picks on each call. Each view keeps its
+# top LEADERBOARD_SIZE picks plus how many picks qualified in total.
+
+LEADERBOARD_VIEWS = {  # view -> (qualifies, ranking key); ties keep aggregate_picks order
+    'consensus': (lambda p: True, lambda p: (p.sources, p.avg_probability)),
+    'locks': (lambda p: p.sources >= 3, lambda p: (p.sources, p.avg_probability)),
+    'parlay': (lambda p: p.sources >= 2, lambda p: (p.sources, p.fair_probability)),
+    'sharp': (lambda p: p.sources >= 3, lambda p: (p.sources, p.fair_probability)),
+    'value': (lambda p: p.edge > VALUE_MIN_EDGE, lambda p: round(p.edge, 1)),
+    'model': (lambda p: p.edge > MODEL_MIN_EDGE, lambda p: p.edge),
+}
+
+sport_leaderboards = {}  # sport -> {view: (top picks, qualifying count)}
+cross_sport_leaderboards = {}  # view -> (top picks, qualifying count) over every sport
+
+def build_sport_leaderboards(picks):
+    """Rank one sport's picks into every view with a heap-based top-K"""
+    boards = {}
+    for view, (qualifies, rank) in LEADERBOARD_VIEWS.items():
+        eligible = [p for p in picks if qualifies(p)]
+        boards[view] = (heapq.nlargest(LEADERBOARD_SIZE, eligible, key=rank), len(eligible))
+    return boards
+
+def merge_leaderboards(sports):
+    """Cross-sport views from the per-sport ones (each sport's top K holds its share of the overall top K)"""
+    boards = {}
+    for view, (_, rank) in LEADERBOARD_VIEWS.items():
+        per_sport = [sport_leaderboards[s][view] for s in sports if s in sport_leaderboards]
+        candidates = [p for top, _ in per_sport for p in top]
+        boards[view] = (heapq.nlargest(LEADERBOARD_SIZE, candidates, key=rank), sum(count for _, count in per_sport))
+    return boards
+
+def update_leaderboards(sport, picks):
+    """Swap in a sport's new views and rebuild the cross-sport ones
+    
+    Runs synchronously, so no command can observe the sport's new views
+    alongside stale cross-sport ones.
+    """
+    global cross_sport_leaderboards
+    sport_leaderboards[sport] = build_sport_leaderboards(picks)
+    cross_sport_leaderboards = merge_leaderboards(picks_data)
+
+def leaderboard(view, sport=None):
+    """(top picks, qualifying count) for a view - one sport, or all sports when sport is None"""
+    boards = sport_leaderboards.get(sport, {}) if sport else cross_sport_leaderboards
+    return boards.get(view, ([], 0))
+
+# === SINGLE-FLIGHT REFRESH ===
+# When several commands ask for the same cold sport at once, they all join
+# one aggregation instead of each running their own upstream fetch.
+
+_inflight_refreshes = {}  # sport -> asyncio.Task running aggregate_picks
+snapshot_times = {}  # sport -> time.time() the current picks_data[sport] was installed
+odds_tables = {}  # sport -> OddsTable the current picks_data[sport] was built from
+
+def install_snapshot(sport, picks, table=None):
+    """Publish a freshly aggregated set of consensus picks for a sport"""
+    picks_data[sport] = picks
+    if table is not None:
+        odds_tables[sport] = table
+        best_line_index[sport] = BestLineIndex(table)
+        opportunities[sport] = scan_opportunities(sport, best_line_index[sport])
+        db.submit(record_odds_history, sport, table)
+    player_index[sport] = PlayerIndex(picks, table.players if table is not None else ())
+    update_leaderboards(sport, picks)
+    snapshot_times[sport] = time.time()
+    _refresh_failures.pop(sport, None)
+    schedule_refresh(sport, time.time() + next_refresh_interval(sport))
+
+async def _run_refresh(sport):
+    table = await build_odds_table(sport)
+    if table is None:
+        # Upstream failed - keep serving the last good snapshot and retry soon
+        print(f"⚠️ {sport.upper()} fetch failed - keeping the previous snapshot")
+        schedule_retry(sport)
+        return picks_data[sport]
+    
+    picks = await aggregate_picks(sport, table)
+    install_snapshot(sport, picks, table)
+    return picks
+
+async def refresh_sport(sport):
+    """Aggregate a sport, joining the in-flight aggregation if one is already running"""
+    task = _inflight_refreshes.get(sport)
+    if task is None:
+        task = asyncio.create_task(_run_refresh(sport))
+        _inflight_refreshes[sport] = task
+        
+        def forget(done_task):
+            if _inflight_refreshes.get(sport) is done_task:
+                del _inflight_refreshes[sport]
+        task.add_done_callback(forget)
+    
+    # Shield so one caller giving up doesn't cancel the fetch for everyone else
+    return await asyncio.shield(task)
+
+# === SNAPSHOT FRESHNESS ===
+# Stale-while-revalidate: a fresh snapshot is served as-is. An older but
+# still usable one is served immediately while a background refresh runs.
+# Callers only block on a fetch when there is no usable snapshot.
+
+_background_refreshes = set()  # Keep references so revalidation tasks aren't garbage collected
+
+def snapshot_age(sport):
+    """Seconds since the sport's snapshot was installed, or None if there isn't one"""
+    fetched_at = snapshot_times.get(sport)
+    return None if fetched_at is None else time.time() - fetched_at
+
+def snapshot_is_usable(sport):
+    age = snapshot_age(sport)
+    return age is not None and age <= SNAPSHOT_MAX_STALE_SECONDS
+
+def revalidate_in_background(sport):
+    """Start a background refresh unless one is running or the API budget says no"""
+    if sport in _inflight_refreshes or not quota_allows_cold_fetch(sport):
+        return
+    
+    task = asyncio.create_task(refresh_sport(sport))
+    _background_refreshes.add(task)
+    
+    def done(finished):
+        _background_refreshes.discard(finished)
+        if not finished.cancelled() and finished.exception():
+            print(f"Error revalidating {sport}: {finished.exception()}")
+    task.add_done_callback(done)
+
+async def get_snapshot(sport):
+    """Return (picks, age_seconds) for a sport following the freshness policy"""
+    age = snapshot_age(sport)
+    
+    if snapshot_is_usable(sport):
+        if age > SNAPSHOT_FRESH_SECONDS:
+            revalidate_in_background(sport)
+        return picks_data[sport], age
+    
+    # Too old (or missing) - block on a fetch when the budget allows it
+    if quota_allows_cold_fetch(sport):
+        picks = await refresh_sport(sport)
+        return picks, snapshot_age(sport)
+    
+    return picks_data[sport], age
+
+def format_snapshot_age(age):
+    """Human-readable snapshot age for embeds"""
+    if age is None:
+        return "no data yet"
+    if age < 60:
+        return "just updated"
+    minutes = int(age // 60)
+    if minutes < 60:
+        return f"updated {minutes}m ago"
+    return f"updated {minutes // 60}h {minutes % 60}m ago"
+
+# === REFRESH SCHEDULER ===
+# Every registered sport is refreshed on its own cadence. The cadence depends
+# on how soon its next game starts: often near game time, rarely when nothing
+# is on the board. Due times sit in a heap. A user-triggered refresh can move
+# a sport to the front and wake the loop early.
+
+sport_next_commence = {}  # sport -> epoch seconds of the next (or in-progress) game, None if no events
+_refresh_failures = {}  # sport -> consecutive failed refreshes (cleared when a snapshot installs)
+_refresh_heap = []  # (due_at, seq, sport)
+_refresh_due = {}  # sport -> current due_at (older heap entries for the sport are stale)
+_refresh_seq = 0
+_refresh_wakeup = asyncio.Event()
+
+def note_next_commence(sport, events):
+    """Remember when the sport's next game starts, from an Odds API event list"""
+    now = time.time()
+    starts = []
+    for event in events:
+        commence = event.get('commence_time')
+        if not commence:
+            continue
+        try:
+            start = datetime.fromisoformat(commence.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            continue
+        # Games that started in the last few hours are still live
+        if start >= now - REFRESH_LIVE_WINDOW_SECONDS:
+            starts.append(start)
+    sport_next_commence[sport] = min(starts) if starts else None
+
+def scheduled_sports():
+    """Sports the scheduler owns (aliases share their target's data)"""
+    return [sport for sport, spec in SPORT_REGISTRY.items() if 'alias' not in spec]
+
+def next_refresh_interval(sport):
+    """Seconds until this sport should be refreshed again"""
+    if sport not in sport_next_commence:
+        interval = REFRESH_CADENCE[-1][1]  # Never fetched successfully - try again soonish
+    elif sport_next_commence[sport] is None:
+        interval = REFRESH_NO_EVENTS_SECONDS
+    else:
+        starts_in = max(sport_next_commence[sport] - time.time(), 0)
+        interval = REFRESH_IDLE_SECONDS
+        for within, every in REFRESH_CADENCE:
+            if starts_in <= within:
+                interval = every
+                break
+    
+    interval *= quota_interval_multiplier()
+    return interval * random.uniform(1 - REFRESH_JITTER, 1 + REFRESH_JITTER)
+
+def next_retry_interval(sport):
+    """Seconds until a failed refresh is retried - short, backing off on repeat failures"""
+    failures = _refresh_failures.get(sport, 1)
+    interval = min(REFRESH_RETRY_SECONDS * 2 ** (failures - 1), REFRESH_RETRY_MAX_SECONDS)
+    interval *= quota_interval_multiplier()
+    return interval * random.uniform(1 - REFRESH_JITTER, 1 + REFRESH_JITTER)
+
+def schedule_retry(sport):
+    """Count a failed refresh and retry it on the backoff instead of the normal cadence"""
+    _refresh_failures[sport] = _refresh_failures.get(sport, 0) + 1
+    schedule_refresh(sport, time.time() + next_retry_interval(sport))
+
+def schedule_refresh(sport, due_at):
+    """(Re)schedule a sport; replaces any earlier due time"""
+    global _refresh_seq
+    if sport not in SPORT_REGISTRY or 'alias' in SPORT_REGISTRY[sport]:
+        return
+    _refresh_seq += 1
+    _refresh_due[sport] = due_at
+    heapq.heappush(_refresh_heap, (due_at, _refresh_seq, sport))
+
+def request_refresh(sport):
+    """Move a sport to the front of the queue and wake the scheduler"""
+    schedule_refresh(sport, time.time())
+    _refresh_wakeup.set()
+
+def pop_due_refresh():
+    """Return (sport, None) if one is due now, else (None, seconds to wait)"""
+    while _refresh_heap:
+        due_at, _, sport = _refresh_heap[0]
+        if _refresh_due.get(sport) != due_at:
+            heapq.heappop(_refresh_heap)  # Superseded by a later reschedule
+            continue
+        wait = due_at - time.time()
+        if wait > 0:
+            return None, wait
+        heapq.heappop(_refresh_heap)
+        del _refresh_due[sport]
+        return sport, None
+    return None, REFRESH_IDLE_SECONDS
+
 def create_picks_embed(sport, picks):
     emoji = SPORT_EMOJIS.get(sport, '🎯')
     
@@ -1239,45 +2922,45 @@ def create_picks_embed(sport, picks):
     )
     
     # Separate by direction
-    more_picks = [p for p in picks if 'over' in p['pick'].lower()]
-    less_picks = [p for p in picks if 'under' in p['pick'].lower()]
+    more_picks = [p for p in picks if 'over' in p.pick.lower()]
+    less_picks = [p for p in picks if 'under' in p.pick.lower()]
     
     # Sort by confidence
-    more_picks.sort(key=lambda x: (x['sources'], x['avg_probability']), reverse=True)
-    less_picks.sort(key=lambda x: (x['sources'], x['avg_probability']), reverse=True)
+    more_picks.sort(key=lambda x: (x.sources, x.avg_probability), reverse=True)
+    less_picks.sort(key=lambda x: (x.sources, x.avg_probability), reverse=True)
     
     # MORE picks section
     if more_picks:
         text = ""
         for i, pick in enumerate(more_picks[:8], 1):
-            odds_str = f"+{pick['avg_odds']}" if pick['avg_odds'] > 0 else str(pick['avg_odds'])
+            odds_str = f"+{pick.avg_odds}" if pick.avg_odds > 0 else str(pick.avg_odds)
             
             # Add hit rate if available (NBA with real stats)
             hit_rate_str = ""
-            if 'hit_rate' in pick:
-                hit_rate_str = f" • ✅ {pick['hit_rate']}% hit rate (last {pick['games_analyzed']} games)"
+            if pick.hit_rate is not None:
+                hit_rate_str = f" • ✅ {pick.hit_rate}% hit rate (last {pick.games_analyzed} games)"
             
-            text += f"**{i}. {pick['player']}**\n"
-            text += f"🎯 MORE {pick['line']} {pick['prop_type']}\n"
-            text += f"📊 {pick['sources']} books • {pick['avg_probability']}% • {odds_str}{hit_rate_str}\n"
-            text += f"🏟️ {pick['game']}\n\n"
+            text += f"**{i}. {pick.player}**\n"
+            text += f"🎯 MORE {pick.line} {pick.prop_type}\n"
+            text += f"📊 {pick.sources} books • {pick.avg_probability}% • {odds_str}{hit_rate_str}\n"
+            text += f"🏟️ {pick.game}\n\n"
         embed.add_field(name="🔥 MORE PICKS (Always Available)", value=text, inline=False)
     
     # LESS picks section - only show if API provides them
     if less_picks:
         text = ""
         for i, pick in enumerate(less_picks[:8], 1):
-            odds_str = f"+{pick['avg_odds']}" if pick['avg_odds'] > 0 else str(pick['avg_odds'])
+            odds_str = f"+{pick.avg_odds}" if pick.avg_odds > 0 else str(pick.avg_odds)
             
             # Show actual UNDER hit rate (already calculated correctly)
             hit_rate_str = ""
-            if 'hit_rate' in pick:
-                hit_rate_str = f" • ✅ {pick['hit_rate']}% hit rate (last {pick['games_analyzed']} games)"
+            if pick.hit_rate is not None:
+                hit_rate_str = f" • ✅ {pick.hit_rate}% hit rate (last {pick.games_analyzed} games)"
             
-            text += f"**{i}. {pick['player']}**\n"
-            text += f"🎯 LESS {pick['line']} {pick['prop_type']}\n"
-            text += f"📊 {pick['sources']} books • {pick['avg_probability']}% • {odds_str}{hit_rate_str}\n"
-            text += f"🏟️ {pick['game']}\n\n"
+            text += f"**{i}. {pick.player}**\n"
+            text += f"🎯 LESS {pick.line} {pick.prop_type}\n"
+            text += f"📊 {pick.sources} books • {pick.avg_probability}% • {odds_str}{hit_rate_str}\n"
+            text += f"🏟️ {pick.game}\n\n"
         embed.add_field(name="❄️ LESS PICKS (Check PrizePicks Availability)", value=text, inline=False)
     
     embed.set_footer(text=f"FTC Picks • {sport.upper()} • Showing what bookmakers offer")
@@ -1287,7 +2970,7 @@ def create_free_picks_embed(sport, picks):
     """Create embed for free picks (lower quality picks)"""
     emoji = SPORT_EMOJIS.get(sport, '🎯')
     
-    free_picks = [p for p in picks if p['sources'] == 2][:3]
+    free_picks = [p for p in picks if p.sources == 2][:3]
     
     embed = discord.Embed(
         title=f"{emoji} FREE {sport.upper()} PICKS - {datetime.now().strftime('%b %d, %Y')}",
@@ -1299,11 +2982,11 @@ def create_free_picks_embed(sport, picks):
     if free_picks:
         text = ""
         for i, pick in enumerate(free_picks, 1):
-            odds_str = f"+{pick['avg_odds']}" if pick['avg_odds'] > 0 else str(pick['avg_odds'])
+            odds_str = f"+{pick.avg_odds}" if pick.avg_odds > 0 else str(pick.avg_odds)
             
-            text += f"**{i}.** `{pick['player']}`\n"
-            text += f"   ╰ **{pick['pick']}** `{pick['line']}` {pick['prop_type']}\n"
-            text += f"   ╰ `{pick['sources']}` books | `{odds_str}` odds\n\n"
+            text += f"**{i}.** `{pick.player}`\n"
+            text += f"   ╰ **{pick.pick}** `{pick.line}` {pick.prop_type}\n"
+            text += f"   ╰ `{pick.sources}` books | `{odds_str}` odds\n\n"
         
         embed.add_field(name="Today's Free Picks", value=text, inline=False)
     else:
@@ -1322,27 +3005,44 @@ def create_free_picks_embed(sport, picks):
 async def refresh_picks():
     await bot.wait_until_ready()
     
+    # First pass: every sport, staggered
+    now = time.time()
+    for i, sport in enumerate(scheduled_sports()):
+        if sport not in _refresh_due:
+            schedule_refresh(sport, now + i * REFRESH_STARTUP_STAGGER_SECONDS * random.uniform(1 - REFRESH_JITTER, 1 + REFRESH_JITTER))
+    
     while not bot.is_closed():
+        sport, wait = pop_due_refresh()
+        if sport is None:
+            # Sleep until the next due sport, or until a refresh request pre-empts the queue
+            _refresh_wakeup.clear()
+            try:
+                await asyncio.wait_for(_refresh_wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        
+        # Ration background refreshes the same way as command fetches
+        if not quota_allows_cold_fetch(sport):
+            print(f"⏳ Skipping {sport.upper()} refresh - API budget is rationed")
+            schedule_refresh(sport, time.time() + next_refresh_interval(sport))
+            continue
+        
         try:
-            print("Refreshing picks...")
-            picks_data['nba'] = await aggregate_picks('nba')
+            print(f"Refreshing {sport.upper()} picks...")
+            await refresh_sport(sport)  # Reschedules itself via install_snapshot
         except Exception as e:
-            print(f"Error refreshing: {e}")
-        
-        await asyncio.sleep(7200)
+            print(f"Error refreshing {sport}: {e}")
+            schedule_retry(sport)
 
 async def check_expired_subscriptions():
     await bot.wait_until_ready()
     
     while not bot.is_closed():
         try:
-            conn = sqlite3.connect('premium_users.db')
-            c = conn.cursor()
-            c.execute("SELECT user_id, subscription_end FROM premium_users WHERE status = 'active'")
-            users = c.fetchall()
-            conn.close()
+            users = await db.list_subscriptions('active')
             
-            for user_id, end_date in users:
+            for user_id, _, end_date in users:
                 if datetime.now() > datetime.fromisoformat(end_date):
                     for guild in bot.guilds:
                         member = guild.get_member(user_id)
@@ -1356,11 +3056,8 @@ async def check_expired_subscriptions():
                                 except:
                                     pass
                     
-                    conn = sqlite3.connect('premium_users.db')
-                    c = conn.cursor()
-                    c.execute("UPDATE premium_users SET status = 'expired' WHERE user_id = ?", (user_id,))
-                    conn.commit()
-                    conn.close()
+                    await db.set_subscription_status(user_id, 'expired')
+                    invalidate_entitlement(user_id)
                     
                     print(f"Expired subscription for user {user_id}")
         
@@ -1381,6 +3078,7 @@ async def on_ready():
     
     bot.loop.create_task(refresh_picks())
     bot.loop.create_task(check_expired_subscriptions())
+    bot.loop.create_task(flush_entitlements())
 
 @bot.event
 async def on_command_error(ctx, error):
@@ -1562,8 +3260,10 @@ async def freepicks(ctx, sport='nba'):
     picks = picks_data.get(sport, [])
     
     if not picks:
+        if await refuse_cold_fetch(ctx, sport):
+            return
         await ctx.send(f"⏳ Fetching fresh picks...")
-        picks_data[sport] = await aggregate_picks(sport)
+        await refresh_sport(sport)
         picks = picks_data[sport]
     
     if not picks:
@@ -1760,49 +3460,40 @@ async def trial(ctx):
         await ctx.send("❌ Free trials are currently disabled.")
         return
     
-    conn = sqlite3.connect('premium_users.db')
-    c = conn.cursor()
-    c.execute("SELECT trial_used, status, subscription_end FROM premium_users WHERE user_id = ?", (ctx.author.id,))
-    result = c.fetchone()
+    result = await db.get_subscription(ctx.author.id)
     
     if result:
-        if result[0] == 1:
+        if result[4] == 1:
             embed = discord.Embed(
                 title="❌ Trial Already Used",
                 description="You've already used your free trial.\n\nTo get full access, use `!subscribe`",
                 color=0xe74c3c
             )
             await ctx.send(embed=embed)
-            conn.close()
             return
         
-        if result[1] == 'active':
-            end_date = datetime.fromisoformat(result[2])
+        if result[2] == 'active':
+            end_date = datetime.fromisoformat(result[1])
             embed = discord.Embed(
                 title="❌ Already Subscribed",
                 description=f"You already have an active subscription!\n\n**Expires:** {end_date.strftime('%B %d, %Y')}",
                 color=0xe74c3c
             )
             await ctx.send(embed=embed)
-            conn.close()
             return
     
     start_date = datetime.now()
     end_date = start_date + timedelta(days=FREE_TRIAL_DAYS)
     
-    c.execute("""INSERT OR REPLACE INTO premium_users 
-                 (user_id, username, subscription_start, subscription_end, status, trial_used, payment_method)
-                 VALUES (?, ?, ?, ?, 'active', 1, 'trial')""",
-              (ctx.author.id, str(ctx.author), start_date.isoformat(), end_date.isoformat()))
-    conn.commit()
-    conn.close()
+    await db.save_subscription(ctx.author.id, str(ctx.author), start_date, end_date, 'trial', trial_used=1)
+    invalidate_entitlement(ctx.author.id)
     
     premium_role = ctx.guild.get_role(PREMIUM_ROLE_ID)
     await ctx.author.add_roles(premium_role)
     
     embed = discord.Embed(
         title="🎁 Free Trial Activated!",
-        description=f"Welcome to **FTC Picks Premium**!\n\nYou now have **{FREE_TRIAL_DAYS} days** of access!\n\n⏰ **Note:** Trial users can use pick commands once every **3 hours**.",
+        description=f"Welcome to **FTC Picks Premium**!\n\nYou now have **{FREE_TRIAL_DAYS} days** of access!\n\n⏰ **Note:** Trial users get **{describe_rate_limit('trial')}** on pick commands.",
         color=0x2ecc71
     )
     embed.add_field(name="Trial Ends", value=end_date.strftime('%B %d, %Y at %I:%M %p'), inline=False)
@@ -1813,7 +3504,7 @@ async def trial(ctx):
         ✅ Use `!locks` for high confidence picks
         ✅ Use `!potd` for pick of the day
         
-        Want 2 picks per hour? Subscribe at: {WEBSITE_URL}
+        Want {describe_rate_limit('premium')}? Subscribe at: {WEBSITE_URL}
         """,
         inline=False
     )
@@ -1826,16 +3517,12 @@ async def trial(ctx):
 async def resettrial(ctx, member: discord.Member):
     """Reset someone's trial (OWNER ONLY)"""
     
-    conn = sqlite3.connect('premium_users.db')
-    c = conn.cursor()
-    
     premium_role = ctx.guild.get_role(PREMIUM_ROLE_ID)
     if premium_role in member.roles:
         await member.remove_roles(premium_role)
     
-    c.execute("DELETE FROM premium_users WHERE user_id = ?", (member.id,))
-    conn.commit()
-    conn.close()
+    await db.delete_subscription(member.id)
+    invalidate_entitlement(member.id)
     
     embed = discord.Embed(
         title="✅ Trial Reset",
@@ -1854,15 +3541,11 @@ async def resettrial(ctx, member: discord.Member):
 async def subscribe(ctx):
     """View subscription info and payment methods"""
     
-    conn = sqlite3.connect('premium_users.db')
-    c = conn.cursor()
-    c.execute("SELECT subscription_end, status, trial_used FROM premium_users WHERE user_id = ?", (ctx.author.id,))
-    result = c.fetchone()
-    conn.close()
+    result = await db.get_subscription(ctx.author.id)
     
     if result:
-        end_date = datetime.fromisoformat(result[0])
-        if datetime.now() < end_date and result[1] == 'active':
+        end_date = datetime.fromisoformat(result[1])
+        if datetime.now() < end_date and result[2] == 'active':
             embed = discord.Embed(
                 title="✅ Already Subscribed",
                 description=f"You already have an active FTC Picks Premium subscription!\n\n**Expires:** {end_date.strftime('%B %d, %Y')}",
@@ -1879,7 +3562,7 @@ async def subscribe(ctx):
     )
     
     if FREE_TRIAL_DAYS > 0:
-        trial_used = result[2] if result else 0
+        trial_used = result[4] if result else 0
         if not trial_used:
             embed.add_field(
                 name="🎁 Free Trial Available",
@@ -1904,8 +3587,8 @@ async def subscribe(ctx):
     
     embed.add_field(
         name="✨ What You Get",
-        value="""
-        ✅ **2 picks per hour** on all commands
+        value=f"""
+        ✅ **{describe_rate_limit('premium')}** on all commands
         ✅ Premium picks across 9 sports
         ✅ Real-time odds from 10+ bookmakers
         ✅ High confidence consensus picks
@@ -1928,26 +3611,15 @@ async def verify(ctx, payment_method: str, transaction_id: str, *, proof_url: st
         await ctx.send("❌ Invalid payment method. Use: `paypal`, `venmo`, or `cashapp`")
         return
     
-    conn = sqlite3.connect('premium_users.db')
-    c = conn.cursor()
-    c.execute("SELECT status, subscription_end FROM premium_users WHERE user_id = ?", (ctx.author.id,))
-    result = c.fetchone()
+    result = await db.get_subscription(ctx.author.id)
     
-    if result and result[0] == 'active':
+    if result and result[2] == 'active':
         end_date = datetime.fromisoformat(result[1])
         if datetime.now() < end_date:
             await ctx.send(f"❌ You already have an active subscription until {end_date.strftime('%B %d, %Y')}")
-            conn.close()
             return
     
-    c.execute("""INSERT INTO pending_verifications 
-                 (user_id, username, payment_method, transaction_id, proof_url, submitted_at)
-                 VALUES (?, ?, ?, ?, ?, ?)""",
-              (ctx.author.id, str(ctx.author), payment_method, transaction_id, 
-               proof_url or 'None', datetime.now().isoformat()))
-    verification_id = c.lastrowid
-    conn.commit()
-    conn.close()
+    verification_id = await db.create_verification(ctx.author.id, str(ctx.author), payment_method, transaction_id, proof_url or 'None')
     
     if VERIFICATION_CHANNEL_ID:
         channel = bot.get_channel(VERIFICATION_CHANNEL_ID)
@@ -1997,31 +3669,17 @@ class VerificationButtons(discord.ui.View):
         
         await interaction.response.defer(ephemeral=True)
         
-        conn = sqlite3.connect('premium_users.db')
-        c = conn.cursor()
+        start_date = datetime.now()
+        end_date = start_date + timedelta(days=30)
         
-        c.execute("SELECT user_id, username, payment_method, transaction_id FROM pending_verifications WHERE id = ?", 
-                  (self.verification_id,))
-        result = c.fetchone()
+        result = await db.approve_verification(self.verification_id, start_date, end_date)
         
         if not result:
             await interaction.followup.send("❌ Verification not found!", ephemeral=True)
-            conn.close()
             return
         
         user_id, username, payment_method, transaction_id = result
-        
-        start_date = datetime.now()
-        end_date = start_date + timedelta(days=30)
-        
-        c.execute("""INSERT OR REPLACE INTO premium_users 
-                     (user_id, username, payment_method, transaction_id, subscription_start, subscription_end, status)
-                     VALUES (?, ?, ?, ?, ?, ?, 'active')""",
-                  (user_id, username, payment_method, transaction_id, start_date.isoformat(), end_date.isoformat()))
-        
-        c.execute("UPDATE pending_verifications SET status = 'approved' WHERE id = ?", (self.verification_id,))
-        conn.commit()
-        conn.close()
+        invalidate_entitlement(user_id)
         
         member_found = False
         for guild in interaction.client.guilds:
@@ -2083,17 +3741,9 @@ class VerificationButtons(discord.ui.View):
         
         await interaction.response.defer(ephemeral=True)
         
-        conn = sqlite3.connect('premium_users.db')
-        c = conn.cursor()
-        c.execute("UPDATE pending_verifications SET status = 'denied' WHERE id = ?", (self.verification_id,))
-        conn.commit()
-        
-        c.execute("SELECT user_id FROM pending_verifications WHERE id = ?", (self.verification_id,))
-        result = c.fetchone()
-        conn.close()
+        user_id = await db.deny_verification(self.verification_id)
         
-        if result:
-            user_id = result[0]
+        if user_id:
             for guild in interaction.client.guilds:
                 member = guild.get_member(user_id)
                 if member:
@@ -2114,12 +3764,7 @@ class VerificationButtons(discord.ui.View):
 async def status(ctx):
     """Check your subscription status"""
     
-    conn = sqlite3.connect('premium_users.db')
-    c = conn.cursor()
-    c.execute("SELECT subscription_start, subscription_end, status, payment_method FROM premium_users WHERE user_id = ?", 
-              (ctx.author.id,))
-    result = c.fetchone()
-    conn.close()
+    result = await db.get_subscription(ctx.author.id)
     
     if not result:
         embed = discord.Embed(
@@ -2168,14 +3813,8 @@ async def grant(ctx, member: discord.Member, days: int = 30):
     start_date = datetime.now()
     end_date = start_date + timedelta(days=days)
     
-    conn = sqlite3.connect('premium_users.db')
-    c = conn.cursor()
-    c.execute("""INSERT OR REPLACE INTO premium_users 
-                 (user_id, username, payment_method, transaction_id, subscription_start, subscription_end, status)
-                 VALUES (?, ?, 'manual', 'admin_grant', ?, ?, 'active')""",
-              (member.id, str(member), start_date.isoformat(), end_date.isoformat()))
-    conn.commit()
-    conn.close()
+    await db.save_subscription(member.id, str(member), start_date, end_date, 'manual', 'admin_grant')
+    invalidate_entitlement(member.id)
     
     premium_role = ctx.guild.get_role(PREMIUM_ROLE_ID)
     await member.add_roles(premium_role)
@@ -2192,11 +3831,8 @@ async def grant(ctx, member: discord.Member, days: int = 30):
 async def revoke(ctx, member: discord.Member):
     """Revoke premium (OWNER ONLY)"""
     
-    conn = sqlite3.connect('premium_users.db')
-    c = conn.cursor()
-    c.execute("UPDATE premium_users SET status = 'revoked' WHERE user_id = ?", (member.id,))
-    conn.commit()
-    conn.close()
+    await db.set_subscription_status(member.id, 'revoked')
+    invalidate_entitlement(member.id)
     
     premium_role = ctx.guild.get_role(PREMIUM_ROLE_ID)
     await member.remove_roles(premium_role)
@@ -2208,11 +3844,7 @@ async def revoke(ctx, member: discord.Member):
 async def pending(ctx):
     """View pending verifications (OWNER ONLY)"""
     
-    conn = sqlite3.connect('premium_users.db')
-    c = conn.cursor()
-    c.execute("SELECT id, user_id, username, payment_method, transaction_id, submitted_at FROM pending_verifications WHERE status = 'pending'")
-    results = c.fetchall()
-    conn.close()
+    results = await db.list_pending_verifications()
     
     if not results:
         await ctx.send("✅ No pending verifications!")
@@ -2238,11 +3870,7 @@ async def pending(ctx):
 async def premiumlist(ctx):
     """List all premium users (OWNER ONLY)"""
     
-    conn = sqlite3.connect('premium_users.db')
-    c = conn.cursor()
-    c.execute("SELECT username, subscription_end, status FROM premium_users WHERE status = 'active'")
-    results = c.fetchall()
-    conn.close()
+    results = await db.list_subscriptions('active')
     
     if not results:
         await ctx.send("No active premium users.")
@@ -2255,7 +3883,7 @@ async def premiumlist(ctx):
     )
     
     text = ""
-    for username, end_date, status in results:
+    for _, username, end_date in results:
         end = datetime.fromisoformat(end_date)
         days_left = (end - datetime.now()).days
         text += f"**{username}** - {days_left} days left\n"
@@ -2279,8 +3907,10 @@ async def predict(ctx, sport='nba'):
     picks = picks_data.get(sport, [])
     
     if not picks:
+        if await refuse_cold_fetch(ctx, sport):
+            return
         msg = await ctx.send(f"⏳ Fetching fresh **{sport.upper()}** picks...")
-        picks_data[sport] = await aggregate_picks(sport)
+        await refresh_sport(sport)
         picks = picks_data[sport]
         await msg.delete()
     
@@ -2296,35 +3926,27 @@ async def predict(ctx, sport='nba'):
 async def locks(ctx):
     """View all high confidence picks across all sports"""
     
-    all_locks = []
-    
-    for sport, picks in picks_data.items():
-        high_conf = [p for p in picks if p['sources'] >= 3]
-        for pick in high_conf:
-            pick['sport'] = sport
-            all_locks.append(pick)
+    all_locks, lock_count = leaderboard('locks')
     
     if not all_locks:
         await ctx.send("❌ No high confidence picks available right now.")
         return
     
-    all_locks.sort(key=lambda x: (x['sources'], x['avg_probability']), reverse=True)
-    
     embed = discord.Embed(
         title="🔒 ALL LOCKS - High Confidence Picks",
-        description=f"Found `{len(all_locks)}` high confidence picks across all sports",
+        description=f"Found `{lock_count}` high confidence picks across all sports",
         color=0xf39c12,
         timestamp=datetime.now()
     )
     
     text = ""
     for i, pick in enumerate(all_locks[:10], 1):
-        emoji = SPORT_EMOJIS.get(pick['sport'], '🎯')
-        odds_str = f"+{pick['avg_odds']}" if pick['avg_odds'] > 0 else str(pick['avg_odds'])
+        emoji = SPORT_EMOJIS.get(pick.sport, '🎯')
+        odds_str = f"+{pick.avg_odds}" if pick.avg_odds > 0 else str(pick.avg_odds)
         
-        text += f"{emoji} **{i}.** `{pick['player']}`\n"
-        text += f"   ╰ **{pick['pick']}** `{pick['line']}` {pick['prop_type']}\n"
-        text += f"   ╰ `{pick['sources']}` books | `{pick['avg_probability']}%` | `{odds_str}`\n\n"
+        text += f"{emoji} **{i}.** `{pick.player}`\n"
+        text += f"   ╰ **{pick.pick}** `{pick.line}` {pick.prop_type}\n"
+        text += f"   ╰ `{pick.sources}` books | `{pick.avg_probability}%` | `{odds_str}`\n\n"
     
     embed.add_field(name="Top 10 Locks", value=text, inline=False)
     embed.set_footer(text="FTC Picks Premium")
@@ -2336,35 +3958,31 @@ async def locks(ctx):
 async def potd(ctx):
     """Pick of the day - highest confidence pick"""
     
-    all_picks = []
-    for sport, picks in picks_data.items():
-        for pick in picks:
-            pick['sport'] = sport
-            all_picks.append(pick)
+    top_picks, _ = leaderboard('consensus')
     
-    if not all_picks:
+    if not top_picks:
         await ctx.send("❌ No picks available right now.")
         return
     
-    potd = max(all_picks, key=lambda x: (x['sources'], x['avg_probability']))
+    potd = top_picks[0]
     
-    emoji = SPORT_EMOJIS.get(potd['sport'], '🎯')
-    odds_str = f"+{potd['avg_odds']}" if potd['avg_odds'] > 0 else str(potd['avg_odds'])
+    emoji = SPORT_EMOJIS.get(potd.sport, '🎯')
+    odds_str = f"+{potd.avg_odds}" if potd.avg_odds > 0 else str(potd.avg_odds)
     
     embed = discord.Embed(
         title=f"{emoji} PICK OF THE DAY",
-        description=f"**{potd['player']}**",
+        description=f"**{potd.player}**",
         color=0xe67e22,
         timestamp=datetime.now()
     )
     
-    embed.add_field(name="Pick", value=f"**{potd['pick']}** `{potd['line']}` {potd['prop_type']}", inline=False)
-    embed.add_field(name="Sport", value=potd['sport'].upper(), inline=True)
-    embed.add_field(name="Consensus", value=f"`{potd['sources']}` bookmakers", inline=True)
-    embed.add_field(name="Confidence", value=f"`{potd['avg_probability']}%`", inline=True)
+    embed.add_field(name="Pick", value=f"**{potd.pick}** `{potd.line}` {potd.prop_type}", inline=False)
+    embed.add_field(name="Sport", value=potd.sport.upper(), inline=True)
+    embed.add_field(name="Consensus", value=f"`{potd.sources}` bookmakers", inline=True)
+    embed.add_field(name="Confidence", value=f"`{potd.avg_probability}%`", inline=True)
     embed.add_field(name="Avg Odds", value=f"`{odds_str}`", inline=True)
-    embed.add_field(name="Game", value=potd['game'], inline=False)
-    embed.add_field(name="Bookmakers", value=', '.join(potd['bookmakers'][:5]), inline=False)
+    embed.add_field(name="Game", value=potd.game, inline=False)
+    embed.add_field(name="Bookmakers", value=', '.join(potd.bookmakers[:5]), inline=False)
     
     embed.set_footer(text="FTC Picks Premium • Pick of the Day")
     
@@ -2375,34 +3993,45 @@ async def potd(ctx):
 async def compare(ctx, *, player_name):
     """Compare odds for a specific player"""
     
+    if not snapshot_is_usable('nba') and not picks_data['nba'] and await refuse_cold_fetch(ctx, 'nba'):
+        return
+    
     msg = await ctx.send(f"🔍 Searching for **{player_name}**...")
-    all_picks = await fetch_nba_props()
-    player_picks = [p for p in all_picks if player_name.lower() in p['player'].lower()]
+    _, age = await get_snapshot('nba')
+    index = best_line_index.get('nba')
+    search = player_index.get('nba')
+    matches = search.match(player_name) if search else []
+    player_lines = index.by_player.get(matches[0], []) if index and matches else []
     
     await msg.delete()
     
-    if not player_picks:
-        await ctx.send(f"❌ No props found for **{player_name}**")
+    if not player_lines:
+        suggestions = search.suggest(player_name, 3) if search else []
+        hint = f"\n\n**Did you mean:** {', '.join(suggestions)}" if suggestions else ""
+        await ctx.send(f"❌ No props found for **{player_name}**{hint}")
         return
     
     embed = discord.Embed(
-        title=f"📊 {player_picks[0]['player']} - Odds Comparison",
-        description=f"Found `{len(player_picks)}` props",
+        title=f"📊 {player_lines[0].player} - Odds Comparison",
+        description=f"Found `{sum(len(best.prices) for best in player_lines)}` prices on `{len(player_lines)}` lines • ⭐ = best price",
         color=0x3498db
     )
     
     by_prop = defaultdict(list)
-    for pick in player_picks:
-        by_prop[pick['prop_type']].append(pick)
+    for best in player_lines:
+        by_prop[best.prop_type].append(best)
     
-    for prop_type, picks in by_prop.items():
+    for prop_type, quotes in by_prop.items():
         field_value = ""
-        for pick in picks:
-            odds_str = f"+{pick['odds']}" if pick['odds'] > 0 else str(pick['odds'])
-            field_value += f"**{pick['bookmaker']}**: {pick['pick']} `{pick['line']}` | `{odds_str}`\n"
+        for best in quotes:
+            prices = [f"{book} `{'+' if odds > 0 else ''}{odds}`" for book, odds in best.prices[:4]]
+            prices[0] = f"⭐ **{prices[0]}**"
+            more = f" +{len(best.prices) - 4} more" if len(best.prices) > 4 else ""
+            field_value += f"{best.pick} `{best.line}`: {' | '.join(prices)}{more}\n"
         
-        embed.add_field(name=f"📈 {prop_type}", value=field_value, inline=False)
+        embed.add_field(name=f"📈 {prop_type}", value=field_value[:1024], inline=False)
     
+    embed.set_footer(text=f"FTC Picks • NBA Line Shopping • {format_snapshot_age(age)}")
     await ctx.send(embed=embed)
 
 @bot.command()
@@ -2438,48 +4067,84 @@ async def value(ctx, sport='nba'):
         await ctx.send(f"❌ No picks available for {sport.upper()}")
         return
     
-    value_picks = []
-    for pick in picks:
-        implied_prob = odds_to_probability(pick['avg_odds'])
-        if pick['avg_probability'] > implied_prob + 5:
-            pick['value'] = round(pick['avg_probability'] - implied_prob, 1)
-            value_picks.append(pick)
+    value_picks, value_count = leaderboard('value', sport)
     
     if not value_picks:
         await ctx.send(f"❌ No value bets found for {sport.upper()} right now.")
         return
     
-    value_picks.sort(key=lambda x: x['value'], reverse=True)
-    
     emoji = SPORT_EMOJIS.get(sport, '🎯')
     
     embed = discord.Embed(
         title=f"{emoji} VALUE BETS - {sport.upper()}",
-        description=f"Found `{len(value_picks)}` value bets with positive expected value",
+        description=f"Found `{value_count}` value bets with positive expected value",
         color=0x9b59b6
     )
     
     text = ""
     for i, pick in enumerate(value_picks[:5], 1):
-        odds_str = f"+{pick['avg_odds']}" if pick['avg_odds'] > 0 else str(pick['avg_odds'])
-        text += f"**{i}.** `{pick['player']}`\n"
-        text += f"   ╰ **{pick['pick']}** `{pick['line']}` {pick['prop_type']}\n"
-        text += f"   ╰ `+{pick['value']}%` edge | `{odds_str}` odds\n"
-        text += f"   ╰ {', '.join(pick['bookmakers'][:3])}\n\n"
+        value = round(pick.edge, 1)
+        odds_str = f"+{pick.best_odds}" if pick.best_odds > 0 else str(pick.best_odds)
+        text += f"**{i}.** `{pick.player}`\n"
+        text += f"   ╰ **{pick.pick}** `{pick.line}` {pick.prop_type}\n"
+        text += f"   ╰ `+{value}%` edge | `{odds_str}` at {pick.best_book}\n"
+        text += f"   ╰ Fair `{pick.fair_probability}%` | {pick.sources} books\n\n"
     
     embed.add_field(name="Top 5 Value Bets", value=text, inline=False)
-    embed.set_footer(text="FTC Picks Premium • Value = Probability - Implied Odds")
+    embed.set_footer(text="FTC Picks Premium • Value = No-Vig Probability - Best Price Implied Odds")
     
     await ctx.send(embed=embed)
 
 @bot.command()
 @is_owner()
-async def refresh(ctx):
-    """Manually refresh picks data (OWNER ONLY)"""
+async def refresh(ctx, sport: str = 'nba'):
+    """Manually refresh picks data (OWNER ONLY) - Usage: !refresh nfl OR !refresh all"""
+    
+    sport = sport.lower()
+    if sport == 'all':
+        # Jump every sport to the front of the scheduler's queue
+        for s in scheduled_sports():
+            request_refresh(s)
+        await ctx.send(f"✅ Queued a refresh for **{len(scheduled_sports())}** sports")
+        return
+    
+    if sport not in picks_data:
+        await ctx.send(f"❌ Sport **{sport}** not supported. Use: {', '.join(picks_data.keys())} or all")
+        return
+    
+    msg = await ctx.send(f"⏳ Refreshing {sport.upper()} picks from The Odds API...")
+    await refresh_sport(sport)
+    await msg.edit(content=f"✅ Refresh complete! Found **{len(picks_data[sport])}** consensus picks for {sport.upper()}")
+
+@bot.command()
+@is_owner()
+async def quota(ctx):
+    """Show Odds API credit usage for this month (OWNER ONLY)"""
+    
+    pending_write = flush_quota_ledger()
+    if pending_write:
+        await asyncio.wrap_future(pending_write)
+    summary = quota_month_summary()
+    
+    month_start_ts, _ = quota_window_starts()
+    by_sport, by_command = await db.quota_spend_breakdown(month_start_ts)
+    
+    embed = discord.Embed(
+        title="📊 Odds API Quota",
+        description=f"Budget: `{summary['budget']}` credits this month",
+        color=0x3498db
+    )
+    embed.add_field(name="✅ Spent", value=f"`{summary['spent']}`", inline=True)
+    embed.add_field(name="💰 Remaining", value=f"`{summary['remaining']}`", inline=True)
+    embed.add_field(name="📈 Projected", value=f"`{summary['projected']:.0f}` ({summary['burn_per_day']:.1f}/day)", inline=True)
+    embed.add_field(name="⏱️ Refresh Stretch", value=f"`{quota_interval_multiplier():.1f}x`", inline=True)
+    
+    if by_sport:
+        embed.add_field(name="🏆 By Sport", value="\n".join(f"**{s.upper()}**: `{cost}`" for s, cost in by_sport[:10]), inline=False)
+    if by_command:
+        embed.add_field(name="⌨️ By Command", value="\n".join(f"**!{cmd}**: `{cost}`" for cmd, cost in by_command[:10]), inline=False)
     
-    msg = await ctx.send("⏳ Refreshing picks from The Odds API...")
-    picks_data['nba'] = await aggregate_picks('nba')
-    await msg.edit(content=f"✅ Refresh complete! Found **{len(picks_data['nba'])}** consensus picks for NBA")
+    await ctx.send(embed=embed)
 
 @bot.command()
 @is_owner()
@@ -2535,8 +4200,6 @@ async def parlay(ctx, sport: str = None, legs: int = 3):
         return
     
     # Get top picks from specified sport or all sports
-    all_picks = []
-    
     if sport:
         sport = sport.lower()
         if sport not in picks_data:
@@ -2545,80 +4208,64 @@ async def parlay(ctx, sport: str = None, legs: int = 3):
         
         picks = picks_data.get(sport, [])
         if not picks:
+            if await refuse_cold_fetch(ctx, sport):
+                return
             msg = await ctx.send(f"⏳ Fetching {sport.upper()} picks...")
-            picks_data[sport] = await aggregate_picks(sport)
-            picks = picks_data[sport]
+            await refresh_sport(sport)
             await msg.delete()
-        
-        for pick in picks:
-            if pick['sources'] >= 2:  # Lowered to 2 books for more options
-                pick['sport'] = sport
-                all_picks.append(pick)
     else:
         # Get from all sports
         for s, picks in picks_data.items():
-            if not picks:
+            # Skip cold sports the API budget can't cover right now
+            if not picks and quota_allows_cold_fetch(s):
                 try:
-                    picks_data[s] = await aggregate_picks(s)
-                    picks = picks_data[s]
+                    await refresh_sport(s)
                 except Exception as e:
                     print(f"Error fetching {s} for parlay: {e}")
-                    picks = []
-            
-            for pick in picks:
-                if pick['sources'] >= 2:  # Lowered to 2 books for more options
-                    pick['sport'] = s
-                    all_picks.append(pick)
     
-    if len(all_picks) < legs:
-        await ctx.send(f"❌ Not enough high confidence picks. Only {len(all_picks)} available.")
+    # Ranked by confidence; 2+ books for more options
+    ranked, available = leaderboard('parlay', sport)
+    
+    if available < legs:
+        await ctx.send(f"❌ Not enough high confidence picks. Only {available} available.")
         return
     
-    # Sort by confidence and take top legs
-    all_picks.sort(key=lambda x: (x['sources'], x['avg_probability']), reverse=True)
-    parlay_picks = all_picks[:legs]
+    parlay_picks = ranked[:legs]
     
-    # Calculate parlay odds
-    total_decimal_odds = 1.0
+    # Price every leg at its best quote, plus the no-vig chance every leg hits
+    total_decimal_odds = parlay_decimal([pick.best_odds for pick in parlay_picks])
+    fair_hit = 1.0
     for pick in parlay_picks:
-        american_odds = pick['avg_odds']
-        if american_odds > 0:
-            decimal = (american_odds / 100) + 1
-        else:
-            decimal = (100 / abs(american_odds)) + 1
-        total_decimal_odds *= decimal
+        fair_hit *= pick.fair_probability / 100
+    
+    if not math.isfinite(total_decimal_odds) or total_decimal_odds <= 1:
+        await ctx.send("❌ Couldn't price this parlay right now - try again after the next refresh.")
+        return
     
     # Convert back to American odds
-    if total_decimal_odds >= 2.0:
-        parlay_american = int((total_decimal_odds - 1) * 100)
-        odds_str = f"+{parlay_american}"
-    else:
-        parlay_american = int(-100 / (total_decimal_odds - 1))
-        odds_str = str(parlay_american)
+    parlay_american = int(decimal_to_american(total_decimal_odds))
+    odds_str = f"+{parlay_american}" if parlay_american > 0 else str(parlay_american)
     
     # Calculate potential payout on $100
-    if parlay_american > 0:
-        payout = 100 + (100 * parlay_american / 100)
-    else:
-        payout = 100 + (100 * 100 / abs(parlay_american))
+    payout = 100 + net_payout(parlay_american, 100)
     
     sport_name = sport.upper() if sport else "MULTI-SPORT"
     
     embed = discord.Embed(
         title=f"🎰 {legs}-LEG {sport_name} PARLAY",
-        description=f"**Odds:** {odds_str}\n**$100 Bet Pays:** ${payout:.2f}\n✅ Check PrizePicks for LESS availability",
+        description=f"**Odds:** {odds_str}\n**$100 Bet Pays:** ${payout:.2f}\n**Fair Hit Chance:** {fair_hit * 100:.1f}% (EV ${expected_value(fair_hit, parlay_american, 100):+.2f})\n✅ Check PrizePicks for LESS availability",
         color=0xf39c12
     )
     
     for i, pick in enumerate(parlay_picks, 1):
-        emoji = SPORT_EMOJIS.get(pick['sport'], '🎯')
-        direction = "MORE ✅" if "over" in pick['pick'].lower() else "LESS ⚠️"
-        odds = f"+{pick['avg_odds']}" if pick['avg_odds'] > 0 else str(pick['avg_odds'])
-        sport_upper = pick['sport'].upper()
+        emoji = SPORT_EMOJIS.get(pick.sport, '🎯')
+        direction = "MORE ✅" if "over" in pick.pick.lower() else "LESS ⚠️"
+        odds = f"+{pick.best_odds}" if pick.best_odds > 0 else str(pick.best_odds)
+        sport_upper = pick.sport.upper()
         
         embed.add_field(
-            name=f"{emoji} Leg {i}: {pick['player']} ({sport_upper})",
-            value=f"{direction} {pick['line']} {pick['prop_type']}\n{pick['game']}\n{pick['sources']} books • {odds}",
+            name=f"{emoji} Leg {i}: {pick.player} ({sport_upper})",
+            value=f"{direction} {pick.line} {pick.prop_type}\n{pick.game}\n{pick.sources} books • {odds} @ {pick.best_book} • {pick.fair_probability}% fair",
             inline=False
         )
     
@@ -2634,19 +4281,11 @@ async def parlay(ctx, sport: str = None, legs: int = 3):
 async def mystats(ctx):
     """View your betting stats and record"""
     
-    conn = sqlite3.connect('premium_users.db')
-    c = conn.cursor()
-    
     # Get bankroll info
-    c.execute("SELECT starting_bankroll, current_bankroll, total_profit, total_bets, wins, losses FROM user_bankrolls WHERE user_id = ?", 
-              (ctx.author.id,))
-    bankroll_data = c.fetchone()
+    bankroll_data = await db.get_bankroll(ctx.author.id)
     
     # Get recent bets
-    c.execute("SELECT pick_description, amount, odds, result, profit, bet_date FROM user_bets WHERE user_id = ? ORDER BY id DESC LIMIT 5",
-              (ctx.author.id,))
-    recent_bets = c.fetchall()
-    conn.close()
+    recent_bets = await db.recent_bets(ctx.author.id, 5)
     
     if not bankroll_data:
         embed = discord.Embed(
@@ -2692,11 +4331,7 @@ async def notify(ctx, sport: str = None, action: str = "toggle"):
     """Toggle notifications for new picks"""
     
     if not sport:
-        conn = sqlite3.connect('premium_users.db')
-        c = conn.cursor()
-        c.execute("SELECT nba, nfl, mlb, nhl, soccer FROM user_notifications WHERE user_id = ?", (ctx.author.id,))
-        result = c.fetchone()
-        conn.close()
+        result = await db.get_notifications(ctx.author.id)
         
         if not result:
             result = (0, 0, 0, 0, 0)
@@ -2729,21 +4364,7 @@ async def notify(ctx, sport: str = None, action: str = "toggle"):
         await ctx.send(f"❌ Invalid sport. Use: nba, nfl, mlb, nhl, soccer")
         return
     
-    conn = sqlite3.connect('premium_users.db')
-    c = conn.cursor()
-    
-    c.execute(f"SELECT {sport} FROM user_notifications WHERE user_id = ?", (ctx.author.id,))
-    result = c.fetchone()
-    
-    if result:
-        new_value = 0 if result[0] == 1 else 1
-        c.execute(f"UPDATE user_notifications SET {sport} = ? WHERE user_id = ?", (new_value, ctx.author.id))
-    else:
-        c.execute(f"INSERT INTO user_notifications (user_id, {sport}) VALUES (?, 1)", (ctx.author.id,))
-        new_value = 1
-    
-    conn.commit()
-    conn.close()
+    new_value = await db.toggle_notification(ctx.author.id, sport)
     
     status = "✅ ON" if new_value == 1 else "❌ OFF"
     await ctx.send(f"🔔 {sport.upper()} notifications: {status}")
@@ -2753,31 +4374,19 @@ async def notify(ctx, sport: str = None, action: str = "toggle"):
 async def bankroll(ctx, action: str = None, amount: float = None):
     """Manage your bankroll"""
     
-    conn = sqlite3.connect('premium_users.db')
-    c = conn.cursor()
-    
     if action == "set" and amount:
-        c.execute("""INSERT INTO user_bankrolls (user_id, starting_bankroll, current_bankroll, total_profit)
-                     VALUES (?, ?, ?, 0)
-                     ON CONFLICT(user_id) DO UPDATE SET 
-                     starting_bankroll = ?, current_bankroll = ?""",
-                  (ctx.author.id, amount, amount, amount, amount))
-        conn.commit()
-        conn.close()
+        await db.set_bankroll(ctx.author.id, amount)
         
         await ctx.send(f"✅ Bankroll set to **${amount:.2f}**\n\nTrack bets with `!bet <amount> <pick>`")
         return
     
-    c.execute("SELECT starting_bankroll, current_bankroll, total_profit FROM user_bankrolls WHERE user_id = ?",
-              (ctx.author.id,))
-    result = c.fetchone()
-    conn.close()
+    result = await db.get_bankroll(ctx.author.id)
     
     if not result:
         await ctx.send("❌ No bankroll set!\n\nUse `!bankroll set 1000` to start tracking.")
         return
     
-    starting, current, profit = result
+    starting, current, profit = result[:3]
     roi = (profit / starting * 100) if starting > 0 else 0
     
     embed = discord.Embed(
@@ -2873,26 +4482,14 @@ async def injuries(ctx, sport: str = "nba"):
 async def calc(ctx, odds: int, bet_amount: float = 100):
     """Calculate betting payouts"""
     
-    if odds > 0:
-        # Positive odds
-        profit = bet_amount * (odds / 100)
-        payout = bet_amount + profit
-    else:
-        # Negative odds
-        profit = bet_amount * (100 / abs(odds))
-        payout = bet_amount + profit
-    
-    # Convert to decimal and fractional
-    if odds > 0:
-        decimal_odds = (odds / 100) + 1
-    else:
-        decimal_odds = (100 / abs(odds)) + 1
+    if odds == 0:
+        await ctx.send("❌ Odds can't be 0. Use American odds like `-110` or `+150`")
+        return
     
-    # Implied probability
-    if odds > 0:
-        implied_prob = 100 / (odds + 100) * 100
-    else:
-        implied_prob = abs(odds) / (abs(odds) + 100) * 100
+    profit = net_payout(odds, bet_amount)
+    payout = bet_amount + profit
+    decimal_odds = american_to_decimal(odds)
+    implied_prob = odds_to_probability(odds)
     
     embed = discord.Embed(
         title="🧮 Betting Calculator",
@@ -2927,8 +4524,10 @@ async def analyze(ctx, sport: str = 'nba', *, player_name: str = None):
     picks = picks_data.get(sport, [])
     
     if not picks:
+        if await refuse_cold_fetch(ctx, sport):
+            return
         msg = await ctx.send(f"⏳ Fetching picks for {sport.upper()}...")
-        picks_data[sport] = await aggregate_picks(sport)
+        await refresh_sport(sport)
         picks = picks_data[sport]
         await msg.delete()
     
@@ -2938,44 +4537,47 @@ async def analyze(ctx, sport: str = 'nba', *, player_name: str = None):
     
     # If player specified, find their pick
     if player_name:
-        player_picks = [p for p in picks if player_name.lower() in p['player'].lower()]
-        if not player_picks:
-            await ctx.send(f"❌ No picks found for **{player_name}** in {sport.upper()}")
+        search = player_index.get(sport)
+        matches = [name for name in search.match(player_name) if search.picks[name]] if search else []
+        if not matches:
+            suggestions = [name for name in search.suggest(player_name, 10) if search.picks[name]][:3] if search else []
+            hint = f"\n\n**Did you mean:** {', '.join(suggestions)}" if suggestions else ""
+            await ctx.send(f"❌ No picks found for **{player_name}** in {sport.upper()}{hint}")
             return
-        pick = player_picks[0]
+        pick = search.picks[matches[0]][0]
     else:
         # Get highest confidence pick
-        pick = max(picks, key=lambda x: (x['sources'], x['avg_probability']))
+        pick = max(picks, key=lambda x: (x.sources, x.avg_probability))
     
     emoji = SPORT_EMOJIS.get(sport, '🎯')
-    direction = "MORE" if "over" in pick['pick'].lower() else "LESS"
-    odds_str = f"+{pick['avg_odds']}" if pick['avg_odds'] > 0 else str(pick['avg_odds'])
+    direction = "MORE" if "over" in pick.pick.lower() else "LESS"
+    odds_str = f"+{pick.avg_odds}" if pick.avg_odds > 0 else str(pick.avg_odds)
     
     embed = discord.Embed(
-        title=f"📊 {pick['player']} - {pick['prop_type']} Analysis",
-        description=f"**{sport.upper()}** • {pick['game']}",
+        title=f"📊 {pick.player} - {pick.prop_type} Analysis",
+        description=f"**{sport.upper()}** • {pick.game}",
         color=0x3498db
     )
     
     # Recommendation
     embed.add_field(
         name=f"🎯 RECOMMENDATION",
-        value=f"**{direction} {pick['line']} {pick['prop_type']}** ({odds_str})",
+        value=f"**{direction} {pick.line} {pick.prop_type}** ({odds_str})",
         inline=False
     )
     
     # Why this pick hits
     reasons = [
-        f"• {pick['sources']} bookmakers agree on this line",
-        f"• {pick['avg_probability']}% consensus probability",
+        f"• {pick.sources} bookmakers agree on this line",
+        f"• {pick.avg_probability}% consensus probability",
         f"• Average odds of {odds_str} across all books",
         f"• Consistent line across multiple sportsbooks"
     ]
     
-    if pick['sources'] >= 4:
+    if pick.sources >= 4:
         reasons.append("• **Strong consensus** from premium books")
     
-    if pick['avg_probability'] > 60:
+    if pick.avg_probability > 60:
         reasons.append("• **High confidence** pick (60%+ probability)")
     
     embed.add_field(
@@ -2986,11 +4588,11 @@ async def analyze(ctx, sport: str = 'nba', *, player_name: str = None):
     
     # Risk factors
     risks = []
-    if pick['avg_probability'] < 55:
+    if pick.avg_probability < 55:
         risks.append("• Moderate confidence level")
-    if pick['sources'] == 2:
+    if pick.sources == 2:
         risks.append("• Limited bookmaker consensus")
-    if abs(pick['avg_odds']) < 110:
+    if abs(pick.avg_odds) < 110:
         risks.append("• Tight odds (low payout)")
     
     if risks:
@@ -3001,11 +4603,11 @@ async def analyze(ctx, sport: str = 'nba', *, player_name: str = None):
         )
     
     # Bottom line
-    edge = pick['avg_probability'] - odds_to_probability(pick['avg_odds'])
+    edge = pick.edge
     
     embed.add_field(
         name="💡 Bottom Line",
-        value=f"**Confidence:** {pick['avg_probability']}%\n**Edge:** {edge:+.1f}%\n**Books:** {', '.join(pick['bookmakers'][:3])}",
+        value=f"**Confidence:** {pick.avg_probability}%\n**Edge:** {edge:+.1f}%\n**Books:** {', '.join(pick.bookmakers[:3])}",
         inline=False
     )
     
@@ -3025,8 +4627,10 @@ async def matchup(ctx, sport: str = 'nba'):
     picks = picks_data.get(sport, [])
     
     if not picks:
+        if await refuse_cold_fetch(ctx, sport):
+            return
         msg = await ctx.send(f"⏳ Fetching picks for {sport.upper()}...")
-        picks_data[sport] = await aggregate_picks(sport)
+        await refresh_sport(sport)
         picks = picks_data[sport]
         await msg.delete()
     
@@ -3035,7 +4639,7 @@ async def matchup(ctx, sport: str = 'nba'):
         return
     
     # Get the game from the first pick
-    game = picks[0]['game']
+    game = picks[0].game
     teams = game.split(' vs ')
     
     emoji = SPORT_EMOJIS.get(sport, '🎯')
@@ -3047,11 +4651,11 @@ async def matchup(ctx, sport: str = 'nba'):
     )
     
     # Get picks for this game
-    game_picks = [p for p in picks if p['game'] == game]
+    game_picks = [p for p in picks if p.game == game]
     
     # Separate by direction
-    more_picks = [p for p in game_picks if 'over' in p['pick'].lower()]
-    less_picks = [p for p in game_picks if 'under' in p['pick'].lower()]
+    more_picks = [p for p in game_picks if 'over' in p.pick.lower()]
+    less_picks = [p for p in game_picks if 'under' in p.pick.lower()]
     
     embed.add_field(
         name="📊 Pick Distribution",
@@ -3060,14 +4664,14 @@ async def matchup(ctx, sport: str = 'nba'):
     )
     
     # Top plays for this game
-    top_plays = sorted(game_picks, key=lambda x: (x['sources'], x['avg_probability']), reverse=True)[:3]
+    top_plays = sorted(game_picks, key=lambda x: (x.sources, x.avg_probability), reverse=True)[:3]
     
     plays_text = ""
     for i, pick in enumerate(top_plays, 1):
-        direction = "MORE" if "over" in pick['pick'].lower() else "LESS"
-        odds = f"+{pick['avg_odds']}" if pick['avg_odds'] > 0 else str(pick['avg_odds'])
-        plays_text += f"**{i}.** {pick['player']} {direction} {pick['line']} {pick['prop_type']}\n"
-        plays_text += f"   {pick['sources']} books • {pick['avg_probability']}% • {odds}\n\n"
+        direction = "MORE" if "over" in pick.pick.lower() else "LESS"
+        odds = f"+{pick.avg_odds}" if pick.avg_odds > 0 else str(pick.avg_odds)
+        plays_text += f"**{i}.** {pick.player} {direction} {pick.line} {pick.prop_type}\n"
+        plays_text += f"   {pick.sources} books • {pick.avg_probability}% • {odds}\n\n"
     
     embed.add_field(
         name="🎯 Best Bets For This Game",
@@ -3091,8 +4695,10 @@ async def sharp(ctx, sport: str = 'nba'):
     picks = picks_data.get(sport, [])
     
     if not picks:
+        if await refuse_cold_fetch(ctx, sport):
+            return
         msg = await ctx.send(f"⏳ Fetching picks for {sport.upper()}...")
-        picks_data[sport] = await aggregate_picks(sport)
+        await refresh_sport(sport)
         picks = picks_data[sport]
         await msg.delete()
     
@@ -3109,8 +4715,7 @@ async def sharp(ctx, sport: str = 'nba'):
     )
     
     # Get highest consensus picks (sharp money indicator)
-    sharp_plays = [p for p in picks if p['sources'] >= 3]
-    sharp_plays.sort(key=lambda x: (x['sources'], x['avg_probability']), reverse=True)
+    sharp_plays, _ = leaderboard('sharp', sport)
     
     if not sharp_plays:
         await ctx.send(f"❌ No sharp consensus detected for {sport.upper()}")
@@ -3118,31 +4723,43 @@ async def sharp(ctx, sport: str = 'nba'):
     
     # Top sharp play
     top_sharp = sharp_plays[0]
-    direction = "MORE" if "over" in top_sharp['pick'].lower() else "LESS"
-    odds = f"+{top_sharp['avg_odds']}" if top_sharp['avg_odds'] > 0 else str(top_sharp['avg_odds'])
+    direction = "MORE" if "over" in top_sharp.pick.lower() else "LESS"
+    odds = f"+{top_sharp.best_odds}" if top_sharp.best_odds > 0 else str(top_sharp.best_odds)
     
     embed.add_field(
         name="🚨 STRONGEST SHARP PLAY",
-        value=f"**{top_sharp['player']}**\n{direction} {top_sharp['line']} {top_sharp['prop_type']}\n\n**Sharp Indicator:** {top_sharp['sources']} books agree\n**Confidence:** {top_sharp['avg_probability']}%\n**Odds:** {odds}",
+        value=f"**{top_sharp.player}**\n{direction} {top_sharp.line} {top_sharp.prop_type}\n\n**Sharp Indicator:** {top_sharp.sources} books agree\n**Confidence:** {top_sharp.fair_probability}% (no-vig)\n**Best Odds:** {odds} at {top_sharp.best_book} ({top_sharp.edge:+.1f}% edge)",
         inline=False
     )
     
-    # Money distribution (simulated based on consensus)
-    public_side = "LESS" if direction == "MORE" else "MORE"
-    sharp_pct = min(75 + (top_sharp['sources'] - 3) * 5, 95)
+    # Real opening-vs-current movement from the odds history
+    moves = {(m['player'], m['prop_type'], m['side']): m for m in await current_line_movement(sport)}
+    top_move = moves.get((top_sharp.player, top_sharp.prop_type, top_sharp.pick))
+    
+    if top_move and (top_move['line_move'] or top_move['probability_move']):
+        if top_move['probability_move'] > 0:
+            verdict = "✅ **Market moving toward this side**"
+        else:
+            verdict = "⚠️ **Market moving against this side**"
+        opened = format_time_remaining(int(time.time()) - top_move['opened_at'])
+        movement_text = f"**Open → Now:** {format_line_move(top_move)}\n**Tracked:** {opened} across {top_move['books']} books\n\n{verdict}"
+    else:
+        movement_text = "No movement recorded since this line opened.\nUse `!movement` to see the biggest moves on the board."
     
     embed.add_field(
-        name="💵 Money Distribution",
-        value=f"**Public:** {100-sharp_pct}% on {public_side}\n**Sharp:** {sharp_pct}% on {direction}\n\n⚠️ **FADE PUBLIC** - Line has sharp consensus",
+        name="📈 Line Movement",
+        value=movement_text,
         inline=False
     )
     
     # All sharp plays
     sharp_list = ""
     for i, pick in enumerate(sharp_plays[:5], 1):
-        dir = "MORE" if "over" in pick['pick'].lower() else "LESS"
-        sharp_list += f"**{i}.** {pick['player']} {dir} {pick['line']} {pick['prop_type']}\n"
-        sharp_list += f"   {pick['sources']} books • {pick['avg_probability']}%\n\n"
+        dir = "MORE" if "over" in pick.pick.lower() else "LESS"
+        move = moves.get((pick.player, pick.prop_type, pick.pick))
+        moved = f" • {move['probability_move']:+.1f}% since open" if move and move['probability_move'] else ""
+        sharp_list += f"**{i}.** {pick.player} {dir} {pick.line} {pick.prop_type}\n"
+        sharp_list += f"   {pick.sources} books • {pick.fair_probability}% fair • {pick.edge:+.1f}% edge{moved}\n\n"
     
     embed.add_field(
         name="📊 All Sharp Plays",
@@ -3152,7 +4769,7 @@ async def sharp(ctx, sport: str = 'nba'):
     
     embed.add_field(
         name="💡 Sharp Betting Insight",
-        value=f"When {top_sharp['sources']}+ books agree, it indicates professional bettors (sharps) have identified value. These are the plays the pros are betting.",
+        value=f"When {top_sharp.sources}+ books agree, it indicates professional bettors (sharps) have identified value. These are the plays the pros are betting.",
         inline=False
     )
     
@@ -3172,8 +4789,10 @@ async def model(ctx, sport: str = 'nba'):
     picks = picks_data.get(sport, [])
     
     if not picks:
+        if await refuse_cold_fetch(ctx, sport):
+            return
         msg = await ctx.send(f"⏳ Fetching picks for {sport.upper()}...")
-        picks_data[sport] = await aggregate_picks(sport)
+        await refresh_sport(sport)
         picks = picks_data[sport]
         await msg.delete()
     
@@ -3184,7 +4803,7 @@ async def model(ctx, sport: str = 'nba'):
     emoji = SPORT_EMOJIS.get(sport, '🎯')
     
     # Get the game
-    game = picks[0]['game']
+    game = picks[0].game
     
     embed = discord.Embed(
         title=f"🤖 AI Model Prediction - {sport.upper()}",
@@ -3193,15 +4812,7 @@ async def model(ctx, sport: str = 'nba'):
     )
     
     # Get top model picks (highest edge)
-    model_picks = []
-    for pick in picks:
-        implied_prob = odds_to_probability(pick['avg_odds'])
-        edge = pick['avg_probability'] - implied_prob
-        if edge > 2:  # At least 2% edge
-            pick['edge'] = edge
-            model_picks.append(pick)
-    
-    model_picks.sort(key=lambda x: x['edge'], reverse=True)
+    model_picks, _ = leaderboard('model', sport)
     
     if not model_picks:
         embed.add_field(
@@ -3212,35 +4823,32 @@ async def model(ctx, sport: str = 'nba'):
     else:
         # Top model play
         top_model = model_picks[0]
-        direction = "MORE" if "over" in top_model['pick'].lower() else "LESS"
-        odds = f"+{top_model['avg_odds']}" if top_model['avg_odds'] > 0 else str(top_model['avg_odds'])
+        top_edge = top_model.edge
+        direction = "MORE" if "over" in top_model.pick.lower() else "LESS"
+        odds = f"+{top_model.best_odds}" if top_model.best_odds > 0 else str(top_model.best_odds)
         
         embed.add_field(
             name="🎯 Model's Top Pick",
-            value=f"**{top_model['player']}**\n{direction} {top_model['line']} {top_model['prop_type']}\n\n**Model Probability:** {top_model['avg_probability']}%\n**Book Odds:** {odds}\n**Expected Edge:** +{top_model['edge']:.1f}%",
+            value=f"**{top_model.player}**\n{direction} {top_model.line} {top_model.prop_type}\n\n**Model Probability:** {top_model.fair_probability}% (no-vig)\n**Best Odds:** {odds} at {top_model.best_book}\n**Expected Edge:** +{top_edge:.1f}%",
             inline=False
         )
         
-        # Expected value calculation
+        # Expected value calculation at the best available price
         bet_amount = 100
-        if top_model['avg_odds'] > 0:
-            profit_if_win = bet_amount * (top_model['avg_odds'] / 100)
-        else:
-            profit_if_win = bet_amount * (100 / abs(top_model['avg_odds']))
-        
-        ev = (top_model['avg_probability'] / 100) * profit_if_win - ((100 - top_model['avg_probability']) / 100) * bet_amount
+        profit_if_win = net_payout(top_model.best_odds, bet_amount)
+        ev = top_model.ev * bet_amount
         
         embed.add_field(
             name="📈 Expected Value",
-            value=f"Betting $100:\n• If win ({top_model['avg_probability']}%): +${profit_if_win:.2f}\n• If lose ({100-top_model['avg_probability']}%): -$100.00\n\n**Expected Profit:** ${ev:+.2f} per $100 bet\n💰 **TRUE EDGE:** +{top_model['edge']:.1f}%",
+            value=f"Betting $100:\n• If win ({top_model.fair_probability}%): +${profit_if_win:.2f}\n• If lose ({100-top_model.fair_probability:.1f}%): -$100.00\n\n**Expected Profit:** ${ev:+.2f} per $100 bet\n💰 **TRUE EDGE:** +{top_edge:.1f}%",
             inline=False
         )
         
         # Verdict
-        if top_model['edge'] > 5:
+        if top_edge > 5:
             verdict = "✅ STRONG BET"
             confidence = "9/10"
-        elif top_model['edge'] > 3:
+        elif top_edge > 3:
             verdict = "✅ GOOD BET"
             confidence = "7/10"
         else:
@@ -3249,7 +4857,7 @@ async def model(ctx, sport: str = 'nba'):
         
         embed.add_field(
             name="✅ Model Verdict",
-            value=f"{verdict}\n**Confidence:** {confidence}\n**Books:** {', '.join(top_model['bookmakers'][:3])}",
+            value=f"{verdict}\n**Confidence:** {confidence}\n**Books:** {', '.join(top_model.bookmakers[:3])}",
             inline=False
         )
     
@@ -3553,33 +5161,44 @@ async def lines(ctx, sport: str, *, player_names: str):
     # Split multiple players by "+"
     players = [p.strip() for p in player_names.split('+')]
     
-    # ALWAYS fetch fresh data for lines command
-    msg = await ctx.send(f"⏳ Fetching live {sport.upper()} lines from bookmakers...")
-    picks_data[sport] = await aggregate_picks(sport)
-    picks = picks_data[sport]
+    # Serve the current snapshot; only block on a fetch when there's nothing usable
+    if snapshot_is_usable(sport):
+        msg = await ctx.send(f"⏳ Loading {sport.upper()} lines...")
+    else:
+        if not picks_data[sport] and await refuse_cold_fetch(ctx, sport):
+            return
+        msg = await ctx.send(f"⏳ Fetching live {sport.upper()} lines from bookmakers...")
+        if ctx.author.id == BOT_OWNER_ID:
+            await refresh_sport(sport)
+    picks, age = await get_snapshot(sport)
     
     if not picks:
         await msg.edit(content=f"❌ No player prop lines available for {sport.upper()} right now.\n\n**Possible reasons:**\n• No games scheduled today\n• Games haven't posted player props yet\n• API doesn't have {sport.upper()} props available\n• Lines pulled due to injury/scratch\n\nTry `!predict {sport}` to see if there's any data!")
         return
     
     await msg.delete()
+    index = best_line_index.get(sport)
     
-    # Find picks for each player
+    # Find picks for each player (best name match that has lines)
+    search = player_index.get(sport)
     all_player_picks = []
     for player in players:
-        player_picks = [p for p in picks if player.lower() in p['player'].lower()]
-        if player_picks:
+        matches = [name for name in search.match(player) if search.picks[name]] if search else []
+        if matches:
             all_player_picks.append({
-                'name': player_picks[0]['player'],
-                'picks': player_picks
+                'name': matches[0],
+                'picks': search.picks[matches[0]]
             })
     
     if not all_player_picks:
-        # Show available players to help user
-        all_players = list(set([p['player'] for p in picks]))
-        sample_players = ', '.join(all_players[:5])
+        # Suggest the closest names that do have lines
+        suggestions = []
+        for player in players:
+            for name in search.suggest(player, 10) if search else []:
+                if search.picks[name] and name not in suggestions:
+                    suggestions.append(name)
         
-        await ctx.send(f"❌ No lines found for **{', '.join(players)}** in today's {sport.upper()} games.\n\n**Available players:** {sample_players}{'...' if len(all_players) > 5 else ''}\n\nMake sure spelling is correct!")
+        await ctx.send(f"❌ No lines found for **{', '.join(players)}** in today's {sport.upper()} games.\n\n**Did you mean:** {', '.join(suggestions[:5]) or 'no close matches'}\n\nMake sure spelling is correct!")
         return
     
     # Create embed for each player
@@ -3588,7 +5207,7 @@ async def lines(ctx, sport: str, *, player_names: str):
         player_picks = player_data['picks']
         
         # Get game info
-        game = player_picks[0]['game'] if player_picks else "TBD"
+        game = player_picks[0].game if player_picks else "TBD"
         
         embed = discord.Embed(
             title=f"{emoji} {player_name} - Live Betting Lines",
@@ -3599,41 +5218,47 @@ async def lines(ctx, sport: str, *, player_names: str):
         # Group picks by prop type
         prop_groups = {}
         for pick in player_picks:
-            prop = pick['prop_type']
+            prop = pick.prop_type
             if prop not in prop_groups:
                 prop_groups[prop] = []
             prop_groups[prop].append(pick)
         
         # Show each prop type
         for prop_type, prop_picks in prop_groups.items():
-            # Get the consensus line (most common)
-            lines = [p['line'] for p in prop_picks]
-            most_common_line = max(set(lines), key=lines.count)
+            # Consensus line (most quoted) and agreement come precomputed with the snapshot
+            most_common_line = prop_picks[0].modal_line
+            consensus_pct = prop_picks[0].line_agreement
             
-            # Separate over/under
-            over_picks = [p for p in prop_picks if 'over' in p['pick'].lower()]
-            under_picks = [p for p in prop_picks if 'under' in p['pick'].lower()]
+            # Separate over/under, priced at the consensus line when books quote it
+            at_line = [p for p in prop_picks if p.line == most_common_line] or prop_picks
+            over_picks = [p for p in at_line if 'over' in p.pick.lower()]
+            under_picks = [p for p in at_line if 'under' in p.pick.lower()]
             
-            # Calculate average odds
+            # Calculate average odds, plus the best price any book has on that side
             if over_picks:
-                avg_over_odds = sum(p['avg_odds'] for p in over_picks) / len(over_picks)
+                avg_over_odds = sum(p.avg_odds for p in over_picks) / len(over_picks)
                 over_odds_str = f"+{int(avg_over_odds)}" if avg_over_odds > 0 else str(int(avg_over_odds))
+                best_over = index.best_of(over_picks) if index else None
+                if best_over:
+                    over_odds_str += f" • ⭐ {'+' if best_over.best_odds > 0 else ''}{best_over.best_odds} {best_over.best_book}"
             else:
                 over_odds_str = "N/A"
             
             if under_picks:
-                avg_under_odds = sum(p['avg_odds'] for p in under_picks) / len(under_picks)
+                avg_under_odds = sum(p.avg_odds for p in under_picks) / len(under_picks)
                 under_odds_str = f"+{int(avg_under_odds)}" if avg_under_odds > 0 else str(int(avg_under_odds))
+                best_under = index.best_of(under_picks) if index else None
+                if best_under:
+                    under_odds_str += f" • ⭐ {'+' if best_under.best_odds > 0 else ''}{best_under.best_odds} {best_under.best_book}"
             else:
                 under_odds_str = "N/A"
             
             # Build field value
-            field_value = f"**Line:** {most_common_line}\n"
+            field_value = f"**Line:** {most_common_line}" + (f" (±{prop_picks[0].line_spread})" if prop_picks[0].line_spread else "") + "\n"
             field_value += f"📈 **MORE:** {over_odds_str}\n"
             field_value += f"📉 **LESS:** {under_odds_str}\n"
             
             # Add consensus indicator
-            consensus_pct = (len([p for p in prop_picks if p['line'] == most_common_line]) / len(prop_picks)) * 100
             if consensus_pct >= 75:
                 field_value += f"✅ {int(consensus_pct)}% consensus"
             elif consensus_pct >= 50:
@@ -3648,7 +5273,7 @@ async def lines(ctx, sport: str, *, player_names: str):
             )
         
         # Add bookmakers involved
-        unique_books = list(set([book for pick in player_picks for book in pick['bookmakers']]))
+        unique_books = list(set([book for pick in player_picks for book in pick.bookmakers]))
         embed.add_field(
             name="📚 Bookmakers",
             value=", ".join(unique_books[:5]) + ("..." if len(unique_books) > 5 else ""),
@@ -3656,17 +5281,17 @@ async def lines(ctx, sport: str, *, player_names: str):
         )
         
         # Add quick recommendation
-        high_consensus = [p for p in player_picks if p['sources'] >= 3]
+        high_consensus = [p for p in player_picks if p.sources >= 3]
         if high_consensus:
-            best_pick = max(high_consensus, key=lambda x: x['avg_probability'])
-            direction = "MORE" if "over" in best_pick['pick'].lower() else "LESS"
+            best_pick = max(high_consensus, key=lambda x: x.avg_probability)
+            direction = "MORE" if "over" in best_pick.pick.lower() else "LESS"
             embed.add_field(
                 name="💡 FTC Recommendation",
-                value=f"**{direction} {best_pick['line']} {best_pick['prop_type']}**\n{best_pick['sources']} books agree • {best_pick['avg_probability']}% confidence",
+                value=f"**{direction} {best_pick.line} {best_pick.prop_type}**\n{best_pick.sources} books agree • {best_pick.avg_probability}% confidence",
                 inline=False
             )
         
-        embed.set_footer(text=f"FTC Picks • Live {sport.upper()} Lines • Just fetched from API")
+        embed.set_footer(text=f"FTC Picks • Live {sport.upper()} Lines • {format_snapshot_age(age)}")
         await ctx.send(embed=embed)
     
     # If multiple players, add combo suggestion
@@ -3681,9 +5306,9 @@ async def lines(ctx, sport: str, *, player_names: str):
         for i, player_data in enumerate(all_player_picks, 1):
             player_name = player_data['name']
             picks = player_data['picks']
-            best = max(picks, key=lambda x: x.get('sources', 0))
-            direction = "MORE" if "over" in best['pick'].lower() else "LESS"
-            combo_text += f"**{i}.** {player_name} {direction} {best['line']} {best['prop_type']}\n"
+            best = max(picks, key=lambda x: x.sources)
+            direction = "MORE" if "over" in best.pick.lower() else "LESS"
+            combo_text += f"**{i}.** {player_name} {direction} {best.line} {best.prop_type}\n"
         
         combo_embed.add_field(
             name="🔥 Suggested Parlay",
@@ -3716,6 +5341,10 @@ async def straightplays(ctx, sport: str = 'nba'):
     
     emoji = SPORT_EMOJIS.get(sport, '🎯')
     
+    # One /odds call (1 credit) that no snapshot covers - still rationed by the budget
+    if await refuse_cold_fetch(ctx, sport, cost=1):
+        return
+    
     # Fetch games with moneyline odds
     msg = await ctx.send(f"⏳ Fetching {sport.upper()} moneylines...")
     
@@ -3743,200 +5372,314 @@ async def straightplays(ctx, sport: str = 'nba'):
     }
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params, timeout=15) as resp:
-                if resp.status != 200:
-                    await msg.delete()
-                    await ctx.send(f"❌ No games available for {sport.upper()} right now.")
-                    return
-                
-                events = await resp.json()
+        session = get_http_session()
+        async with session.get(url, params=params, timeout=15) as resp:
+            record_odds_api_usage(resp, sport, 'odds')
+            flush_quota_ledger()
+            
+            if resp.status != 200:
                 await msg.delete()
+                await ctx.send(f"❌ No games available for {sport.upper()} right now.")
+                return
+            
+            events = await resp.json()
+            await msg.delete()
+            
+            if not events:
+                await ctx.send(f"❌ No games scheduled for {sport.upper()} today.")
+                return
+            
+            # Filter to only games happening TODAY (within next 24 hours)
+            now = datetime.now(timezone.utc)
+            today_games = []
+            for event in events:
+                if 'commence_time' in event:
+                    game_time = datetime.fromisoformat(event['commence_time'].replace('Z', '+00:00'))
+                    hours_until_game = (game_time - now).total_seconds() / 3600
+                    # Only show games starting within next 24 hours (and not started more than 2 hours ago)
+                    if -2 <= hours_until_game <= 24:
+                        today_games.append(event)
+            
+            if not today_games:
+                await ctx.send(f"❌ No games happening in the next 24 hours for {sport.upper()}.")
+                return
+            
+            # Index every book's moneyline once; each game is then two lookups
+            outcomes = []
+            for event in today_games[:5]:
+                parse_odds_payload(event, {}, False, outcomes)
+            index = BestLineIndex(OddsTable(outcomes))
+            
+            # Create embed for each game
+            games_shown = 0
+            for event in today_games[:5]:  # Show top 5 games TODAY
+                home_team = event.get('home_team', 'TBD')
+                away_team = event.get('away_team', 'TBD')
+                
+                # Best price, its book and every book's price per team
+                home_line = index.get(event.get('id', ''), home_team, 'h2h', 'Over', 1)
+                away_line = index.get(event.get('id', ''), away_team, 'h2h', 'Over', 1)
+                
+                if not home_line or not away_line:
+                    continue
+                
+                # Calculate averages
+                avg_home = home_line.average_odds()
+                avg_away = away_line.average_odds()
                 
-                if not events:
-                    await ctx.send(f"❌ No games scheduled for {sport.upper()} today.")
-                    return
+                # Fair (no-vig) win probability from the average prices
+                home_fair, away_fair = remove_vig(implied_probability(avg_home), implied_probability(avg_away))
+                home_prob = home_fair * 100
+                away_prob = away_fair * 100
                 
-                # Filter to only games happening TODAY (within next 24 hours)
-                now = datetime.now()
-                today_games = []
-                for event in events:
-                    if 'commence_time' in event:
+                # Determine sharp side (better value)
+                if home_line.best_odds > avg_home + 5:
+                    sharp_play = home_team
+                    sharp_odds = home_line.best_odds
+                    sharp_book = home_line.best_book
+                    sharp_line_movement = f"+{int(home_line.best_odds - avg_home)}"
+                elif away_line.best_odds > avg_away + 5:
+                    sharp_play = away_team
+                    sharp_odds = away_line.best_odds
+                    sharp_book = away_line.best_book
+                    sharp_line_movement = f"+{int(away_line.best_odds - avg_away)}"
+                else:
+                    sharp_play = home_team if avg_home > avg_away else away_team
+                    sharp_odds = avg_home if avg_home > avg_away else avg_away
+                    sharp_book = "Multiple"
+                    sharp_line_movement = "Standard"
+                
+                # Create embed
+                embed = discord.Embed(
+                    title=f"{emoji} STRAIGHT PLAY #{games_shown + 1}",
+                    description=f"🏀 **{away_team} @ {home_team}**",
+                    color=0x2ecc71
+                )
+                
+                # Best book section
+                home_odds_str = f"+{int(home_line.best_odds)}" if home_line.best_odds > 0 else str(int(home_line.best_odds))
+                away_odds_str = f"+{int(away_line.best_odds)}" if away_line.best_odds > 0 else str(int(away_line.best_odds))
+                
+                # Get game time
+                game_time_str = "TBD"
+                if event.get('commence_time'):
+                    try:
                         game_time = datetime.fromisoformat(event['commence_time'].replace('Z', '+00:00'))
-                        hours_until_game = (game_time - now).total_seconds() / 3600
-                        # Only show games starting within next 24 hours (and not started more than 2 hours ago)
-                        if -2 <= hours_until_game <= 24:
-                            today_games.append(event)
+                        hours_until = (game_time - datetime.now(timezone.utc)).total_seconds() / 3600
+                        if hours_until < 1:
+                            game_time_str = "🔴 LIVE NOW"
+                        elif hours_until < 2:
+                            game_time_str = f"⏰ Starting in {int(hours_until * 60)} min"
+                        else:
+                            game_time_str = f"⏰ Starting in {int(hours_until)} hours"
+                    except:
+                        game_time_str = "Today"
                 
-                if not today_games:
-                    await ctx.send(f"❌ No games happening in the next 24 hours for {sport.upper()}.")
-                    return
+                embed.add_field(
+                    name=f"🏠 {home_team} ML {home_odds_str}",
+                    value=f"📊 Best Book: {home_line.best_book}\n{game_time_str}",
+                    inline=True
+                )
                 
-                # Create embed for each game
-                games_shown = 0
-                for event in today_games[:5]:  # Show top 5 games TODAY
-                    home_team = event.get('home_team', 'TBD')
-                    away_team = event.get('away_team', 'TBD')
-                    
-                    if not event.get('bookmakers'):
-                        continue
-                    
-                    # Get odds from multiple books
-                    all_odds = []
-                    for bookmaker in event['bookmakers']:
-                        if 'markets' in bookmaker:
-                            for market in bookmaker['markets']:
-                                if market['key'] == 'h2h' and 'outcomes' in market:
-                                    for outcome in market['outcomes']:
-                                        all_odds.append({
-                                            'team': outcome['name'],
-                                            'odds': outcome['price'],
-                                            'book': bookmaker['title']
-                                        })
-                    
-                    if not all_odds:
-                        continue
-                    
-                    # Group by team
-                    home_odds = [o for o in all_odds if home_team in o['team']]
-                    away_odds = [o for o in all_odds if away_team in o['team']]
-                    
-                    if not home_odds or not away_odds:
-                        continue
-                    
-                    # Get best odds
-                    best_home = max(home_odds, key=lambda x: x['odds'])
-                    best_away = max(away_odds, key=lambda x: x['odds'])
-                    
-                    # Calculate averages
-                    avg_home = sum(o['odds'] for o in home_odds) / len(home_odds)
-                    avg_away = sum(o['odds'] for o in away_odds) / len(away_odds)
-                    
-                    # Calculate implied probability
-                    home_prob = odds_to_probability(avg_home)
-                    away_prob = odds_to_probability(avg_away)
-                    
-                    # Determine sharp side (better value)
-                    if best_home['odds'] > avg_home + 5:
-                        sharp_play = home_team
-                        sharp_odds = best_home['odds']
-                        sharp_book = best_home['book']
-                        sharp_line_movement = f"+{int(best_home['odds'] - avg_home)}"
-                    elif best_away['odds'] > avg_away + 5:
-                        sharp_play = away_team
-                        sharp_odds = best_away['odds']
-                        sharp_book = best_away['book']
-                        sharp_line_movement = f"+{int(best_away['odds'] - avg_away)}"
-                    else:
-                        sharp_play = home_team if avg_home > avg_away else away_team
-                        sharp_odds = avg_home if avg_home > avg_away else avg_away
-                        sharp_book = "Multiple"
-                        sharp_line_movement = "Standard"
-                    
-                    # Create embed
-                    embed = discord.Embed(
-                        title=f"{emoji} STRAIGHT PLAY #{games_shown + 1}",
-                        description=f"🏀 **{away_team} @ {home_team}**",
-                        color=0x2ecc71
-                    )
-                    
-                    # Best book section
-                    home_odds_str = f"+{int(best_home['odds'])}" if best_home['odds'] > 0 else str(int(best_home['odds']))
-                    away_odds_str = f"+{int(best_away['odds'])}" if best_away['odds'] > 0 else str(int(best_away['odds']))
-                    
-                    # Get game time
-                    game_time_str = "TBD"
-                    if event.get('commence_time'):
-                        try:
-                            game_time = datetime.fromisoformat(event['commence_time'].replace('Z', '+00:00'))
-                            hours_until = (game_time - datetime.now()).total_seconds() / 3600
-                            if hours_until < 1:
-                                game_time_str = "🔴 LIVE NOW"
-                            elif hours_until < 2:
-                                game_time_str = f"⏰ Starting in {int(hours_until * 60)} min"
-                            else:
-                                game_time_str = f"⏰ Starting in {int(hours_until)} hours"
-                        except:
-                            game_time_str = "Today"
-                    
-                    embed.add_field(
-                        name=f"🏠 {home_team} ML {home_odds_str}",
-                        value=f"📊 Best Book: {best_home['book']}\n{game_time_str}",
-                        inline=True
-                    )
-                    
-                    embed.add_field(
-                        name=f"✈️ {away_team} ML {away_odds_str}",
-                        value=f"📊 Best Book: {best_away['book']}\n{game_time_str}",
-                        inline=True
-                    )
-                    
-                    embed.add_field(name="\u200b", value="\u200b", inline=False)
-                    
-                    # Analytics section
-                    sharp_odds_str = f"+{int(sharp_odds)}" if sharp_odds > 0 else str(int(sharp_odds))
-                    confidence = "95%" if abs(best_home['odds'] - avg_home) > 10 or abs(best_away['odds'] - avg_away) > 10 else "85%"
-                    win_prob = f"{home_prob:.1f}%" if sharp_play == home_team else f"{away_prob:.1f}%"
-                    
-                    # Calculate bet size (Quarter Kelly)
-                    prob_decimal = home_prob / 100 if sharp_play == home_team else away_prob / 100
-                    implied_prob = odds_to_probability(sharp_odds) / 100
-                    edge = prob_decimal - implied_prob
-                    kelly = (prob_decimal * (sharp_odds / 100 if sharp_odds > 0 else 100 / abs(sharp_odds)) - (1 - prob_decimal)) / (sharp_odds / 100 if sharp_odds > 0 else 100 / abs(sharp_odds))
-                    quarter_kelly = kelly * 0.25
-                    bet_pct = max(1, min(5, quarter_kelly * 100))  # 1-5% of bankroll
-                    
-                    analytics = f"""📊 **Analytics**
+                embed.add_field(
+                    name=f"✈️ {away_team} ML {away_odds_str}",
+                    value=f"📊 Best Book: {away_line.best_book}\n{game_time_str}",
+                    inline=True
+                )
+                
+                embed.add_field(name="\u200b", value="\u200b", inline=False)
+                
+                # Analytics section
+                sharp_odds_str = f"+{int(sharp_odds)}" if sharp_odds > 0 else str(int(sharp_odds))
+                confidence = "95%" if abs(home_line.best_odds - avg_home) > 10 or abs(away_line.best_odds - avg_away) > 10 else "85%"
+                win_prob = f"{home_prob:.1f}%" if sharp_play == home_team else f"{away_prob:.1f}%"
+                
+                # Calculate bet size (Quarter Kelly)
+                prob_decimal = home_fair if sharp_play == home_team else away_fair
+                edge = prob_decimal - implied_probability(sharp_odds)
+                quarter_kelly = kelly_fraction(prob_decimal, sharp_odds) * 0.25
+                bet_pct = max(1, min(5, quarter_kelly * 100))  # 1-5% of bankroll
+                
+                analytics = f"""📊 **Analytics**
 EV: {edge*100:.1f}% | Grade: A+
 Win Prob: {win_prob} | Confidence: {confidence}
 Bet Size: {bet_pct:.1f}% ≈ ${int(bet_pct * 10)} (Quarter Kelly, $1000 bankroll)"""
-                    
-                    embed.add_field(
-                        name="📊 Analytics",
-                        value=analytics,
-                        inline=False
-                    )
-                    
-                    # Line value
-                    embed.add_field(
-                        name="💰 Line Value",
-                        value=f"Sharp Line: {sharp_line_movement} ({sharp_book})\nBest Line: {sharp_odds_str} @ {sharp_book}",
-                        inline=False
-                    )
-                    
-                    # Why this wins
-                    reasons = []
-                    if home_prob > 55:
-                        reasons.append(f"• [Opponent] {home_team} allows {random.randint(105, 120)} DRtg ({random.randint(20, 30)}th)")
-                    else:
-                        reasons.append(f"• [Opponent] {away_team} allows {random.randint(105, 120)} DRtg ({random.randint(20, 30)}th)")
-                    
-                    reasons.append(f"• [Market] Line movement to {sharp_odds_str} suggests value")
-                    reasons.append(f"• [Market] {sharp_odds_str} projects value as market")
-                    
-                    embed.add_field(
-                        name="🔥 Why This Wins",
-                        value="\n".join(reasons),
-                        inline=False
-                    )
-                    
-                    embed.set_footer(text=f"FTC Picks • {sport.upper()} Straight Plays")
-                    embed.timestamp = datetime.now()
-                    
-                    await ctx.send(embed=embed)
-                    games_shown += 1
-                    
-                    if games_shown >= 3:
-                        break
                 
-                if games_shown == 0:
-                    await ctx.send(f"❌ No quality moneyline plays found for {sport.upper()} right now.")
+                embed.add_field(
+                    name="📊 Analytics",
+                    value=analytics,
+                    inline=False
+                )
+                
+                # Line value
+                embed.add_field(
+                    name="💰 Line Value",
+                    value=f"Sharp Line: {sharp_line_movement} ({sharp_book})\nBest Line: {sharp_odds_str} @ {sharp_book}",
+                    inline=False
+                )
+                
+                # Why this wins
+                reasons = []
+                if home_prob > 55:
+                    reasons.append(f"• [Opponent] {home_team} allows {random.randint(105, 120)} DRtg ({random.randint(20, 30)}th)")
+                else:
+                    reasons.append(f"• [Opponent] {away_team} allows {random.randint(105, 120)} DRtg ({random.randint(20, 30)}th)")
+                
+                reasons.append(f"• [Market] Line movement to {sharp_odds_str} suggests value")
+                reasons.append(f"• [Market] {sharp_odds_str} projects value as market")
+                
+                embed.add_field(
+                    name="🔥 Why This Wins",
+                    value="\n".join(reasons),
+                    inline=False
+                )
+                
+                embed.set_footer(text=f"FTC Picks • {sport.upper()} Straight Plays")
+                embed.timestamp = datetime.now()
+                
+                await ctx.send(embed=embed)
+                games_shown += 1
+                
+                if games_shown >= 3:
+                    break
+            
+            if games_shown == 0:
+                await ctx.send(f"❌ No quality moneyline plays found for {sport.upper()} right now.")
     
     except Exception as e:
         await msg.delete()
         await ctx.send(f"❌ Error fetching {sport.upper()} moneylines: {str(e)}")
         print(f"Straightplays error: {e}")
 
+@bot.command()
+@is_premium_or_cooldown('arbs')
+async def arbs(ctx, sport: str = None):
+    """Arbitrage and middle opportunities across sportsbooks
+    
+    Usage: !arbs        (all sports)
+           !arbs nba    (one sport)
+    """
+    
+    if sport:
+        sport = sport.lower()
+        if sport not in picks_data:
+            await ctx.send(f"❌ Sport **{sport}** not supported. Use: {', '.join(picks_data.keys())}")
+            return
+        found = opportunities.get(sport, [])
+    else:
+        # Each sport's list is already ranked, so only their heads compete
+        found = heapq.nlargest(ARB_RESULTS_LIMIT, [o for ranked in opportunities.values() for o in ranked],
+                               key=lambda o: (o.guaranteed_return, o.middle_return or 0))
+    
+    label = sport.upper() if sport else "ALL SPORTS"
+    if not found:
+        await ctx.send(f"❌ No arbitrage or middles found for {label} in the current lines.")
+        return
+    
+    arb_count = sum(1 for o in found if o.kind == 'arb')
+    embed = discord.Embed(
+        title=f"💱 ARBS & MIDDLES - {label}",
+        description=f"`{arb_count}` arbs • `{len(found) - arb_count}` middles • ranked by guaranteed return",
+        color=0x1abc9c
+    )
+    
+    for i, opp in enumerate(found[:8], 1):
+        emoji = SPORT_EMOJIS.get(opp.sport, '🎯')
+        legs = ""
+        for best, stake in opp.legs:
+            odds_str = f"+{best.best_odds}" if best.best_odds > 0 else str(best.best_odds)
+            side = best.player if opp.kind == 'arb' and best.player != opp.player else f"{best.pick} {best.line}"
+            legs += f"   ╰ {side} `{odds_str}` @ {best.best_book} • stake {stake * 100:.1f}%\n"
+        
+        if opp.kind == 'arb':
+            name = f"{emoji} {i}. 🔒 ARB {opp.guaranteed_return * 100:+.2f}% • {opp.player} {opp.prop_type}"
+        else:
+            low, high = opp.legs[0][0].line, opp.legs[1][0].line
+            name = f"{emoji} {i}. 🎯 MIDDLE {low}-{high} • {opp.player} {opp.prop_type}"
+            legs += f"   ╰ Worst case `{opp.guaranteed_return * 100:+.2f}%` • lands `{opp.middle_return * 100:+.1f}%`\n"
+        
+        embed.add_field(name=name[:256], value=f"{opp.game}\n{legs}", inline=False)
+    
+    embed.set_footer(text="FTC Picks • Stakes are % of your total outlay • Lines move fast, confirm before betting")
+    await ctx.send(embed=embed)
+
+@bot.command()
+@is_premium_or_cooldown('movement')
+async def movement(ctx, sport: str = 'nba', *, player_name: str = None):
+    """Real line movement since open, from the odds history
+    
+    Usage: !movement nba              (biggest moves on the board)
+           !movement nba luka doncic  (every book for one player)
+    """
+    
+    sport = sport.lower()
+    if sport not in picks_data:
+        await ctx.send(f"❌ Sport **{sport}** not supported. Use: {', '.join(picks_data.keys())}")
+        return
+    
+    if not snapshot_is_usable(sport):
+        await ctx.send(f"❌ No {sport.upper()} lines tracked yet. Try again after the next refresh.")
+        return
+    
+    emoji = SPORT_EMOJIS.get(sport, '🎯')
+    
+    if player_name:
+        search = player_index.get(sport)
+        matches = search.match(player_name) if search else []
+        if not matches:
+            suggestions = search.suggest(player_name, 3) if search else []
+            hint = f"\n\n**Did you mean:** {', '.join(suggestions)}" if suggestions else ""
+            await ctx.send(f"❌ No lines found for **{player_name}** in {sport.upper()}{hint}")
+            return
+        
+        player = matches[0]
+        table = odds_tables.get(sport)
+        rows = await db.read(load_line_movement, sport, table.events if table else None, player)
+        
+        embed = discord.Embed(
+            title=f"{emoji} {player} - Line Movement",
+            description=f"Opening → current price at every book • {sport.upper()}",
+            color=0x3498db
+        )
+        
+        by_market = defaultdict(list)
+        for row in rows:
+            by_market[(row[1], row[2])].append(row)
+        
+        for (prop_type, side), books in list(by_market.items())[:10]:
+            field_value = ""
+            for _, _, _, book, open_line, open_price, _, line, price, _ in books[:6]:
+                open_str = f"{open_line:g} {'+' if open_price > 0 else ''}{open_price}"
+                now_str = f"{line:g} {'+' if price > 0 else ''}{price}"
+                arrow = "→" if (open_line, open_price) != (line, price) else "="
+                field_value += f"**{book}:** {open_str} {arrow} {now_str}\n"
+            embed.add_field(name=f"📈 {prop_type} {side}", value=field_value, inline=True)
+        
+        if not by_market:
+            embed.add_field(name="📈 No history yet", value="This player's lines haven't been recorded yet.", inline=False)
+    else:
+        moves = [m for m in await current_line_movement(sport) if m['line_move'] or m['probability_move']]
+        
+        embed = discord.Embed(
+            title=f"{emoji} Biggest Line Moves - {sport.upper()}",
+            description="Average of every book's opening vs current number",
+            color=0x3498db
+        )
+        
+        if not moves:
+            embed.add_field(name="📈 Quiet Board", value="No lines have moved since they opened.", inline=False)
+        
+        text = ""
+        for i, move in enumerate(moves[:8], 1):
+            direction = "📈" if move['probability_move'] > 0 else "📉"
+            text += f"{direction} **{i}.** {move['player']} {move['side']} {move['prop_type']}\n"
+            text += f"   ╰ {format_line_move(move)} • {move['books']} books\n"
+        if text:
+            embed.add_field(name="🔥 Steam & Drift", value=text[:1024], inline=False)
+    
+    embed.set_footer(text=f"FTC Picks • {sport.upper()} Line Movement • {format_snapshot_age(snapshot_age(sport))}")
+    await ctx.send(embed=embed)
+
 # === AI CHAT COMMAND ===
 
 @bot.command(aliases=['chat', 'ai', 'ask'])
@@ -3959,7 +5702,14 @@ async def aichat(ctx, *, question: str):
                     detected_sport = sport
                     break
             
-            # If no sport detected, check for team/player mentions
+            # If no sport detected, look for a player on today's boards
+            if not detected_sport:
+                for sport, search in player_index.items():
+                    if search.mentions(question):
+                        detected_sport = sport
+                        break
+            
+            # Still nothing - check for team/player mentions
             if not detected_sport:
                 # Check for NBA terms
                 if any(word in question_lower for word in ['luka', 'lebron', 'steph', 'curry', 'lakers', 'warriors', 'points', 'rebounds', 'assists', '3ptm', 'threes']):
@@ -3968,20 +5718,21 @@ async def aichat(ctx, *, question: str):
                 elif any(word in question_lower for word in ['mahomes', 'allen', 'chiefs', 'bills', 'passing', 'rushing', 'touchdown']):
                     detected_sport = 'nfl'
             
-            # Get current picks data if sport detected - ALWAYS FETCH FRESH
+            # Get current picks data if sport detected (stale-while-revalidate snapshot)
             live_data_context = ""
             actual_players = []
             if detected_sport:
-                # ALWAYS fetch fresh data
-                picks_data[detected_sport] = await aggregate_picks(detected_sport)
-                picks = picks_data[detected_sport]
+                picks, age = await get_snapshot(detected_sport)
                 
                 if picks:
                     # Build context from ALL picks with game times
                     live_data_context = f"\n\n**LIVE {detected_sport.upper()} DATA - USE ONLY THESE PLAYERS (Playing TODAY):**\n"
-                    for pick in picks[:15]:  # Top 15 picks
-                        live_data_context += f"• {pick['player']}: {pick['prop_type']} line {pick['line']} ({pick['pick']}) at {pick['avg_odds']} odds, {pick['sources']} books, {pick['game']}\n"
-                        actual_players.append(pick['player'])
+                    # Players the question names go first, then the top 15 picks
+                    search = player_index.get(detected_sport)
+                    asked_about = [p for name in (search.mentions(question) if search else []) for p in search.picks[name]][:10]
+                    for pick in asked_about + [p for p in picks[:15] if p not in asked_about]:
+                        live_data_context += f"• {pick.player}: {pick.prop_type} line {pick.line} ({pick.pick}) at {pick.avg_odds} odds, {pick.sources} books, {pick.game}\n"
+                        actual_players.append(pick.player)
                     
                     live_data_context += f"\n**CRITICAL: ONLY use players from the list above. These are the ONLY players with games TODAY. DO NOT make up other players.**\n"
                 else:
@@ -4112,7 +5863,7 @@ NEVER:
             if detected_sport and picks:
                 embed.add_field(
                     name="📊 Data Source",
-                    value=f"Using live {detected_sport.upper()} betting data from {len(picks)} current picks",
+                    value=f"Using live {detected_sport.upper()} betting data from {len(picks)} current picks ({format_snapshot_age(age)})",
                     inline=False
                 )
             
@@ -4300,21 +6051,21 @@ async def commands(ctx):
     # Premium pick commands
     embed.add_field(
         name="🎯 PICK COMMANDS",
-        value="`!predict <sport>` - Get picks (nba/nfl/mlb/nhl/soccer/tennis/mma/csgo/cs2/lol/dota2)\n`!locks` - High confidence picks across all sports\n`!potd` - Pick of the day\n`!straightplays <sport>` - Moneyline plays with analytics\n`!compare <player>` - Compare odds for specific player\n`!value <sport>` - Find value bets\n\n⏰ **Trial:** 3 hour cooldown\n⏰ **Premium:** 2 hour cooldown",
+        value=f"`!predict <sport>` - Get picks (nba/nfl/mlb/nhl/soccer/tennis/mma/csgo/cs2/lol/dota2)\n`!locks` - High confidence picks across all sports\n`!potd` - Pick of the day\n`!straightplays <sport>` - Moneyline plays with analytics\n`!compare <player>` - Compare odds for specific player\n`!value <sport>` - Find value bets\n\n⏰ **Trial:** {describe_rate_limit('trial')}\n⏰ **Premium:** {describe_rate_limit('premium')}",
         inline=False
     )
     
     # New premium features
     embed.add_field(
         name="💎 PREMIUM FEATURES",
-        value="`!parlay [2-6]` - Auto-build parlays from best picks\n`!mystats` - View your betting record & stats\n`!bankroll set <amount>` - Track your bankroll\n`!trends <player>` - Player trends & analysis\n`!injuries <sport>` - Today's injury reports\n`!calc <odds> <bet>` - Betting calculator\n`!notify <sport>` - Toggle pick notifications\n\n⏰ **Trial:** 4 hour cooldown\n⏰ **Premium:** 2 hour cooldown",
+        value=f"`!parlay [2-6]` - Auto-build parlays from best picks\n`!mystats` - View your betting record & stats\n`!bankroll set <amount>` - Track your bankroll\n`!trends <player>` - Player trends & analysis\n`!injuries <sport>` - Today's injury reports\n`!calc <odds> <bet>` - Betting calculator\n`!notify <sport>` - Toggle pick notifications\n\n⏰ **Trial:** {describe_rate_limit('trial')}\n⏰ **Premium:** {describe_rate_limit('premium')}",
         inline=False
     )
     
     # Advanced analysis
     embed.add_field(
         name="🤖 ADVANCED ANALYSIS",
-        value="`!analyze <sport> <player>` - Deep AI pick analysis with reasoning\n`!matchup <sport>` - Head-to-head game breakdown\n`!sharp <sport>` - Track sharp money movement\n`!model <sport>` - AI model predictions & expected value\n`!hit <sport> <line> <prop> <player>` - Player prop hit rate tracker\n`!lines <sport> <player>` - Get current betting lines for player(s)\n\n⏰ **Trial:** 4 hour cooldown\n⏰ **Premium:** 2 hour cooldown",
+        value=f"`!analyze <sport> <player>` - Deep AI pick analysis with reasoning\n`!matchup <sport>` - Head-to-head game breakdown\n`!sharp <sport>` - Track sharp money movement\n`!model <sport>` - AI model predictions & expected value\n`!hit <sport> <line> <prop> <player>` - Player prop hit rate tracker\n`!lines <sport> <player>` - Get current betting lines for player(s)\n`!arbs [sport]` - Arbitrage & middles across books\n`!movement <sport> [player]` - Real line movement since open\n\n⏰ **Trial:** {describe_rate_limit('trial')}\n⏰ **Premium:** {describe_rate_limit('premium')}",
         inline=False
     )
     
@@ -4361,7 +6112,7 @@ async def help_bot(ctx):
     
     embed.add_field(
         name="💎 Premium Commands",
-        value="`!predict <sport>` - Get picks for any sport\n`!locks` - High confidence picks\n`!potd` - Pick of the day\n`!compare <player>` - Compare odds for a player\n`!value <sport>` - Find value bets\n\n⏰ Trial users: 1 use per 3 hours\n👑 Premium users: 2 uses per hour",
+        value=f"`!predict <sport>` - Get picks for any sport\n`!locks` - High confidence picks\n`!potd` - Pick of the day\n`!compare <player>` - Compare odds for a player\n`!value <sport>` - Find value bets\n\n⏰ Trial users: {describe_rate_limit('trial')}\n👑 Premium users: {describe_rate_limit('premium')}",
         inline=False
     )
     
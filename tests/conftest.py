@@ -0,0 +1,10 @@
+"""Shared test setup: import the bot against a throwaway working directory"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Importing the bot opens premium_users.db relative to the working directory
+os.chdir(tempfile.mkdtemp(prefix='ftc-tests-'))
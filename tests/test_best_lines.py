@@ -0,0 +1,47 @@
+import prizepicks_updated as pp
+
+
+def outcome(price, book, pick='Over', line=24.5, player='Luka Doncic', event_id='e1'):
+    return pp.Outcome(player, 'Points', line, pick, price, book, 'A vs B', event_id, 'player_points')
+
+
+def build_index():
+    return pp.BestLineIndex(pp.OddsTable([
+        outcome(-115, 'DraftKings'),
+        outcome(-105, 'FanDuel'),
+        outcome(-105, 'BetMGM'),  # Ties keep row order
+        outcome(-120, 'DraftKings', pick='Under'),
+        outcome(110, 'Caesars', line=26.5),
+        outcome(-110, 'DraftKings', player='LeBron James'),
+    ]))
+
+
+def test_best_price_and_every_books_price_per_quote():
+    best = build_index().get('e1', 'Luka Doncic', 'Points', 'Over', 24.5)
+
+    assert (best.best_odds, best.best_book) == (-105, 'FanDuel')
+    assert best.prices == (('FanDuel', -105), ('BetMGM', -105), ('DraftKings', -115))
+    assert best.average_odds() == (-105 - 105 - 115) / 3
+
+
+def test_quotes_are_keyed_by_side_line_and_event():
+    index = build_index()
+
+    assert len(index) == 4
+    assert index.get('e1', 'Luka Doncic', 'Points', 'Under', 24.5).best_book == 'DraftKings'
+    assert index.get('e1', 'Luka Doncic', 'Points', 'Over', 26.5).best_odds == 110
+    assert index.get('e2', 'Luka Doncic', 'Points', 'Over', 24.5) is None
+
+
+def test_by_player_keeps_first_seen_order():
+    index = build_index()
+    assert [(b.pick, b.line) for b in index.by_player['Luka Doncic']] == [('Over', 24.5), ('Under', 24.5), ('Over', 26.5)]
+    assert list(index.by_player) == ['Luka Doncic', 'LeBron James']
+
+
+def test_best_of_picks_the_best_payout():
+    index = build_index()
+    picks = [outcome(0, '', line=24.5), outcome(0, '', line=26.5), outcome(0, '', line=99.5)]
+
+    assert index.best_of(picks).best_odds == 110
+    assert index.best_of([outcome(0, '', line=99.5)]) is None
@@ -0,0 +1,97 @@
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import prizepicks_updated as pp
+
+
+@pytest.fixture
+def old_db(tmp_path, monkeypatch):
+    """A database from before the versioned migrations (user_version 0)"""
+    path = str(tmp_path / 'old.db')
+    monkeypatch.setattr(pp, 'DB_PATH', path)
+    conn = sqlite3.connect(path)
+    conn.execute('''CREATE TABLE premium_users
+                    (user_id INTEGER PRIMARY KEY, username TEXT, subscription_start TEXT, subscription_end TEXT,
+                     status TEXT, payment_method TEXT, transaction_id TEXT, trial_used INTEGER DEFAULT 0)''')
+    conn.execute('''CREATE TABLE command_cooldowns
+                    (user_id INTEGER PRIMARY KEY, predict_count INTEGER DEFAULT 0, predict_reset_time INTEGER,
+                     locks_count INTEGER DEFAULT 0, locks_reset_time INTEGER)''')
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def subscribe(conn, user_id, days_left):
+    end = (datetime.now() + timedelta(days=days_left)).isoformat()
+    conn.execute("INSERT INTO premium_users (user_id, subscription_end, status) VALUES (?, ?, 'active')", (user_id, end))
+
+
+def migrate(conn):
+    conn.commit()
+    pp.init_db()
+    pp.migrate_db()
+    return {
+        (user_id, bucket): (spent, updated_at)
+        for user_id, bucket, spent, updated_at in conn.execute("SELECT user_id, bucket, spent, updated_at FROM rate_limit_buckets")
+    }
+
+
+def test_v1_then_v2_carries_open_windows_into_buckets(old_db):
+    now = int(time.time())
+    subscribe(old_db, 1, days_left=30)
+    old_db.executemany("INSERT INTO command_cooldowns VALUES (?, ?, ?, ?, ?)", [
+        (1, 2, now + 3000, 1, now - 5),  # Premium, locked out of predict; locks window already over
+        (2, 1, now + 9000, 0, None),  # Trial, locked out of predict
+    ])
+    buckets = migrate(old_db)
+
+    assert old_db.execute("PRAGMA user_version").fetchone() == (len(pp.SCHEMA_MIGRATIONS),)
+    tables = {name for (name,) in old_db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert 'command_cooldowns' not in tables and 'command_usage' not in tables
+
+    # Spent never exceeds the bucket, dated from the old window's start
+    assert set(buckets) == {(1, 'predict'), (2, 'predict')}
+    assert buckets[(1, 'predict')] == (pp.RATE_LIMITS['premium'][0], now + 3000 - 3600)
+    assert buckets[(2, 'predict')] == (1, now + 9000 - pp.FREE_USER_COOLDOWN_HOURS * 3600)
+
+
+def test_migrated_users_are_never_locked_out_past_their_old_reset(old_db):
+    now = int(time.time())
+    subscribe(old_db, 1, days_left=30)
+    old_db.executemany("INSERT INTO command_cooldowns VALUES (?, ?, ?, ?, ?)", [
+        (1, 2, now + 3000, 0, None),
+        (2, 1, now + 9000, 0, None),
+    ])
+    buckets = migrate(old_db)
+
+    limiter = pp.RateLimiter()
+    for (user_id, bucket), (spent, updated_at) in buckets.items():
+        limiter.load(user_id, [(bucket, spent, updated_at)])
+    assert limiter.check(1, 'predict', 'premium', consume=False, now=now).retry_after <= 3000
+    assert limiter.check(2, 'predict', 'trial', consume=False, now=now).retry_after == pytest.approx(9000)
+
+
+def test_migrations_run_once(old_db):
+    migrate(old_db)
+    old_db.execute("INSERT INTO rate_limit_buckets VALUES (5, 'value', 1, 0)")
+    old_db.commit()
+
+    pp.migrate_db()
+    assert old_db.execute("SELECT COUNT(*) FROM rate_limit_buckets").fetchone() == (1,)
+    assert old_db.execute("PRAGMA user_version").fetchone() == (len(pp.SCHEMA_MIGRATIONS),)
+
+
+def test_failed_migration_rolls_back(old_db, monkeypatch):
+    def broken(c):
+        c.execute("CREATE TABLE half_done (x)")
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(pp, 'SCHEMA_MIGRATIONS', [broken])
+    old_db.commit()
+    pp.migrate_db()
+
+    assert old_db.execute("PRAGMA user_version").fetchone() == (0,)
+    assert old_db.execute("SELECT name FROM sqlite_master WHERE name = 'half_done'").fetchall() == []
@@ -0,0 +1,87 @@
+import sqlite3
+
+import pytest
+
+import prizepicks_updated as pp
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    monkeypatch.setattr(pp, 'DB_PATH', str(tmp_path / 'history.db'))
+    monkeypatch.setattr(pp, '_history_market_ids', {})
+    monkeypatch.setattr(pp, '_history_last_values', {})
+    monkeypatch.setattr(pp, '_history_loaded_sports', set())
+    monkeypatch.setattr(pp, '_history_last_prune', 0)
+    pp.init_db()
+    conn = sqlite3.connect(pp.DB_PATH)
+    yield conn
+    conn.close()
+
+
+def table(*quotes):
+    return pp.OddsTable([
+        pp.Outcome('Luka Doncic', 'Points', line, pick, price, book, 'A vs B', 'e1', 'player_points')
+        for pick, line, price, book in quotes
+    ])
+
+
+def record(conn, snapshot, now):
+    count = pp.record_odds_history(conn.cursor(), 'nba', snapshot, now=now)
+    conn.commit()
+    return count
+
+
+def test_only_moved_series_are_written(conn):
+    start = 1_000_000
+    assert record(conn, table(('Over', 24.5, -110, 'DraftKings'), ('Over', 24.5, -115, 'FanDuel')), start) == 2
+    assert record(conn, table(('Over', 24.5, -110, 'DraftKings'), ('Over', 24.5, -115, 'FanDuel')), start + 60) == 0
+    assert record(conn, table(('Over', 25.5, -110, 'DraftKings'), ('Over', 24.5, -115, 'FanDuel')), start + 120) == 1
+
+    assert conn.execute("SELECT COUNT(*) FROM odds_history_markets").fetchone() == (2,)
+    assert conn.execute("SELECT COUNT(*) FROM odds_history").fetchone() == (3,)
+
+
+def test_series_state_is_reloaded_after_a_restart(conn, monkeypatch):
+    start = 1_000_000
+    record(conn, table(('Over', 24.5, -110, 'DraftKings')), start)
+
+    monkeypatch.setattr(pp, '_history_market_ids', {})
+    monkeypatch.setattr(pp, '_history_last_values', {})
+    monkeypatch.setattr(pp, '_history_loaded_sports', set())
+    assert record(conn, table(('Over', 24.5, -110, 'DraftKings')), start + 60) == 0
+
+
+def test_line_movement_reports_opening_and_current(conn):
+    start = 1_000_000
+    record(conn, table(('Over', 24.5, -110, 'DraftKings')), start)
+    record(conn, table(('Over', 24.5, -130, 'DraftKings')), start + 600)
+    record(conn, table(('Over', 25.5, -120, 'DraftKings')), start + 1200)
+
+    [row] = pp.load_line_movement(conn.cursor(), 'nba')
+    assert row == ('Luka Doncic', 'Points', 'Over', 'DraftKings', 24.5, -110, start, 25.5, -120, start + 1200)
+
+    # Opening is the value in force at `since`
+    [row] = pp.load_line_movement(conn.cursor(), 'nba', player='Luka Doncic', since=start + 900)
+    assert row[4:7] == (24.5, -130, start + 600)
+    assert pp.load_line_movement(conn.cursor(), 'nba', event_ids=['other']) == []
+
+
+def test_old_history_is_pruned(conn):
+    start = 1_000_000
+    record(conn, table(('Over', 24.5, -110, 'DraftKings')), start)
+    record(conn, table(('Over', 24.5, -110, 'FanDuel')), start + (pp.ODDS_HISTORY_DAYS + 1) * 86400)
+
+    assert conn.execute("SELECT book FROM odds_history_markets").fetchall() == [('FanDuel',)]
+
+
+def test_summarize_line_movement_averages_books():
+    rows = [
+        ('Luka Doncic', 'Points', 'Over', 'DraftKings', 24.5, -110, 100, 25.5, -130, 200),
+        ('Luka Doncic', 'Points', 'Over', 'FanDuel', 24.5, -110, 50, 24.5, -110, 200),
+    ]
+    [move] = pp.summarize_line_movement(rows)
+
+    assert move['books'] == 2
+    assert move['line_move'] == pytest.approx(0.5)
+    assert move['opened_at'] == 50
+    assert move['probability_move'] == pytest.approx((130 / 230 - 110 / 210) / 2 * 100)
@@ -0,0 +1,64 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+import prizepicks_updated as pp
+
+
+def test_american_decimal_round_trip():
+    assert pp.american_to_decimal(150) == 2.5
+    assert pp.american_to_decimal(-200) == 1.5
+    assert pp.american_to_decimal(100) == 2.0
+    assert pp.decimal_to_american(2.5) == pytest.approx(150)
+    assert pp.decimal_to_american(1.5) == pytest.approx(-200)
+    assert pp.decimal_to_american(2.0) == pytest.approx(100)
+
+
+def test_scalars_in_scalars_out_arrays_in_arrays_out():
+    assert isinstance(pp.american_to_decimal(-110), float)
+    assert isinstance(pp.implied_probability(-110), float)
+
+    odds = np.array([-110, 150, -200])
+    decimals = pp.american_to_decimal(odds)
+    assert isinstance(decimals, np.ndarray)
+    np.testing.assert_allclose(pp.decimal_to_american(decimals), odds)
+
+
+def test_probabilities_and_payouts():
+    assert pp.implied_probability(-110) == pytest.approx(110 / 210)
+    assert pp.odds_to_probability(100) == pytest.approx(50)
+    assert pp.net_payout(150, 100) == pytest.approx(150)
+    assert pp.net_payout(-200, 100) == pytest.approx(50)
+
+
+def test_remove_vig_normalizes_a_two_way_market():
+    over, under = pp.remove_vig(pp.implied_probability(-110), pp.implied_probability(-110))
+    assert (over, under) == (pytest.approx(0.5), pytest.approx(0.5))
+
+    over, under = pp.remove_vig(np.array([0.6, 0.5]), np.array([0.5, 0.5]))
+    np.testing.assert_allclose(over + under, [1, 1])
+
+
+def test_expected_value_and_kelly():
+    assert pp.expected_value(0.5, 100) == pytest.approx(0)
+    assert pp.expected_value(0.6, 100, stake=10) == pytest.approx(2)
+    assert pp.kelly_fraction(0.6, 100) == pytest.approx(0.2)
+    assert pp.kelly_fraction(0.4, 100) < 0
+
+
+def test_parlay_decimal_multiplies_legs():
+    assert pp.parlay_decimal([100, 100]) == pytest.approx(4)
+    assert pp.parlay_decimal([-110, -110, -110]) == pytest.approx((210 / 110) ** 3)
+
+
+def test_consensus_picks_price_mixed_sign_books_sanely():
+    def outcome(price, book):
+        return pp.Outcome('Connor McDavid', 'Points', 1.5, 'Over', price, book, 'A vs B', 'e1', 'player_points')
+
+    table = pp.OddsTable([outcome(-150, 'DraftKings'), outcome(130, 'FanDuel')])
+    [pick] = asyncio.run(pp.aggregate_picks('nhl', table))
+
+    assert pick.avg_odds == -102
+    assert pick.decimal_odds == pytest.approx((1 + 100 / 150 + 2.3) / 2)
+    assert (pick.best_odds, pick.best_book) == (130, 'FanDuel')
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+import prizepicks_updated as pp
+
+
+def outcome(price, book, pick='Over', line=24.5, player='Luka Doncic', event_id='e1', market='player_points'):
+    return pp.Outcome(player, 'Points', line, pick, price, book, 'A vs B', event_id, market)
+
+
+def test_consensus_averages_mixed_sign_prices_as_payouts():
+    table = pp.OddsTable([outcome(-150, 'DraftKings'), outcome(130, 'FanDuel')])
+    groups = table.consensus()
+
+    # (1.667 + 2.3) / 2, not the American mean of -10
+    assert groups['mean_decimal'][0] == pytest.approx((1 + 100 / 150 + 2.3) / 2)
+    assert round(groups['mean_price'][0]) == -102
+
+
+def test_consensus_at_even_money_stays_finite():
+    groups = pp.OddsTable([outcome(-110, 'DraftKings'), outcome(110, 'FanDuel')]).consensus()
+
+    assert np.isfinite(groups['mean_decimal']).all()
+    assert round(groups['mean_price'][0]) == 100
+
+
+def test_consensus_groups_by_side_and_line_and_drops_thin_groups():
+    table = pp.OddsTable([
+        outcome(-110, 'DraftKings'),
+        outcome(-120, 'FanDuel'),
+        outcome(-105, 'BetMGM', line=25.5),  # Only one book at this line
+        outcome(-110, 'DraftKings', pick='Under'),
+        outcome(-100, 'FanDuel', pick='Under'),
+    ])
+    groups = table.consensus(min_sources=2)
+
+    assert [table.outcomes[row].pick for row in groups['first_row']] == ['Over', 'Under']
+    assert groups['sources'].tolist() == [2, 2]
+    # Best payout per group, first on ties
+    assert [table.outcomes[row].bookmaker for row in groups['best_row']] == ['DraftKings', 'FanDuel']
+    assert [table.books[code] for code in groups['book_codes'][0].tolist()] == ['DraftKings', 'FanDuel']
+
+
+def test_fair_probability_removes_each_books_vig():
+    table = pp.OddsTable([
+        outcome(-110, 'DraftKings'),
+        outcome(-110, 'DraftKings', pick='Under'),
+        outcome(-150, 'FanDuel'),
+        outcome(130, 'FanDuel', pick='Under'),
+        outcome(-120, 'BetMGM'),  # No Under quoted - keeps its raw implied probability
+    ])
+    fair = table.fair_probability()
+
+    assert fair[0] == pytest.approx(0.5)
+    assert fair[0] + fair[1] == pytest.approx(1)
+    assert fair[2] + fair[3] == pytest.approx(1)
+    assert fair[2] == pytest.approx((150 / 250) / (150 / 250 + 100 / 230))
+    assert fair[4] == pytest.approx(120 / 220)
+
+
+def test_moneyline_sides_pair_across_teams():
+    table = pp.OddsTable([
+        outcome(150, 'DraftKings', player='A', market='h2h', line=1),
+        outcome(-170, 'DraftKings', player='B', market='h2h', line=1),
+    ])
+    fair = table.fair_probability()
+    assert fair.sum() == pytest.approx(1)
+
+
+def test_line_stats_reports_modal_line_and_agreement():
+    table = pp.OddsTable([
+        outcome(-110, 'DraftKings', line=24.5),
+        outcome(-110, 'FanDuel', line=24.5),
+        outcome(-110, 'BetMGM', line=25.5),
+        outcome(-110, 'Caesars', line=25.5, pick='Under'),
+    ])
+    market_of_row, modal_line, line_spread, line_agreement = table.line_stats()
+
+    assert market_of_row.tolist() == [0, 0, 0, 0]
+    assert modal_line.tolist() == [24.5]  # Tie between 24.5 and 25.5 goes to the lower line
+    assert line_agreement.tolist() == [50]
+    assert line_spread[0] == pytest.approx(0.5)
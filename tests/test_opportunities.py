@@ -0,0 +1,90 @@
+import pytest
+
+import prizepicks_updated as pp
+
+
+def quote(pick, line, odds, book, player='Luka Doncic', prop_type='Points'):
+    return pp.BestLine('e1', 'A vs B', player, prop_type, pick, line, [(book, odds)])
+
+
+def scan(quotes):
+    found = []
+    pp.scan_prop_market('nba', quotes, found)
+    return found
+
+
+def test_leg_stakes_equalize_payouts():
+    stakes, guaranteed = pp.leg_stakes([2.1, 2.05])
+
+    assert sum(stakes) == pytest.approx(1)
+    assert stakes[0] * 2.1 == pytest.approx(stakes[1] * 2.05)
+    assert guaranteed == pytest.approx(1 / (1 / 2.1 + 1 / 2.05) - 1)
+
+
+def test_same_line_arb():
+    [arb] = scan([quote('Over', 24.5, 110, 'DraftKings'), quote('Under', 24.5, 105, 'FanDuel')])
+
+    assert arb.kind == 'arb'
+    assert [leg.best_book for leg, _ in arb.legs] == ['DraftKings', 'FanDuel']
+    assert arb.guaranteed_return == pytest.approx(1 / (1 / 2.1 + 1 / 2.05) - 1)
+
+
+def test_no_arb_when_the_market_holds_vig():
+    assert scan([quote('Over', 24.5, -110, 'DraftKings'), quote('Under', 24.5, -110, 'FanDuel')]) == []
+
+
+def test_same_line_arb_does_not_hide_a_higher_line_middle():
+    found = scan([
+        quote('Over', 24.5, 110, 'DraftKings'),
+        quote('Under', 24.5, 105, 'FanDuel'),
+        quote('Under', 26.5, -102, 'BetMGM'),
+    ])
+    kinds = {o.kind: o for o in found}
+
+    assert set(kinds) == {'arb', 'middle'}
+    middle = kinds['middle']
+    assert [leg.line for leg, _ in middle.legs] == [24.5, 26.5]
+    assert middle.guaranteed_return == pytest.approx(0.0192, abs=1e-4)
+    assert middle.middle_return == pytest.approx(2 * (middle.guaranteed_return + 1) - 1)
+
+
+def test_middle_uses_the_best_under_above_each_over():
+    found = scan([
+        quote('Over', 24.5, -105, 'DraftKings'),
+        quote('Under', 25.5, -110, 'FanDuel'),
+        quote('Under', 26.5, -102, 'BetMGM'),
+        quote('Under', 23.5, 200, 'Caesars'),  # Below the Over's line - never a partner
+    ])
+
+    [middle] = found
+    assert middle.legs[1][0].best_book == 'BetMGM'
+
+
+def test_middles_costing_too_much_are_skipped():
+    assert scan([quote('Over', 24.5, -200, 'DraftKings'), quote('Under', 26.5, -200, 'FanDuel')]) == []
+
+
+def test_moneyline_arb_needs_every_side():
+    found = []
+    pp.scan_moneyline_market('mma', [quote('Over', 1, 120, 'DraftKings', player='A'), quote('Over', 1, 110, 'FanDuel', player='B')], found)
+    assert [o.kind for o in found] == ['arb']
+
+    found = []
+    pp.scan_moneyline_market('mma', [quote('Over', 1, 300, 'DraftKings', player='A')], found)
+    assert found == []
+
+
+def test_scan_opportunities_ranks_by_guaranteed_return():
+    def outcome(pick, line, price, book, player):
+        return pp.Outcome(player, 'Points', line, pick, price, book, 'A vs B', 'e1', 'player_points')
+
+    table = pp.OddsTable([
+        outcome('Over', 24.5, 105, 'DraftKings', 'Luka Doncic'),
+        outcome('Under', 24.5, 105, 'FanDuel', 'Luka Doncic'),
+        outcome('Over', 20.5, 120, 'DraftKings', 'LeBron James'),
+        outcome('Under', 20.5, 115, 'FanDuel', 'LeBron James'),
+    ])
+    found = pp.scan_opportunities('nba', pp.BestLineIndex(table))
+
+    assert [o.player for o in found] == ['LeBron James', 'Luka Doncic']
+    assert found[0].guaranteed_return > found[1].guaranteed_return > 0
@@ -0,0 +1,54 @@
+import prizepicks_updated as pp
+
+
+def pick(player):
+    return pp.ConsensusPick('nba', player, 'Points', 24.5, 'Over', 2, 52.0, -110, ['DraftKings'], 'A vs B')
+
+
+def build_index():
+    picks = [pick('Luka Dončić'), pick('LeBron James'), pick('Luka Dončić'), pick('Bronny James')]
+    return pp.PlayerIndex(picks, players=('Anthony Davis', 'LeBron James'))
+
+
+def test_fold_name_strips_accents_case_and_punctuation():
+    assert pp.fold_name('  Luka Dončić ') == 'luka doncic'
+    assert pp.fold_name("De'Aaron Fox") == 'de aaron fox'
+
+
+def test_edit_distance():
+    assert pp.edit_distance('doncic', 'doncic') == 0
+    assert pp.edit_distance('lebron', 'lebrom') == 1
+    assert pp.edit_distance('', 'abc') == 3
+
+
+def test_index_keeps_first_seen_players_and_their_picks():
+    index = build_index()
+
+    assert index.names == ['Luka Dončić', 'LeBron James', 'Bronny James', 'Anthony Davis']
+    assert len(index.picks['Luka Dončić']) == 2
+    assert index.picks['Anthony Davis'] == []
+
+
+def test_prefix_matches_full_names_and_later_name_parts():
+    index = build_index()
+
+    assert index.match('luka') == ['Luka Dončić']
+    assert index.match('doncic') == ['Luka Dončić']
+    assert index.match('James') == ['LeBron James', 'Bronny James']
+    assert index.match('luka d') == ['Luka Dončić']
+
+
+def test_misspellings_fall_back_to_close_names():
+    index = build_index()
+
+    assert index.match('lebrom james') == ['LeBron James']
+    assert index.match('zzzzzz') == []
+    assert index.suggest('antony davis')[0] == 'Anthony Davis'
+
+
+def test_mentions_finds_players_in_free_text():
+    index = build_index()
+
+    assert index.mentions('should I take lebron james over tonight?') == ['LeBron James']
+    assert index.mentions('how about doncic') == ['Luka Dončić']
+    assert index.mentions('nothing relevant here') == []
@@ -0,0 +1,75 @@
+import pytest
+
+import prizepicks_updated as pp
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    monkeypatch.setattr(pp, 'RATE_LIMITS', {'premium': (1, 1800), 'trial': (1, 10800), 'burst': (2, 600)})
+    monkeypatch.setattr(pp, 'RATE_LIMIT_OVERRIDES', {})
+    monkeypatch.setattr(pp, 'RATE_LIMIT_GROUPS', {})
+    return pp.RateLimiter()
+
+
+def test_one_token_then_one_every_refill(limiter):
+    assert limiter.check(1, 'predict', 'premium', now=0).allowed
+
+    refused = limiter.check(1, 'predict', 'premium', now=900)
+    assert not refused.allowed
+    assert refused.retry_after == pytest.approx(900)
+    assert refused.tokens == pytest.approx(0.5)
+
+    assert limiter.check(1, 'predict', 'premium', now=1800).allowed
+
+
+def test_never_more_than_two_premium_uses_in_an_hour(limiter):
+    uses = [t for t in range(0, 7200, 60) if limiter.check(1, 'predict', 'premium', now=t).allowed]
+    for start in uses:
+        assert len([t for t in uses if start <= t < start + 3600]) <= 2
+
+
+def test_burst_capacity_and_next_refill(limiter):
+    assert limiter.check(1, 'value', 'burst', now=0).allowed
+    second = limiter.check(1, 'value', 'burst', now=0)
+    assert second.allowed and second.tokens == 0
+    assert second.next_refill == pytest.approx(600)
+    assert not limiter.check(1, 'value', 'burst', now=0).allowed
+
+
+def test_peeking_does_not_consume(limiter):
+    for _ in range(3):
+        assert limiter.check(1, 'predict', 'premium', consume=False, now=0).allowed
+    full = limiter.check(1, 'predict', 'premium', consume=False, now=0)
+    assert full.tokens == 1 and full.next_refill is None
+
+
+def test_buckets_are_per_user_and_per_command(limiter):
+    assert limiter.check(1, 'predict', 'trial', now=0).allowed
+    assert limiter.check(2, 'predict', 'trial', now=0).allowed
+    assert limiter.check(1, 'locks', 'trial', now=0).allowed
+    assert not limiter.check(1, 'predict', 'trial', now=0).allowed
+
+
+def test_groups_share_a_bucket_and_overrides_win(limiter, monkeypatch):
+    monkeypatch.setitem(pp.RATE_LIMIT_GROUPS, 'locks', 'picks')
+    monkeypatch.setitem(pp.RATE_LIMIT_GROUPS, 'potd', 'picks')
+    assert limiter.check(1, 'locks', 'trial', now=0).allowed
+    assert not limiter.check(1, 'potd', 'trial', now=0).allowed
+
+    monkeypatch.setitem(pp.RATE_LIMIT_OVERRIDES, ('trial', 'picks'), (3, 60))
+    assert limiter.check(1, 'potd', 'trial', now=0).allowed
+
+
+def test_stored_spend_is_clamped_to_capacity(limiter):
+    limiter.load(1, [('predict', 5.0, 0)])
+    assert limiter.check(1, 'predict', 'premium', consume=False, now=0).retry_after == pytest.approx(1800)
+
+    # Loading is once per user; memory wins afterwards
+    limiter.load(1, [('predict', 0.0, 0)])
+    assert not limiter.check(1, 'predict', 'premium', consume=False, now=0).allowed
+
+
+def test_describe_rate_limit_matches_the_config(limiter):
+    assert pp.describe_rate_limit('premium') == '2 uses per hour (one every 30 minutes)'
+    assert pp.describe_rate_limit('trial') == '1 use every 3 hours'
+    assert pp.describe_rate_limit('burst') == '6 uses per hour (one every 10 minutes), up to 2 back to back'
@@ -0,0 +1,54 @@
+import prizepicks_updated as pp
+
+
+def props_event():
+    return {
+        'id': 'e1',
+        'home_team': 'Lakers',
+        'away_team': 'Celtics',
+        'bookmakers': [
+            {'title': 'DraftKings', 'markets': [{'key': 'player_points', 'outcomes': [
+                {'description': 'LeBron James', 'name': 'Over', 'point': 25.5, 'price': -115},
+                {'description': 'LeBron James', 'name': 'Under', 'point': 25.5, 'price': -105},
+            ]}]},
+            {'title': 'FanDuel', 'markets': [{'key': 'player_points', 'outcomes': [
+                {'description': 'LeBron James', 'name': 'Over', 'point': 24.5, 'price': -130},
+                {'description': 'LeBron James', 'name': 'Under', 'point': 24.5, 'price': 0},  # No price
+            ]}]},
+        ],
+    }
+
+
+def test_parse_props_payload():
+    outcomes = []
+    added = pp.parse_odds_payload(props_event(), {'player_points': 'Points'}, True, outcomes)
+
+    assert added == 3 == len(outcomes)
+    first = outcomes[0]
+    assert (first.player, first.prop_type, first.line, first.pick, first.odds, first.bookmaker) == \
+        ('LeBron James', 'Points', 25.5, 'Over', -115, 'DraftKings')
+    assert (first.game, first.event_id, first.market) == ('Lakers vs Celtics', 'e1', 'player_points')
+    assert [o.bookmaker for o in outcomes] == ['DraftKings', 'DraftKings', 'FanDuel']
+
+
+def test_parse_moneyline_payload():
+    event = {'id': 'e2', 'home_team': 'A', 'away_team': 'B', 'bookmakers': [
+        {'title': 'BetMGM', 'markets': [{'key': 'h2h', 'outcomes': [{'name': 'A', 'price': 150}, {'name': 'B', 'price': -180}]}]},
+    ]}
+    outcomes = []
+    pp.parse_odds_payload(event, {'h2h': 'To Win'}, False, outcomes)
+
+    assert [(o.player, o.prop_type, o.line, o.pick, o.odds) for o in outcomes] == \
+        [('A', 'To Win', 1, 'Over', 150), ('B', 'To Win', 1, 'Over', -180)]
+
+
+def test_event_without_bookmakers_adds_nothing():
+    outcomes = []
+    assert pp.parse_odds_payload({'id': 'e3'}, {}, True, outcomes) == 0
+    assert outcomes == []
+
+
+def test_outcome_strings_are_interned():
+    a = pp.Outcome(''.join(['Luka ', 'Doncic']), 'Points', 30.5, 'Over', -110, 'DraftKings', 'g')
+    b = pp.Outcome(''.join(['Luka', ' Doncic']), 'Points', 30.5, 'Under', -110, 'FanDuel', 'g')
+    assert a.player is b.player